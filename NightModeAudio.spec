@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('menu_icon.png', '.'), ('menu_icon_on.png', '.')],
-    hiddenimports=[],
+    hiddenimports=['dsp_numba'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
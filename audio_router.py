@@ -1,112 +1,644 @@
 import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
 
 import numpy as np
-import sounddevice as sd
+
+import portaudio_index
+from compressor import DynamicsParams
+from dsp_engine import BACKEND_NUMPY, ProcessingChain
+from engine_defaults import DEFAULT_CROSSFADE_MS
+from latency_tuner import DEFAULT_AUTO_TUNE_SETTING, CallbackWindow, LatencySetting
+from stream_stats import StatsSnapshot, StreamStats
+from system_pressure import pressure_reason
+
+
+SWITCH_CROSSFADE = "crossfade"
+SWITCH_RESTART = "restart"
+PREROLL_BLOCKS = 2
+SWITCH_TIMEOUT = 1.0
+FADE_OUT_MARGIN = 0.1
+STANDBY_LIMIT = 2
+
+
+@dataclass(frozen=True, slots=True)
+class SwitchReport:
+    mode: str
+    gap_ms: float
+    overlap_ms: float
+    elapsed_ms: float
+    profile_ms: float
+
+
+class OutputFade:
+    """콜백 출력에 곱하는 선형 페이드. 램프 버퍼는 미리 만들어 두고 제자리로 곱한다."""
+
+    def __init__(self, max_frames: int, fade_frames: int, fade_in: bool):
+        self.fade_frames = max(1, fade_frames)
+        self.fade_in = fade_in
+        self.position = 0
+        self._steps = np.arange(max_frames, dtype=np.float32)
+        self._ramp = np.zeros(max_frames, dtype=np.float32)
+
+    @property
+    def done(self) -> bool:
+        return self.position >= self.fade_frames
+
+    def apply(self, outdata: np.ndarray):
+        frames = outdata.shape[0]
+        if frames > self._steps.shape[0]:
+            self._steps = np.arange(frames, dtype=np.float32)
+            self._ramp = np.zeros(frames, dtype=np.float32)
+        ramp = self._ramp[:frames]
+        np.add(self._steps[:frames], self.position, out=ramp)
+        ramp *= 1.0 / self.fade_frames
+        np.clip(ramp, 0.0, 1.0, out=ramp)
+        if not self.fade_in:
+            np.subtract(1.0, ramp, out=ramp)
+        for index in range(outdata.shape[1]):
+            np.multiply(outdata[:, index], ramp, out=outdata[:, index])
+        self.position += frames
+
+
+@dataclass(frozen=True, slots=True)
+class StreamParams:
+    """스트림을 열기 전에 PortAudio에서 확인한 값. 대기 후보는 이걸 캐시해 둔다."""
+
+    input_index: int
+    output_index: int
+    output_name: str
+    samplerate: int
+    channels: int
+
+
+@dataclass(slots=True, eq=False)
+class _StreamSlot:
+    """스트림 하나와 그 스트림 전용 체인/통계. 출력 전환 중에는 두 슬롯이 같이 돈다."""
+
+    chain: ProcessingChain
+    stats: StreamStats
+    setting: LatencySetting
+    output_index: int
+    output_name: str
+    samplerate: int
+    blocksize: int
+    muted: bool = False
+    stream: object = None
+    fade: OutputFade | None = None
+    standby: bool = False
+    blocks: int = 0
+    first_audible: float = 0.0
+    last_audible: float = 0.0
+
+    def fade_frames(self, fade_ms: float) -> int:
+        return int(round(fade_ms * 1e-3 * self.samplerate))
+
+
+@dataclass(slots=True, eq=False)
+class _StandbyEntry:
+    """대기 후보 하나. slot이 있으면 스트림이 이미 무음으로 돌고 있다(warm)."""
+
+    params: StreamParams
+    generation: int
+    slot: _StreamSlot | None = None
 
 
 class AudioRouter:
     def __init__(self, logger: logging.Logger):
         self.logger = logger
         self.stream = None
+        self.crossfade_ms = DEFAULT_CROSSFADE_MS
+        self.last_switch: SwitchReport | None = None
+        self.last_profile_ms: float | None = None
+        self._profile: tuple[float, float, float] | None = None
+        self.standby_limit = 0
+        self.standby_warm = False
+        self._standby: dict[str, _StandbyEntry] = {}
+        self._slot: _StreamSlot | None = None
         self.current_output_name = None
         self.current_output_index = None
-        self.threshold_db = -20.0
-        self.makeup_gain_db = 10.0
-        self.ratio = 4.0
+        self.chain = ProcessingChain()
+        self.latency_setting = DEFAULT_AUTO_TUNE_SETTING
+        self.active_setting: LatencySetting | None = None
+        self.stats = StreamStats()
+        self._window_blocks = 0
+        self._window_xruns = 0
+
+    @property
+    def params(self) -> DynamicsParams:
+        return self.chain.params
+
+    def configure(
+        self,
+        threshold_db: float,
+        makeup_gain_db: float,
+        ratio: float,
+        attack_ms: float | None = None,
+        release_ms: float | None = None,
+    ):
+        """새 파라미터 스냅샷을 만들어 참조 교체 한 번으로 오디오 스레드에 넘긴다."""
+        self.chain.configure(threshold_db, makeup_gain_db, ratio, attack_ms, release_ms)
 
-    def configure(self, threshold_db: float, makeup_gain_db: float, ratio: float):
-        self.threshold_db = threshold_db
-        self.makeup_gain_db = makeup_gain_db
-        self.ratio = ratio
+    def configure_limiter(self, enabled: bool, lookahead_ms: float | None = None):
+        """리미터 설정은 다음 start/restart부터 적용된다(지연 길이가 바뀌기 때문)."""
+        self.chain.configure_limiter(enabled, lookahead_ms)
+        self.clear_standby()
+
+    def set_kernel_backend(self, name: str) -> str:
+        """커널을 지금 불러 컴파일까지 끝내 둔다. 다음 start/restart부터 적용된다."""
+        started = time.perf_counter()
+        try:
+            backend = self.chain.set_backend(name)
+        except Exception as exc:
+            self.logger.error(f"DSP 커널 백엔드 {name} 불러오기 실패 - NumPy 사용: {exc}")
+            backend = self.chain.set_backend(BACKEND_NUMPY)
+        self.clear_standby()
+        self.logger.info(
+            f"DSP 커널 백엔드: 요청={name} 사용={backend} 준비 {(time.perf_counter() - started) * 1e3:.0f}ms"
+        )
+        return backend
+
+    def configure_switch(self, crossfade_ms: float):
+        """출력 전환 방식. 0이면 기존 스트림을 닫고 새로 연다."""
+        self.crossfade_ms = max(0.0, crossfade_ms)
+
+    def set_latency_setting(self, setting: LatencySetting):
+        """블록 크기/지연 설정은 다음 start/restart부터 적용된다."""
+        self.latency_setting = setting
+
+    def set_profile(self, threshold_db: float, makeup_gain_db: float, ratio: float):
+        """다음 start/restart가 여는 출력의 컴프레서 값. 지금 나오는 출력은 건드리지 않는다.
+
+        전환할 때 새 출력의 체인에만 스냅샷으로 넣으므로 교차 페이드 동안 기존 출력은
+        이전 값, 새 출력은 새 값으로 처리된다.
+        """
+        self._profile = (threshold_db, makeup_gain_db, ratio)
+
+    def _apply_profile(self, chain: ProcessingChain, samplerate: int | None = None):
+        started = time.perf_counter()
+        changes = {"samplerate": samplerate}
+        if self._profile is not None:
+            changes["threshold_db"], changes["makeup_gain_db"], changes["ratio"] = self._profile
+        chain.compressor.params = self.chain.params.replace(**changes)
+        self.last_profile_ms = (time.perf_counter() - started) * 1e3
+
+    def take_callback_window(self) -> CallbackWindow:
+        """마지막 호출 이후 콜백 기록을 돌려준다. 메인 스레드에서 부른다."""
+        blocks = self.stats.blocks
+        xruns = self.stats.xrun_blocks
+        window = CallbackWindow(
+            blocks=blocks - self._window_blocks,
+            xruns=xruns - self._window_xruns,
+            max_duration=self.stats.take_window_max(),
+            deadline=self.stats.deadline,
+        )
+        self._window_blocks = blocks
+        self._window_xruns = xruns
+        return window
+
+    def stats_snapshot(self) -> StatsSnapshot:
+        return self.stats.snapshot(self._stream_cpu_load())
+
+    def _stream_cpu_load(self) -> float | None:
+        if self.stream is None:
+            return None
+        try:
+            return float(self.stream.cpu_load)
+        except Exception:
+            return None
+
+    @property
+    def processing_latency_ms(self) -> float:
+        if self.stream is None:
+            return 0.0
+        return self.chain.latency_ms
+
+    @property
+    def output_latency_ms(self) -> float | None:
+        if self.stream is None:
+            return None
+        return self.stream.latency[1] * 1e3 + self.processing_latency_ms
+
+    def warm_up(self) -> bool:
+        """PortAudio를 불러와 장치 목록까지 만들어 둔다. 첫 start가 이 비용을 치르지 않게 한다."""
+        started = time.perf_counter()
+        try:
+            devices = portaudio_index.snapshot()
+        except Exception:
+            self.logger.exception("PortAudio 준비 실패")
+            return False
+        self.logger.info(
+            f"PortAudio 준비: 출력 {len(devices.output_index_by_name)}개 "
+            f"{(time.perf_counter() - started) * 1e3:.0f}ms"
+        )
+        return True
 
     def find_blackhole_input(self) -> int | None:
-        for index, device in enumerate(sd.query_devices()):
-            if "BlackHole" in device["name"] and device["max_input_channels"] > 0:
-                return index
-        return None
+        return portaudio_index.snapshot().blackhole_input
+
+    def find_output_by_name(self, name: str) -> int | None:
+        return portaudio_index.snapshot().output_index_by_name.get(name)
+
+    @property
+    def is_running(self) -> bool:
+        return self.stream is not None
+
+    def verify_output_index(self, output_index: int | None, output_name: str) -> int | None:
+        """인덱스가 가리키는 장치 이름이 기대와 다르면 이름으로 다시 찾는다.
+
+        다른 프로세스에서 얻은 인덱스는 PortAudio 초기화 시점이 달라 어긋날 수 있고,
+        그쪽에서 못 찾았으면 None이 온다. 스트림이 없을 때만 PortAudio를 재초기화해서
+        목록을 새로 읽는다.
+        """
+        if output_index is not None and portaudio_index.snapshot().name_by_index.get(output_index) == output_name:
+            return output_index
+
+        found = self.find_output_by_name(output_name)
+        if found is None and self.stream is None:
+            self.logger.debug(f"'{output_name}' 인덱스 불일치 - PortAudio 재초기화 후 재검색")
+            portaudio_index.reinitialize()
+            found = self.find_output_by_name(output_name)
+        if found is None:
+            self.logger.error(f"출력 장치 '{output_name}'를 sounddevice 목록에서 찾을 수 없음")
+        elif found != output_index:
+            self.logger.debug(f"sd_index 보정: {output_index} → {found} name={output_name}")
+        return found
+
+    def start(self, output_index: int | None, output_name: str | None = None) -> bool:
+        """sounddevice 인덱스를 직접 받아 스트림을 연다.
+
+        output_name을 주면 인덱스가 그 장치를 가리키는지 확인하고 어긋나면 보정한다.
+        """
+        params = self._stream_params(output_index, output_name)
+        if params is None:
+            return False
+        self._apply_profile(self.chain)
+        slot = self._open_slot(params, self.chain, muted=False)
+        if slot is None:
+            return False
+        self._activate(slot)
+        return True
+
+    def _stream_params(self, output_index: int | None, output_name: str | None) -> StreamParams | None:
+        if output_name is not None:
+            output_index = self.verify_output_index(output_index, output_name)
+            if output_index is None:
+                return None
 
-    def start(self, output_index: int) -> bool:
-        """sounddevice 인덱스를 직접 받아 스트림을 연다. 이름 매칭 없음."""
         input_index = self.find_blackhole_input()
         if input_index is None:
             self.logger.error("BlackHole 입력 장치를 찾을 수 없음")
-            return False
+            return None
 
+        sd = portaudio_index.backend()
         try:
             input_info = sd.query_devices(input_index, "input")
             output_info = sd.query_devices(output_index, "output")
-            samplerate = int(output_info["default_samplerate"])
-            channels = min(
+        except Exception as exc:
+            self.logger.error(f"오디오 장치 조회 오류: {exc}")
+            return None
+        return StreamParams(
+            input_index=input_index,
+            output_index=output_index,
+            output_name=output_info["name"],
+            samplerate=int(output_info["default_samplerate"]),
+            channels=min(
                 2,
                 int(input_info["max_input_channels"]),
                 int(output_info["max_output_channels"]),
+            ),
+        )
+
+    def _open_slot(
+        self,
+        params: StreamParams,
+        chain: ProcessingChain,
+        muted: bool,
+        standby: bool = False,
+    ) -> "_StreamSlot | None":
+        stream = None
+        try:
+            samplerate = params.samplerate
+            setting = self.latency_setting
+            blocksize = setting.blocksize
+            chain.prepare(blocksize, params.channels, samplerate)
+            stats = StreamStats()
+            stats.reset(blocksize / samplerate)
+            slot = _StreamSlot(
+                chain=chain,
+                stats=stats,
+                setting=setting,
+                output_index=params.output_index,
+                output_name=params.output_name,
+                samplerate=samplerate,
+                blocksize=blocksize,
+                muted=muted,
+                standby=standby,
             )
-            output_name = output_info["name"]
-
-            def callback(indata, outdata, _frames, _time, _status):
-                rms = np.sqrt(np.mean(indata.flatten() ** 2))
-                if rms <= 0:
-                    rms = 1e-9
-
-                current_db = 20 * np.log10(rms)
-                gain_reduction_db = 0.0
-                if current_db > self.threshold_db:
-                    overshoot = current_db - self.threshold_db
-                    target = self.threshold_db + (overshoot / self.ratio)
-                    gain_reduction_db = current_db - target
-
-                total_gain_db = self.makeup_gain_db - gain_reduction_db
-                processed = indata * (10 ** (total_gain_db / 20))
-                outdata[:] = np.clip(processed, -1.0, 1.0)
-
-            self.stream = sd.Stream(
-                device=(input_index, output_index),
-                channels=channels,
+            perf_counter = time.perf_counter
+
+            def callback(indata, outdata, _frames, time_info, status):
+                if slot.standby:
+                    outdata.fill(0.0)
+                    slot.blocks += 1
+                    return
+                started = perf_counter()
+                chain.process(indata, outdata)
+                if slot.muted:
+                    outdata.fill(0.0)
+                else:
+                    fade = slot.fade
+                    if fade is not None:
+                        fade.apply(outdata)
+                        if fade.done:
+                            slot.fade = None
+                            slot.muted = not fade.fade_in
+                    now = perf_counter()
+                    if slot.first_audible == 0.0:
+                        slot.first_audible = now
+                    slot.last_audible = now
+                slot.blocks += 1
+                stats.record(perf_counter() - started, time_info, status)
+
+            stream = portaudio_index.backend().Stream(
+                device=(params.input_index, params.output_index),
+                channels=params.channels,
                 samplerate=samplerate,
-                blocksize=512,
-                latency="low",
+                blocksize=blocksize,
+                latency=setting.latency,
                 callback=callback,
             )
-            self.stream.start()
-            self.current_output_name = output_name
-            self.current_output_index = output_index
-            self.logger.info(
-                f"오디오 스트림 시작: sd_index={output_index} name={output_name}"
-            )
-            return True
+            stream.start()
+            slot.stream = stream
+            return slot
         except Exception as exc:
             self.logger.error(f"오디오 스트림 오류: {exc}")
-            if self.stream is not None:
+            if stream is not None:
                 try:
-                    self.stream.close()
+                    stream.close()
                 except Exception:
                     self.logger.exception("실패한 오디오 스트림 정리 중 오류")
-            self.stream = None
-            self.current_output_name = None
-            self.current_output_index = None
-            return False
+            return None
+
+    def _activate(self, slot: "_StreamSlot"):
+        self._slot = slot
+        self.stream = slot.stream
+        self.chain = slot.chain
+        self.stats = slot.stats
+        self._window_blocks = 0
+        self._window_xruns = 0
+        self.active_setting = slot.setting
+        self.current_output_name = slot.output_name
+        self.current_output_index = slot.output_index
+        self.logger.info(
+            f"오디오 스트림 시작: sd_index={slot.output_index} name={slot.output_name} "
+            f"blocksize={slot.blocksize} latency={slot.setting.latency} 커널={slot.chain.backend} "
+            f"출력 지연={self.output_latency_ms:.1f}ms (리미터 {self.processing_latency_ms:.1f}ms)"
+        )
+
+    def _close_slot(self, slot: "_StreamSlot"):
+        try:
+            slot.stream.stop()
+            slot.stream.close()
+        except Exception:
+            self.logger.exception("오디오 스트림 정리 중 오류")
 
     def stop(self):
-        if self.stream is not None:
-            self.stream.stop()
-            self.stream.close()
+        self.clear_standby()
+        if self._slot is not None:
+            self._close_slot(self._slot)
+        self._slot = None
         self.stream = None
+        self.active_setting = None
         self.current_output_name = None
         self.current_output_index = None
 
-    def restart(self, output_index: int) -> bool:
-        previous_stream = self.stream
-        previous_output_name = self.current_output_name
-        previous_output_index = self.current_output_index
+    def restart(self, output_index: int | None, output_name: str | None = None, reenumerate: bool = False) -> bool:
+        """열린 스트림이 있으면 출력을 바꾼다.
+
+        crossfade_ms > 0이면 make-before-break: 새 스트림을 무음으로 열어 콜백이
+        PREROLL_BLOCKS번 돌 때까지 기다린 뒤 두 출력을 crossfade_ms 동안 교차
+        페이드하고 나서 기존 스트림을 닫는다. 새 스트림을 못 열면 기존 출력은
+        건드리지 않는다. 0이면 기존 스트림을 닫고 새로 연다(실패하면 되돌린다).
+        대상이 대기 풀에 있으면 캐시한 파라미터를 쓰고, 스트림까지 열려 있으면
+        프리롤 없이 바로 교차 페이드한다. set_profile로 정한 값은 새 출력의 체인에만
+        넣는다. 결과는 last_switch에 남긴다.
+
+        이 프로세스의 PortAudio가 열거한 뒤에 연결된 장치는 목록에 없고, 재초기화는
+        열린 스트림을 모두 죽인다. 그런 장치이거나 reenumerate=True면 기존 스트림을
+        먼저 닫고 재초기화한 뒤 연다(break-before-make).
+        """
+        previous = self._slot
+        if previous is None:
+            if reenumerate:
+                self._reinitialize()
+            return self.start(output_index, output_name)
+        started = time.perf_counter()
+        entry = self._take_standby(output_name)
+        if entry is None and output_name is not None and self.find_output_by_name(output_name) is None:
+            self.logger.info(f"'{output_name}'가 PortAudio 목록에 없음 - 기존 스트림을 닫고 재초기화 후 연다")
+            reenumerate = True
+        if self.crossfade_ms <= 0 or reenumerate:
+            if entry is not None and entry.slot is not None:
+                self._close_slot(entry.slot)
+            return self._restart_break_before_make(previous, output_index, output_name, started, reenumerate)
+
+        slot = self._handover_standby(entry)
+        if slot is None:
+            params = entry.params if entry is not None else self._stream_params(output_index, output_name)
+            slot = None
+            if params is not None:
+                chain = self.chain.clone()
+                self._apply_profile(chain)
+                slot = self._open_slot(params, chain, muted=True)
+            if slot is None:
+                self.logger.debug("새 출력 열기 실패 - 기존 스트림 유지")
+                return False
+            if not _wait_until(lambda: slot.blocks >= PREROLL_BLOCKS, SWITCH_TIMEOUT):
+                self.logger.error(f"새 출력 스트림 콜백이 시작되지 않음 - 기존 스트림 유지: name={slot.output_name}")
+                self._close_slot(slot)
+                return False
+
+        slot.fade = OutputFade(slot.blocksize, slot.fade_frames(self.crossfade_ms), fade_in=True)
+        previous.fade = OutputFade(previous.blocksize, previous.fade_frames(self.crossfade_ms), fade_in=False)
+        slot.muted = False
+        self._activate(slot)
+
+        # 기존 장치가 이미 빠졌으면 콜백이 멈춰 페이드가 끝나지 않으므로 오래 기다리지 않는다.
+        if not _wait_until(lambda: previous.muted, self.crossfade_ms * 1e-3 + FADE_OUT_MARGIN):
+            self.logger.debug("기존 출력 페이드아웃 확인 시간 초과 - 그대로 닫음")
+        self._close_slot(previous)
+        _wait_until(lambda: slot.first_audible > 0.0, SWITCH_TIMEOUT)
+        self._report_switch(SWITCH_CROSSFADE, previous, slot, started)
+        return True
+
+    def _restart_break_before_make(
+        self,
+        previous: "_StreamSlot",
+        output_index: int,
+        output_name: str | None,
+        started: float,
+        reenumerate: bool = False,
+    ) -> bool:
+        previous_params = previous.chain.params
         self.stop()
-        if self.start(output_index):
+        if reenumerate:
+            self._reinitialize()
+        if self.start(output_index, output_name):
+            slot = self._slot
+            _wait_until(lambda: slot.first_audible > 0.0, SWITCH_TIMEOUT)
+            self._report_switch(SWITCH_RESTART, previous, slot, started)
             return True
 
-        if previous_stream is not None and previous_output_index is not None:
-            self.logger.debug(
-                f"새 출력 전환 실패 - 기존 출력으로 복구 시도: "
-                f"sd_index={previous_output_index} name={previous_output_name}"
+        self.logger.debug(
+            f"새 출력 전환 실패 - 기존 출력으로 복구 시도: "
+            f"sd_index={previous.output_index} name={previous.output_name}"
+        )
+        # 되돌리는 출력은 새 장치의 프로필이 아니라 원래 값으로 연다.
+        profile, self._profile = self._profile, None
+        self.chain.compressor.params = previous_params
+        try:
+            return self.start(previous.output_index, previous.output_name)
+        finally:
+            self._profile = profile
+
+    def _reinitialize(self):
+        """열린 스트림이 없을 때만 부른다. 실패는 뒤따르는 start()가 장치를 못 찾는 것으로 드러난다."""
+        try:
+            portaudio_index.reinitialize()
+        except Exception:
+            self.logger.exception("PortAudio 재초기화 실패")
+
+    def _handover_standby(self, entry: _StandbyEntry | None) -> "_StreamSlot | None":
+        """warm 대기 스트림을 처리 상태로 바꾼다. 콜백이 한 번 더 돌아야 쓴다."""
+        if entry is None or entry.slot is None:
+            return None
+        slot = entry.slot
+        if slot.setting != self.latency_setting:
+            self._close_slot(slot)
+            return None
+        self._apply_profile(slot.chain, slot.samplerate)
+        mark = slot.blocks
+        slot.standby = False
+        if not _wait_until(lambda: slot.blocks > mark, slot.blocksize / slot.samplerate + FADE_OUT_MARGIN):
+            self.logger.debug(f"대기 스트림 콜백 멈춤 - 새로 연다: name={slot.output_name}")
+            self._close_slot(slot)
+            return None
+        self.logger.debug(f"대기 스트림으로 전환: name={slot.output_name}")
+        return slot
+
+    def configure_standby(self, limit: int, warm: bool):
+        """대기 후보 수(0이면 끔, 최대 STANDBY_LIMIT)와 스트림까지 미리 열지 여부."""
+        limit = max(0, min(limit, STANDBY_LIMIT))
+        if (limit, warm) != (self.standby_limit, self.standby_warm):
+            self.standby_limit = limit
+            self.standby_warm = warm
+            self.clear_standby()
+
+    def set_standby(self, candidates: list[tuple[int, str]]) -> list[str]:
+        """우선순위 순서의 (sd_index, 이름) 후보로 대기 풀을 맞추고 남은 이름을 돌려준다.
+
+        후보에서 빠진 항목과 PortAudio 세대가 바뀐 항목은 버린다. 메모리나 CPU
+        압박이 높으면 풀을 모두 비우고 새로 채우지 않는다.
+        """
+        reason = pressure_reason(self._stream_cpu_load())
+        if reason is not None:
+            if self._standby:
+                self.logger.info(f"대기 출력 해제({reason}): {list(self._standby)}")
+                self.clear_standby()
+            return []
+
+        wanted = [
+            (index, name) for index, name in candidates if name != self.current_output_name
+        ][: self.standby_limit]
+        wanted_names = {name for _, name in wanted}
+        for name in list(self._standby):
+            if name not in wanted_names:
+                self._drop_standby(name)
+
+        for index, name in wanted:
+            entry = self._standby.get(name)
+            if entry is not None and entry.generation == portaudio_index.generation():
+                continue
+            if entry is not None:
+                self._drop_standby(name)
+            entry = self._prepare_standby(index, name)
+            if entry is not None:
+                self._standby[name] = entry
+        return list(self._standby)
+
+    def clear_standby(self):
+        for name in list(self._standby):
+            self._drop_standby(name)
+
+    def _take_standby(self, output_name: str | None) -> _StandbyEntry | None:
+        entry = self._standby.pop(output_name, None) if output_name is not None else None
+        if entry is not None and entry.generation != portaudio_index.generation():
+            if entry.slot is not None:
+                self._close_slot(entry.slot)
+            return None
+        return entry
+
+    def _drop_standby(self, name: str):
+        entry = self._standby.pop(name)
+        if entry.slot is not None:
+            self._close_slot(entry.slot)
+
+    def _prepare_standby(self, output_index: int, output_name: str) -> _StandbyEntry | None:
+        started = time.perf_counter()
+        if self.find_output_by_name(output_name) is None:
+            # 스트림이 도는 동안에는 재초기화할 수 없다. 전환할 때 restart()가 다시 열거한다.
+            self.logger.debug(f"대기 출력 건너뜀 - PortAudio 목록에 아직 없음: name={output_name}")
+            return None
+        params = self._stream_params(output_index, output_name)
+        if params is None:
+            return None
+        try:
+            portaudio_index.backend().check_output_settings(
+                device=params.output_index,
+                channels=params.channels,
+                samplerate=params.samplerate,
             )
-            return self.start(previous_output_index)
+        except Exception as exc:
+            self.logger.debug(f"대기 출력 검증 실패: name={output_name} {exc}")
+            return None
 
-        return False
+        slot = None
+        if self.standby_warm and self._slot is not None:
+            slot = self._open_slot(params, self.chain.clone(), muted=True, standby=True)
+        self.logger.debug(
+            f"대기 출력 준비: name={params.output_name} sd_index={params.output_index} "
+            f"{'스트림 열림' if slot is not None else '파라미터만'} "
+            f"{(time.perf_counter() - started) * 1e3:.0f}ms"
+        )
+        return _StandbyEntry(params, portaudio_index.generation(), slot)
+
+    def _report_switch(self, mode: str, previous: "_StreamSlot", slot: "_StreamSlot", started: float):
+        gap = slot.first_audible - previous.last_audible
+        report = SwitchReport(
+            mode=mode,
+            gap_ms=max(gap, 0.0) * 1e3,
+            overlap_ms=max(-gap, 0.0) * 1e3,
+            elapsed_ms=(time.perf_counter() - started) * 1e3,
+            profile_ms=self.last_profile_ms or 0.0,
+        )
+        self.last_switch = report
+        self.logger.info(
+            f"출력 전환 완료({mode}): {previous.output_name} → {slot.output_name} "
+            f"무음 {report.gap_ms:.1f}ms 겹침 {report.overlap_ms:.1f}ms 소요 {report.elapsed_ms:.0f}ms "
+            f"프로필 {report.profile_ms:.2f}ms"
+        )
+
+    @property
+    def last_switch_gap_ms(self) -> float | None:
+        return None if self.last_switch is None else self.last_switch.gap_ms
+
+
+def _wait_until(predicate: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.002)
+    return True
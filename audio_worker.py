@@ -0,0 +1,348 @@
+"""오디오 스트림과 DSP를 별도 프로세스에서 돌리는 워커.
+
+메뉴바 앱의 메인 스레드(CoreAudio 조회, 메뉴 재구성, 설정 저장, 재시도 대기)가
+오디오 콜백과 GIL을 다투지 않도록 AudioRouter를 spawn 프로세스 안에 둔다.
+앱은 Pipe로 짧은 제어 명령만 보내고, 통계와 미터는 워커가 shared_memory
+링 버퍼에 주기적으로 써 두면 앱이 잠금 없이 읽는다.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from dsp_engine import BACKEND_NUMPY
+from latency_tuner import CallbackWindow, LatencySetting
+from shm_ring import SharedRing
+from stream_stats import DURATION_BUCKET_EDGES, XRUN_KINDS, StatsSnapshot
+
+
+STATS_FIELDS = (
+    "published_at",
+    "blocks",
+    "xrun_blocks",
+    *XRUN_KINDS,
+    "mean_duration",
+    "max_duration",
+    "dac_gap_last",
+    "dac_gap_max",
+    "deadline",
+    "cpu_load",
+    "gain_reduction_db",
+    *(f"bucket_{index}" for index in range(len(DURATION_BUCKET_EDGES) + 1)),
+)
+FIELD_INDEX = {name: index for index, name in enumerate(STATS_FIELDS)}
+BUCKET_START = FIELD_INDEX["bucket_0"]
+PUBLISH_INTERVAL = 0.1
+COMMAND_TIMEOUT = 10.0
+# numba 커널은 캐시가 없으면 첫 컴파일에 몇 초 걸린다. warm_up은 워커가 numpy/PortAudio를 불러오기를 기다린다.
+COMMAND_TIMEOUTS = {"set_kernel_backend": 60.0, "warm_up": 30.0}
+PARENT_CHECK_INTERVAL = 1.0
+
+
+class _StatsPublisher(threading.Thread):
+    def __init__(self, router, ring: SharedRing):
+        super().__init__(name="stats-publisher", daemon=True)
+        self.router = router
+        self.ring = ring
+        self.stopped = threading.Event()
+        self._record = np.zeros(len(STATS_FIELDS), dtype=np.float64)
+
+    def run(self):
+        record = self._record
+        while not self.stopped.wait(PUBLISH_INTERVAL):
+            snapshot = self.router.stats_snapshot()
+            record[FIELD_INDEX["published_at"]] = time.time()
+            record[FIELD_INDEX["blocks"]] = snapshot.blocks
+            record[FIELD_INDEX["xrun_blocks"]] = snapshot.xrun_blocks
+            for kind in XRUN_KINDS:
+                record[FIELD_INDEX[kind]] = snapshot.xruns[kind]
+            record[FIELD_INDEX["mean_duration"]] = snapshot.mean_duration
+            record[FIELD_INDEX["max_duration"]] = snapshot.max_duration
+            record[FIELD_INDEX["dac_gap_last"]] = snapshot.dac_gap_last
+            record[FIELD_INDEX["dac_gap_max"]] = snapshot.dac_gap_max
+            record[FIELD_INDEX["deadline"]] = snapshot.deadline
+            record[FIELD_INDEX["cpu_load"]] = np.nan if snapshot.cpu_load is None else snapshot.cpu_load
+            record[FIELD_INDEX["gain_reduction_db"]] = self.router.chain.gain_reduction_db
+            record[BUCKET_START:] = snapshot.histogram
+            self.ring.write(record)
+
+
+def _router_state(router) -> dict:
+    return {
+        "current_output_index": router.current_output_index,
+        "current_output_name": router.current_output_name,
+        "output_latency_ms": router.output_latency_ms,
+        "processing_latency_ms": router.processing_latency_ms,
+        "last_switch_gap_ms": router.last_switch_gap_ms,
+        "last_profile_ms": router.last_profile_ms,
+    }
+
+
+def _worker_main(conn, ring_name: str, log_file: str | None, parent_pid: int, portaudio_factory=None):
+    if log_file:
+        logging.basicConfig(
+            filename=log_file,
+            level=logging.DEBUG,
+            format="%(asctime)s - %(levelname)s - [audio-worker] %(message)s",
+        )
+    logger = logging.getLogger("audio_worker")
+
+    import portaudio_index
+    from audio_router import AudioRouter
+
+    if portaudio_factory is not None:
+        portaudio_index.use_backend(portaudio_factory())
+    router = AudioRouter(logger)
+    ring = SharedRing(len(STATS_FIELDS), name=ring_name)
+    publisher = _StatsPublisher(router, ring)
+    publisher.start()
+    logger.info(f"오디오 워커 시작: pid={os.getpid()}")
+
+    commands = {
+        "configure": router.configure,
+        "configure_limiter": router.configure_limiter,
+        "set_kernel_backend": router.set_kernel_backend,
+        "configure_switch": router.configure_switch,
+        "configure_standby": router.configure_standby,
+        "set_standby": router.set_standby,
+        "set_latency_setting": router.set_latency_setting,
+        "set_profile": router.set_profile,
+        "warm_up": router.warm_up,
+        "start": router.start,
+        "restart": router.restart,
+        "stop": router.stop,
+        "take_callback_window": router.take_callback_window,
+    }
+
+    try:
+        while True:
+            if not conn.poll(PARENT_CHECK_INTERVAL):
+                if os.getppid() != parent_pid:
+                    logger.info("부모 프로세스 종료 감지 - 워커 종료")
+                    break
+                continue
+            try:
+                command, args, kwargs = conn.recv()
+            except EOFError:
+                break
+            if command == "shutdown":
+                conn.send(("ok", None, _router_state(router)))
+                break
+            handler = commands.get(command)
+            if handler is None:
+                conn.send(("error", f"알 수 없는 명령: {command}", _router_state(router)))
+                continue
+            try:
+                result = handler(*args, **kwargs)
+                conn.send(("ok", result, _router_state(router)))
+            except Exception as exc:
+                logger.exception(f"워커 명령 실패: {command}")
+                conn.send(("error", str(exc), _router_state(router)))
+    finally:
+        publisher.stopped.set()
+        try:
+            router.stop()
+        except Exception:
+            logger.exception("워커 종료 중 스트림 정리 실패")
+        publisher.join(timeout=1.0)
+        ring.close()
+        conn.close()
+
+
+class AudioWorkerClient:
+    """AudioRouter와 같은 인터페이스로 워커 프로세스를 제어하는 앱 쪽 프록시.
+
+    portaudio_factory를 주면 워커가 시작할 때 불러 sounddevice 대신 쓴다. spawn으로
+    넘기므로 pickle할 수 있어야 한다(예: fake_audio.FakePortAudio.shared의 partial).
+    """
+
+    def __init__(self, logger: logging.Logger, log_file: str | None = None, portaudio_factory: Callable | None = None):
+        self.logger = logger
+        self.log_file = log_file
+        self.portaudio_factory = portaudio_factory
+        self.current_output_name = None
+        self.current_output_index = None
+        self.output_latency_ms = None
+        self.processing_latency_ms = 0.0
+        self.last_switch_gap_ms = None
+        self.last_profile_ms = None
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._ring: SharedRing | None = None
+        self._record = np.zeros(len(STATS_FIELDS), dtype=np.float64)
+        self._lock = threading.Lock()
+        # 워커가 다시 떠도 같은 상태가 되도록 마지막 설정을 기억해 둔다.
+        self._replay: dict[str, tuple[tuple, dict]] = {}
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def launch(self) -> bool:
+        if self.is_alive:
+            return True
+        self._cleanup()
+        try:
+            self._ring = SharedRing(len(STATS_FIELDS))
+            parent_conn, child_conn = self._context.Pipe()
+            self._process = self._context.Process(
+                target=_worker_main,
+                args=(child_conn, self._ring.name, self.log_file, os.getpid(), self.portaudio_factory),
+                name="night-mode-audio-worker",
+                daemon=True,
+            )
+            self._process.start()
+            child_conn.close()
+            self._conn = parent_conn
+        except Exception:
+            self.logger.exception("오디오 워커 프로세스 시작 실패")
+            self._cleanup()
+            return False
+
+        self.logger.info(f"오디오 워커 프로세스 시작: pid={self._process.pid}")
+        for command, (args, kwargs) in self._replay.items():
+            self._call(command, *args, **kwargs)
+        return self.is_alive
+
+    def shutdown(self):
+        if self.is_alive:
+            self._call("shutdown", timeout=2.0)
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._cleanup()
+
+    def _cleanup(self):
+        if self._conn is not None:
+            self._conn.close()
+        if self._ring is not None:
+            self._ring.close()
+        self._conn = None
+        self._ring = None
+        self._process = None
+        self.current_output_name = None
+        self.current_output_index = None
+        self.output_latency_ms = None
+
+    def _call(self, command: str, *args, timeout: float | None = None, **kwargs):
+        if timeout is None:
+            timeout = COMMAND_TIMEOUTS.get(command, COMMAND_TIMEOUT)
+        if not self.is_alive:
+            if command in ("shutdown", "stop", "take_callback_window"):
+                return None
+            self.logger.error(f"오디오 워커가 종료되어 있음 - 다시 시작 후 {command} 전송")
+            if not self.launch():
+                return None
+
+        with self._lock:
+            try:
+                self._conn.send((command, args, kwargs))
+                if not self._conn.poll(timeout):
+                    self.logger.error(f"오디오 워커 응답 시간 초과: {command}")
+                    self._process.terminate()
+                    self._cleanup()
+                    return None
+                status, result, state = self._conn.recv()
+            except (EOFError, OSError):
+                self.logger.exception(f"오디오 워커 통신 실패: {command}")
+                self._cleanup()
+                return None
+
+        self.current_output_index = state["current_output_index"]
+        self.current_output_name = state["current_output_name"]
+        self.output_latency_ms = state["output_latency_ms"]
+        self.processing_latency_ms = state["processing_latency_ms"]
+        self.last_switch_gap_ms = state["last_switch_gap_ms"]
+        self.last_profile_ms = state["last_profile_ms"]
+        if status != "ok":
+            self.logger.error(f"오디오 워커 명령 오류 {command}: {result}")
+            return None
+        return result
+
+    def _remember(self, command: str, *args, **kwargs):
+        self._replay[command] = (args, kwargs)
+        self._call(command, *args, **kwargs)
+
+    def configure(
+        self,
+        threshold_db: float,
+        makeup_gain_db: float,
+        ratio: float,
+        attack_ms: float | None = None,
+        release_ms: float | None = None,
+    ):
+        self._remember("configure", threshold_db, makeup_gain_db, ratio, attack_ms, release_ms)
+
+    def configure_limiter(self, enabled: bool, lookahead_ms: float | None = None):
+        self._remember("configure_limiter", enabled, lookahead_ms)
+
+    def set_kernel_backend(self, name: str) -> str:
+        self._replay["set_kernel_backend"] = ((name,), {})
+        return self._call("set_kernel_backend", name) or BACKEND_NUMPY
+
+    def configure_switch(self, crossfade_ms: float):
+        self._remember("configure_switch", crossfade_ms)
+
+    def configure_standby(self, limit: int, warm: bool):
+        self._remember("configure_standby", limit, warm)
+
+    def set_standby(self, candidates: list[tuple[int, str]]) -> list[str]:
+        return self._call("set_standby", candidates) or []
+
+    def set_latency_setting(self, setting: LatencySetting):
+        self._remember("set_latency_setting", setting)
+
+    def set_profile(self, threshold_db: float, makeup_gain_db: float, ratio: float):
+        self._remember("set_profile", threshold_db, makeup_gain_db, ratio)
+
+    def warm_up(self) -> bool:
+        """워커가 numpy와 PortAudio를 다 불러올 때까지 기다린다."""
+        return bool(self._call("warm_up"))
+
+    @property
+    def is_running(self) -> bool:
+        return self.current_output_index is not None
+
+    def start(self, output_index: int | None, output_name: str | None = None) -> bool:
+        return bool(self._call("start", output_index, output_name))
+
+    def restart(self, output_index: int | None, output_name: str | None = None, reenumerate: bool = False) -> bool:
+        """재열거는 워커 자기 PortAudio에서 기존 스트림을 닫은 뒤에 한다."""
+        return bool(self._call("restart", output_index, output_name, reenumerate))
+
+    def stop(self):
+        self._call("stop")
+
+    def take_callback_window(self) -> CallbackWindow:
+        window = self._call("take_callback_window", timeout=1.0) if self.is_alive else None
+        return window or CallbackWindow(blocks=0, xruns=0, max_duration=0.0, deadline=0.0)
+
+    @property
+    def gain_reduction_db(self) -> float:
+        if self._ring is None or not self._ring.latest(self._record):
+            return 0.0
+        return float(self._record[FIELD_INDEX["gain_reduction_db"]])
+
+    def stats_snapshot(self) -> StatsSnapshot:
+        record = self._record
+        if self._ring is None or not self._ring.latest(record):
+            record.fill(0.0)
+        cpu_load = record[FIELD_INDEX["cpu_load"]]
+        return StatsSnapshot(
+            blocks=int(record[FIELD_INDEX["blocks"]]),
+            xrun_blocks=int(record[FIELD_INDEX["xrun_blocks"]]),
+            xruns={kind: int(record[FIELD_INDEX[kind]]) for kind in XRUN_KINDS},
+            histogram=tuple(int(count) for count in record[BUCKET_START:]),
+            mean_duration=float(record[FIELD_INDEX["mean_duration"]]),
+            max_duration=float(record[FIELD_INDEX["max_duration"]]),
+            dac_gap_last=float(record[FIELD_INDEX["dac_gap_last"]]),
+            dac_gap_max=float(record[FIELD_INDEX["dac_gap_max"]]),
+            deadline=float(record[FIELD_INDEX["deadline"]]),
+            cpu_load=None if np.isnan(cpu_load) else float(cpu_load),
+        )
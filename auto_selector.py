@@ -1,17 +1,172 @@
+import time
 from collections import deque
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
 
 from device_manager import DeviceInfo
 
 
+HALF_LIFE = 6 * 3600.0
+OPEN_LATENCY_ALPHA = 0.3
+SLOW_OPEN_MS = 1500.0
+UNRELIABLE_FAILURES = 1.5
+RECOVERED_FAILURE_WEIGHT = 0.5
+XRUN_RATE_LIMIT = 0.01
+XRUN_MIN_BLOCKS = 1000.0
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 1800.0
+MAX_RECORDS = 32
+
+TIER_PREFERRED = 0
+TIER_UNRELIABLE = 1
+TIER_BACKING_OFF = 2
+
+
+@dataclass(slots=True)
+class DeviceReliability:
+    """UID 하나의 스트림 열기/xrun 기록. 가중치는 HALF_LIFE마다 반으로 줄어든다.
+
+    open_ms는 열기에 걸린 시간의 지수 이동 평균, failures는 열기 실패(PortAudio
+    재초기화로 겨우 연 경우는 RECOVERED_FAILURE_WEIGHT)의 감쇠 합이다. 연속 실패가
+    쌓이면 retry_at(벽시계 시각)까지 자동 선택에서 뒤로 뺀다.
+    """
+
+    open_ms: float = 0.0
+    failures: float = 0.0
+    blocks: float = 0.0
+    xruns: float = 0.0
+    streak: int = 0
+    retry_at: float = 0.0
+    updated_at: float = 0.0
+
+    def decay(self, now: float) -> float:
+        if now <= self.updated_at:
+            return 1.0
+        return 0.5 ** ((now - self.updated_at) / HALF_LIFE)
+
+    def settle(self, now: float):
+        """지금까지의 감쇠를 값에 반영한다. 기록을 고치기 전에 부른다."""
+        weight = self.decay(now)
+        self.open_ms *= weight
+        self.failures *= weight
+        self.blocks *= weight
+        self.xruns *= weight
+        self.updated_at = now
+
+    def tier(self, now: float) -> int:
+        if now < self.retry_at:
+            return TIER_BACKING_OFF
+        weight = self.decay(now)
+        if (
+            self.failures * weight >= UNRELIABLE_FAILURES
+            or self.open_ms * weight >= SLOW_OPEN_MS
+            or (self.blocks * weight >= XRUN_MIN_BLOCKS and self.xruns / self.blocks >= XRUN_RATE_LIMIT)
+        ):
+            return TIER_UNRELIABLE
+        return TIER_PREFERRED
+
+    def to_config(self) -> list:
+        return [
+            round(self.open_ms, 1),
+            round(self.failures, 3),
+            round(self.blocks),
+            round(self.xruns, 1),
+            self.streak,
+            round(self.retry_at),
+            round(self.updated_at),
+        ]
+
+    @classmethod
+    def from_config(cls, value) -> "DeviceReliability | None":
+        try:
+            open_ms, failures, blocks, xruns, streak, retry_at, updated_at = value
+            return cls(
+                float(open_ms), float(failures), float(blocks), float(xruns), int(streak), float(retry_at), float(updated_at)
+            )
+        except (TypeError, ValueError):
+            return None
+
+
 class AutoSelector:
-    def __init__(self, recent_connected: Iterable[str] | None = None, last_success_uid: str | None = None):
+    """연결 순서와 마지막 성공 장치로 고르되, 기록이 나쁜 장치는 뒤로 미룬다.
+
+    선호 순서대로 보다가 TIER_PREFERRED인 첫 장치를 고르고, 그런 장치가 없으면
+    가장 나은 등급의 첫 장치를 고른다. 기록 조회는 UID 사전 한 번이다.
+    등급은 새 출력을 고를 때만 쓴다. 지금 재생 중인 출력은 xrun이 쌓여도 선호
+    순서에서 제자리를 지키므로, 상관없는 장치 이벤트로 출력이 바뀌지 않는다.
+    """
+
+    def __init__(
+        self,
+        recent_connected: Iterable[str] | None = None,
+        last_success_uid: str | None = None,
+        reliability: dict | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
         self.recent_connected = deque(recent_connected or [], maxlen=10)
         self.last_success_uid = last_success_uid
+        self.clock = clock
+        self.reliability: dict[str, DeviceReliability] = {}
+        for uid, value in (reliability or {}).items():
+            record = DeviceReliability.from_config(value)
+            if record is not None:
+                self.reliability[uid] = record
+        self._devices_version: int | None = None
+        self._devices_by_uid: dict[str, DeviceInfo] = {}
 
     def export_state(self) -> tuple[list[str], str | None]:
         return list(self.recent_connected), self.last_success_uid
 
+    def export_reliability(self) -> dict[str, list]:
+        """최근에 갱신된 MAX_RECORDS개만, 설정 파일용 짧은 리스트로."""
+        now = self.clock()
+        records = sorted(self.reliability.items(), key=lambda item: item[1].updated_at, reverse=True)
+        exported = {}
+        for uid, record in records[:MAX_RECORDS]:
+            if record.streak or now < record.retry_at or record.decay(now) * (record.open_ms + record.failures + record.blocks) >= 0.01:
+                exported[uid] = record.to_config()
+        return exported
+
+    def _record(self, uid: str, now: float) -> DeviceReliability:
+        record = self.reliability.get(uid)
+        if record is None:
+            record = self.reliability[uid] = DeviceReliability(updated_at=now)
+        else:
+            record.settle(now)
+        return record
+
+    def note_open(self, uid: str, elapsed: float, success: bool, recovered: bool = False):
+        """스트림 열기 결과. 실패가 이어지면 BACKOFF_BASE부터 두 배씩 BACKOFF_MAX까지 미룬다."""
+        now = self.clock()
+        record = self._record(uid, now)
+        if not success:
+            record.failures += 1.0
+            record.streak += 1
+            record.retry_at = now + min(BACKOFF_BASE * 2 ** (record.streak - 1), BACKOFF_MAX)
+            return
+        elapsed_ms = elapsed * 1e3
+        if record.open_ms == 0.0:
+            record.open_ms = elapsed_ms
+        else:
+            record.open_ms += OPEN_LATENCY_ALPHA * (elapsed_ms - record.open_ms)
+        if recovered:
+            record.failures += RECOVERED_FAILURE_WEIGHT
+        record.streak = 0
+        record.retry_at = 0.0
+
+    def note_xruns(self, uid: str, blocks: int, xruns: int):
+        if blocks <= 0:
+            return
+        record = self._record(uid, self.clock())
+        record.blocks += blocks
+        record.xruns += xruns
+
+    def tier(self, uid: str, now: float | None = None) -> int:
+        record = self.reliability.get(uid)
+        if record is None:
+            return TIER_PREFERRED
+        return record.tier(self.clock() if now is None else now)
+
     def note_connected(self, uid: str):
         if uid in self.recent_connected:
             self.recent_connected.remove(uid)
@@ -31,7 +186,7 @@ class AutoSelector:
         if self.last_success_uid not in available_uids:
             self.last_success_uid = None
 
-    def update_devices(self, devices: list[DeviceInfo], previous_uids: set[str]) -> set[str]:
+    def update_devices(self, devices: Sequence[DeviceInfo], previous_uids: set[str]) -> set[str]:
         available_uids = {device.uid for device in devices}
         if previous_uids:
             new_uids = available_uids - previous_uids
@@ -40,24 +195,63 @@ class AutoSelector:
         self.remove_missing(available_uids)
         return available_uids
 
-    def select(self, devices: list[DeviceInfo]) -> DeviceInfo | None:
+    def standby_candidates(self, devices: Sequence[DeviceInfo], exclude_uid: str | None, limit: int) -> list[DeviceInfo]:
+        """현재 출력(exclude_uid)이 빠지면 select()가 고를 순서대로 최대 limit개."""
+        remaining = [device for device in devices if device.uid != exclude_uid]
+        candidates = []
+        while remaining and len(candidates) < limit:
+            device = self.select(remaining)
+            candidates.append(device)
+            remaining = [other for other in remaining if other.uid != device.uid]
+        return candidates
+
+    def _index(self, devices: Sequence[DeviceInfo], version: int | None) -> dict[str, DeviceInfo]:
+        if version is not None and version == self._devices_version:
+            return self._devices_by_uid
+        devices_by_uid = {device.uid: device for device in devices}
+        if version is not None:
+            self._devices_version = version
+            self._devices_by_uid = devices_by_uid
+        return devices_by_uid
+
+    def select(
+        self,
+        devices: Sequence[DeviceInfo],
+        version: int | None = None,
+        current_uid: str | None = None,
+    ) -> DeviceInfo | None:
+        """version(OutputSnapshot.version)을 주면 같은 버전 동안 UID 색인을 다시 만들지 않는다.
+
+        current_uid는 지금 문제없이 재생 중인 출력이다. 기록과 상관없이 TIER_PREFERRED로 본다.
+        """
         if not devices:
             return None
 
-        devices_by_uid = {device.uid: device for device in devices}
+        devices_by_uid = self._index(devices, version)
+        now = self.clock()
+        best = None
+        best_tier = TIER_BACKING_OFF + 1
+        for device in self._preference_order(devices, devices_by_uid):
+            tier = TIER_PREFERRED if device.uid == current_uid else self.tier(device.uid, now)
+            if tier == TIER_PREFERRED:
+                return device
+            if tier < best_tier:
+                best, best_tier = device, tier
+        return best
 
+    def _preference_order(self, devices: Sequence[DeviceInfo], devices_by_uid: dict[str, DeviceInfo]):
         for uid in self.recent_connected:
             device = devices_by_uid.get(uid)
             if device is not None:
-                return device
+                yield device
 
         if self.last_success_uid is not None:
             device = devices_by_uid.get(self.last_success_uid)
             if device is not None:
-                return device
+                yield device
 
         for device in devices:
             if device.is_builtin:
-                return device
+                yield device
 
-        return devices[0]
+        yield from devices
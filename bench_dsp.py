@@ -0,0 +1,283 @@
+"""오디오 장치 없이 처리 체인을 돌려 블록당 처리 시간을 재는 벤치마크.
+
+AudioRouter 콜백이 하는 일은 ProcessingChain.process 한 번이므로 같은 호출을
+합성 신호로 반복한다. 블록 크기, 채널 수, 샘플레이트, 파라미터 세트를 바꿔 가며
+블록당 지연 백분위수를 출력하고, p99가 블록 데드라인의 --max-load 비율을
+넘으면 종료 코드 1로 실패한다.
+numba가 설치되어 있으면 두 커널 백엔드를 모두 재서 블록 크기별 속도 향상을
+보여 주고, 측정 전에 같은 신호에서 NumPy 기준 출력과 --tolerance 안으로
+일치하는지 확인한다(어긋나도 종료 코드 1).
+
+사용 예:
+    python3 bench_dsp.py
+    python3 bench_dsp.py --quick
+    python3 bench_dsp.py --blocksizes 512 --samplerates 48000 --json bench_output.json
+    python3 bench_dsp.py --quick --backends numpy
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from dsp_engine import BACKEND_AUTO, BACKEND_NUMBA, BACKEND_NUMPY, KERNEL_BACKENDS, ProcessingChain, load_backend
+
+
+DEFAULT_BLOCKSIZES = [64, 128, 256, 512, 1024, 2048, 4096]
+DEFAULT_CHANNELS = [1, 2]
+DEFAULT_SAMPLERATES = [44100, 48000, 96000]
+QUICK_BLOCKSIZES = [64, 512, 4096]
+QUICK_CHANNELS = [2]
+QUICK_SAMPLERATES = [48000]
+
+# 메뉴에서 고를 수 있는 조합의 양 끝과 리미터 유무를 덮는다.
+PARAMETER_SETS = {
+    "normal": {"threshold_db": -20.0, "makeup_gain_db": 10.0, "limiter_enabled": True},
+    "strong+high": {"threshold_db": -30.0, "makeup_gain_db": 20.0, "limiter_enabled": True},
+    "weak+low": {"threshold_db": -10.0, "makeup_gain_db": 0.0, "limiter_enabled": True},
+    "no-limiter": {"threshold_db": -20.0, "makeup_gain_db": 10.0, "limiter_enabled": False},
+}
+PERCENTILES = (50, 90, 99, 99.9)
+PARITY_TOLERANCE = 1e-4
+
+
+@dataclass(slots=True)
+class BenchResult:
+    backend: str
+    params: str
+    samplerate: int
+    channels: int
+    blocksize: int
+    blocks: int
+    deadline_ms: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    p999_ms: float
+    max_ms: float
+
+    @property
+    def load(self) -> float:
+        return self.p99_ms / self.deadline_ms
+
+
+def make_signal(frames: int, channels: int, samplerate: int) -> np.ndarray:
+    """조용한 구간과 큰 구간이 번갈아 나오는 합성 신호. 엔벨로프와 리미터가 계속 움직이게 한다."""
+    rng = np.random.default_rng(0)
+    t = np.arange(frames) / samplerate
+    level = np.where((t * 4).astype(int) % 2 == 0, 0.02, 0.9)
+    tone = np.sin(2 * np.pi * 220 * t) * level
+    noise = rng.standard_normal((frames, channels)) * 0.05
+    return (tone[:, np.newaxis] + noise).astype(np.float32)
+
+
+def build_chain(params: dict, backend: str = BACKEND_NUMPY) -> ProcessingChain:
+    return ProcessingChain(
+        threshold_db=params["threshold_db"],
+        makeup_gain_db=params["makeup_gain_db"],
+        limiter_enabled=params["limiter_enabled"],
+        backend=backend,
+    )
+
+
+def render(chain: ProcessingChain, signal: np.ndarray, blocksize: int) -> np.ndarray:
+    frames = signal.shape[0] // blocksize * blocksize
+    rendered = np.zeros((frames, signal.shape[1]), dtype=np.float32)
+    for offset in range(0, frames, blocksize):
+        chain.process(signal[offset:offset + blocksize], rendered[offset:offset + blocksize])
+    return rendered
+
+
+def parity_error(
+    params_name: str,
+    backend: str,
+    samplerate: int,
+    channels: int,
+    blocksize: int,
+    signal: np.ndarray,
+) -> float:
+    """같은 신호를 NumPy 기준 구현과 backend로 렌더해서 최대 절대 오차를 돌려준다."""
+    outputs = []
+    for name in (BACKEND_NUMPY, backend):
+        chain = build_chain(PARAMETER_SETS[params_name], name)
+        chain.prepare(blocksize, channels, samplerate)
+        outputs.append(render(chain, signal[:, :channels], blocksize))
+    return float(np.abs(outputs[0] - outputs[1]).max())
+
+
+def run_case(
+    backend: str,
+    params_name: str,
+    samplerate: int,
+    channels: int,
+    blocksize: int,
+    seconds: float,
+    signal: np.ndarray,
+) -> BenchResult:
+    chain = build_chain(PARAMETER_SETS[params_name], backend)
+    chain.prepare(blocksize, channels, samplerate)
+    blocks = max(int(seconds * samplerate / blocksize), 200)
+    available = signal.shape[0] // blocksize
+    outdata = np.zeros((blocksize, channels), dtype=np.float32)
+
+    for index in range(min(blocks, 20)):
+        offset = (index % available) * blocksize
+        chain.process(signal[offset:offset + blocksize, :channels], outdata)
+
+    durations = np.zeros(blocks, dtype=np.float64)
+    perf_counter = time.perf_counter
+    for index in range(blocks):
+        offset = (index % available) * blocksize
+        block = signal[offset:offset + blocksize, :channels]
+        started = perf_counter()
+        chain.process(block, outdata)
+        durations[index] = perf_counter() - started
+
+    durations *= 1e3
+    p50, p90, p99, p999 = np.percentile(durations, PERCENTILES)
+    return BenchResult(
+        backend=backend,
+        params=params_name,
+        samplerate=samplerate,
+        channels=channels,
+        blocksize=blocksize,
+        blocks=blocks,
+        deadline_ms=blocksize * 1e3 / samplerate,
+        p50_ms=float(p50),
+        p90_ms=float(p90),
+        p99_ms=float(p99),
+        p999_ms=float(p999),
+        max_ms=float(durations.max()),
+    )
+
+
+def speedup_by_blocksize(results: list[BenchResult]) -> dict[int, float]:
+    reference = {
+        (result.params, result.samplerate, result.channels, result.blocksize): result.p50_ms
+        for result in results
+        if result.backend == BACKEND_NUMPY
+    }
+    ratios: dict[int, list[float]] = {}
+    for result in results:
+        key = (result.params, result.samplerate, result.channels, result.blocksize)
+        if result.backend == BACKEND_NUMBA and key in reference and result.p50_ms > 0:
+            ratios.setdefault(result.blocksize, []).append(reference[key] / result.p50_ms)
+    return {
+        blocksize: float(np.exp(np.mean(np.log(values))))
+        for blocksize, values in sorted(ratios.items())
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="처리 체인 블록 지연 벤치마크 (오디오 장치 불필요)")
+    parser.add_argument("--blocksizes", type=int, nargs="+")
+    parser.add_argument("--channels", type=int, nargs="+")
+    parser.add_argument("--samplerates", type=int, nargs="+")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=KERNEL_BACKENDS,
+        help="재볼 커널 백엔드 (기본: 설치된 것 전부)",
+    )
+    parser.add_argument("--tolerance", type=float, default=PARITY_TOLERANCE, help="NumPy 기준 대비 허용 최대 오차")
+    parser.add_argument("--params", nargs="+", choices=sorted(PARAMETER_SETS), default=list(PARAMETER_SETS))
+    parser.add_argument("--seconds", type=float, default=3.0, help="조합당 처리할 오디오 길이")
+    parser.add_argument(
+        "--max-load",
+        type=float,
+        default=0.25,
+        help="p99 처리 시간이 블록 데드라인의 이 비율을 넘으면 실패",
+    )
+    parser.add_argument("--quick", action="store_true", help="블록 64/512/4096, 2채널, 48kHz만")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args(argv)
+
+    blocksizes = args.blocksizes or (QUICK_BLOCKSIZES if args.quick else DEFAULT_BLOCKSIZES)
+    channel_counts = args.channels or (QUICK_CHANNELS if args.quick else DEFAULT_CHANNELS)
+    samplerates = args.samplerates or (QUICK_SAMPLERATES if args.quick else DEFAULT_SAMPLERATES)
+    backends = args.backends or sorted({BACKEND_NUMPY, load_backend(BACKEND_AUTO)}, key=KERNEL_BACKENDS.index)
+    for backend in backends:
+        # 컴파일은 측정 전에 끝낸다. 실제 앱도 시작할 때 한 번 불러 둔다.
+        started = time.perf_counter()
+        load_backend(backend)
+        print(f"{backend} 백엔드 준비: {(time.perf_counter() - started) * 1e3:.0f}ms")
+
+    parity_failures: list[str] = []
+    for backend in backends:
+        if backend == BACKEND_NUMPY:
+            continue
+        worst = 0.0
+        for samplerate in samplerates:
+            signal = make_signal(samplerate, max(channel_counts), samplerate)
+            for params_name, channels, blocksize in itertools.product(args.params, channel_counts, blocksizes):
+                error = parity_error(params_name, backend, samplerate, channels, blocksize, signal)
+                worst = max(worst, error)
+                if error > args.tolerance:
+                    parity_failures.append(
+                        f"{backend} {params_name} {samplerate}Hz {channels}ch block {blocksize}: {error:.2e}"
+                    )
+        print(f"{backend} ↔ {BACKEND_NUMPY} 최대 오차: {worst:.2e} (허용 {args.tolerance:.0e})")
+    print()
+
+    print(
+        f"{'backend':<7} {'params':<12} {'rate':>6} {'ch':>2} {'block':>5} {'deadline':>9} "
+        f"{'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>8} {'p99/dl':>7}"
+    )
+    results: list[BenchResult] = []
+    failures: list[BenchResult] = []
+    for samplerate in samplerates:
+        signal = make_signal(samplerate * 2, max(channel_counts), samplerate)
+        for backend, params_name, channels, blocksize in itertools.product(
+            backends, args.params, channel_counts, blocksizes
+        ):
+            result = run_case(backend, params_name, samplerate, channels, blocksize, args.seconds, signal)
+            results.append(result)
+            over = result.load > args.max_load
+            if over:
+                failures.append(result)
+            print(
+                f"{result.backend:<7} {result.params:<12} {result.samplerate:>6} {result.channels:>2} {result.blocksize:>5} "
+                f"{result.deadline_ms:>7.3f}ms {result.p50_ms:>6.3f}ms {result.p90_ms:>6.3f}ms "
+                f"{result.p99_ms:>6.3f}ms {result.p999_ms:>6.3f}ms {result.max_ms:>6.3f}ms "
+                f"{result.load * 100:>6.1f}%{'  초과' if over else ''}"
+            )
+
+    speedups = speedup_by_blocksize(results)
+    if speedups:
+        print(f"\n{BACKEND_NUMBA} 속도 향상 (NumPy p50 / {BACKEND_NUMBA} p50, 조합 기하평균)")
+        for blocksize, speedup in speedups.items():
+            print(f"  block {blocksize:>5}: x{speedup:.2f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(
+                {
+                    "max_load": args.max_load,
+                    "speedup_by_blocksize": speedups,
+                    "results": [dict(asdict(result), load=result.load) for result in results],
+                },
+                handle,
+                indent=2,
+            )
+
+    if parity_failures:
+        print(f"\n실패: {len(parity_failures)}개 조합이 NumPy 기준 출력과 다름", file=sys.stderr)
+        for line in parity_failures:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    if failures:
+        print(
+            f"\n실패: {len(failures)}개 조합의 p99가 데드라인의 {args.max_load * 100:.0f}%를 넘음",
+            file=sys.stderr,
+        )
+        return 1
+    print(f"\n통과: {len(results)}개 조합 모두 p99 ≤ 데드라인의 {args.max_load * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
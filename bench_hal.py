@@ -0,0 +1,205 @@
+"""CoreAudio 속성 읽기 계층의 장치당 비용 마이크로벤치마크.
+
+DeviceManager._load_device가 장치 하나에 하는 읽기(UID/이름/제조사 문자열,
+전송 방식/생존 u32, 출력 스트림 크기)와 dev# 목록 읽기를 반복해서, 호출마다
+ctypes 객체를 새로 만들던 이전 방식(LegacyReader)과 미리 만든 객체를 재사용하는
+CoreAudioHAL을 비교한다. macOS에서는 실제 CoreAudio를, 그 밖에서는
+fake_audio.FakeCoreAudio를 읽는다. 가짜 C 함수는 파이썬으로 돌아서 그 비용이
+양쪽에 똑같이 더해지므로 macOS보다 차이가 작게 나온다.
+
+사용 예:
+    python3 bench_hal.py
+    python3 bench_hal.py --devices 32 --repeat 2000
+    python3 bench_hal.py --simulate
+"""
+
+import argparse
+import ctypes
+import sys
+import time
+
+from coreaudio_hal import (
+    AudioObjectPropertyAddress,
+    CoreAudioHAL,
+    kAudioDevicePropertyDeviceIsAlive,
+    kAudioDevicePropertyDeviceUID,
+    kAudioDevicePropertyStreams,
+    kAudioDevicePropertyTransportType,
+    kAudioHardwarePropertyDevices,
+    kAudioObjectPropertyElementMain,
+    kAudioObjectPropertyManufacturer,
+    kAudioObjectPropertyName,
+    kAudioObjectPropertyScopeGlobal,
+    kAudioObjectPropertyScopeOutput,
+    kAudioObjectSystemObject,
+    kCFStringEncodingUTF8,
+)
+
+
+ROUNDS = 7
+
+
+class LegacyReader:
+    """이전 DeviceManager의 읽기 코드. 호출마다 주소 구조체, 값 변수, 1KB 버퍼를 새로 만든다."""
+
+    def __init__(self, hal: CoreAudioHAL):
+        self.coreaudio = hal.coreaudio
+        self.corefoundation = hal.corefoundation
+
+    def _address(self, selector: int, scope: int = kAudioObjectPropertyScopeGlobal) -> AudioObjectPropertyAddress:
+        return AudioObjectPropertyAddress(selector, scope, kAudioObjectPropertyElementMain)
+
+    def device_ids(self) -> list[int]:
+        address = self._address(kAudioHardwarePropertyDevices)
+        size = ctypes.c_uint32(0)
+        status = self.coreaudio.AudioObjectGetPropertyDataSize(
+            kAudioObjectSystemObject, ctypes.byref(address), 0, None, ctypes.byref(size)
+        )
+        if status != 0 or size.value == 0:
+            return []
+        count = size.value // ctypes.sizeof(ctypes.c_uint32)
+        buffer = (ctypes.c_uint32 * count)()
+        io_size = ctypes.c_uint32(size.value)
+        status = self.coreaudio.AudioObjectGetPropertyData(
+            kAudioObjectSystemObject, ctypes.byref(address), 0, None, ctypes.byref(io_size), ctypes.byref(buffer)
+        )
+        if status != 0:
+            return []
+        return [int(buffer[idx]) for idx in range(count)]
+
+    def get_u32(self, object_id: int, selector: int, default: int = 0) -> int:
+        address = self._address(selector)
+        value = ctypes.c_uint32(0)
+        size = ctypes.c_uint32(ctypes.sizeof(value))
+        status = self.coreaudio.AudioObjectGetPropertyData(
+            object_id, ctypes.byref(address), 0, None, ctypes.byref(size), ctypes.byref(value)
+        )
+        if status != 0:
+            return default
+        return int(value.value)
+
+    def get_string(self, object_id: int, selector: int) -> str | None:
+        address = self._address(selector)
+        value = ctypes.c_void_p()
+        size = ctypes.c_uint32(ctypes.sizeof(value))
+        status = self.coreaudio.AudioObjectGetPropertyData(
+            object_id, ctypes.byref(address), 0, None, ctypes.byref(size), ctypes.byref(value)
+        )
+        if status != 0 or not value.value:
+            return None
+        try:
+            buffer = ctypes.create_string_buffer(1024)
+            if not self.corefoundation.CFStringGetCString(value, buffer, len(buffer), kCFStringEncodingUTF8):
+                return None
+            return buffer.value.decode("utf-8")
+        finally:
+            self.corefoundation.CFRelease(value)
+
+    def has_output_streams(self, object_id: int) -> bool:
+        address = self._address(kAudioDevicePropertyStreams, kAudioObjectPropertyScopeOutput)
+        size = ctypes.c_uint32(0)
+        status = self.coreaudio.AudioObjectGetPropertyDataSize(
+            object_id, ctypes.byref(address), 0, None, ctypes.byref(size)
+        )
+        return status == 0 and size.value > 0
+
+
+def load_device(reader, object_id: int) -> tuple:
+    return (
+        reader.get_string(object_id, kAudioDevicePropertyDeviceUID),
+        reader.get_string(object_id, kAudioObjectPropertyName),
+        reader.get_string(object_id, kAudioObjectPropertyManufacturer),
+        reader.get_u32(object_id, kAudioDevicePropertyTransportType),
+        bool(reader.get_u32(object_id, kAudioDevicePropertyDeviceIsAlive, default=1)),
+        reader.has_output_streams(object_id),
+    )
+
+
+def compare_us(before, after, repeat: int) -> tuple[float, float]:
+    """두 함수를 번갈아 ROUNDS번씩 재서 각각 가장 빠른 값(timeit과 같은 기준). 한 번 호출당 마이크로초.
+
+    번갈아 재므로 측정 중 기계 부하가 바뀌어도 한쪽만 손해 보지 않는다.
+    """
+    samples = ([], [])
+    for _ in range(ROUNDS):
+        for func, out in ((before, samples[0]), (after, samples[1])):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            out.append((time.perf_counter() - started) / repeat * 1e6)
+    return min(samples[0]), min(samples[1])
+
+
+def make_hal(simulate: bool, devices: int) -> CoreAudioHAL:
+    if not simulate:
+        return CoreAudioHAL()
+    from fake_audio import FakeCoreAudio, FakeCoreFoundation, FakeHAL
+
+    fake = FakeHAL()
+    fake.blackhole()
+    fake.builtin()
+    for index in range(max(0, devices - 2)):
+        fake.add_device(f"00-1B-66-{index:02X}-AA-BB:output", f"WH-1000XM{index} Headphones", manufacturer="Sony")
+    corefoundation = FakeCoreFoundation()
+    return CoreAudioHAL(FakeCoreAudio(fake, corefoundation), corefoundation)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="CoreAudio 속성 읽기 마이크로벤치마크")
+    parser.add_argument("--simulate", action="store_true", help="macOS에서도 가짜 CoreAudio를 읽는다")
+    parser.add_argument("--devices", type=int, default=8, help="가짜 CoreAudio의 장치 수")
+    parser.add_argument("--repeat", type=int, default=1000, help="측정 한 번에 반복할 횟수")
+    args = parser.parse_args(argv)
+
+    simulate = args.simulate or sys.platform != "darwin"
+    hal = make_hal(simulate, args.devices)
+    legacy = LegacyReader(hal)
+    object_ids = hal.device_ids()
+    if not object_ids:
+        print("장치가 없음", file=sys.stderr)
+        return 1
+    for object_id in object_ids:
+        if load_device(legacy, object_id) != load_device(hal, object_id):
+            print(f"실패: 객체 {object_id}의 읽기 결과가 이전 방식과 다름", file=sys.stderr)
+            return 1
+    if legacy.device_ids() != object_ids:
+        print("실패: dev# 목록이 이전 방식과 다름", file=sys.stderr)
+        return 1
+
+    def load_all(reader):
+        return lambda: [load_device(reader, object_id) for object_id in object_ids]
+
+    repeat = max(1, args.repeat // len(object_ids))
+    count = len(object_ids)
+    last = object_ids[-1]
+    load_before, load_after = compare_us(load_all(legacy), load_all(hal), repeat)
+    rows = [
+        ("장치당 load", load_before / count, load_after / count),
+        ("dev# 목록", *compare_us(legacy.device_ids, hal.device_ids, args.repeat)),
+        (
+            "문자열 1개",
+            *compare_us(
+                lambda: legacy.get_string(last, kAudioObjectPropertyName),
+                lambda: hal.get_string(last, kAudioObjectPropertyName),
+                args.repeat,
+            ),
+        ),
+        (
+            "u32 1개",
+            *compare_us(
+                lambda: legacy.get_u32(last, kAudioDevicePropertyTransportType),
+                lambda: hal.get_u32(last, kAudioDevicePropertyTransportType),
+                args.repeat,
+            ),
+        ),
+    ]
+
+    print(f"CoreAudio: {'가짜(fake_audio)' if simulate else '실제'}  장치 {len(object_ids)}개")
+    print(f"{'항목':<12} {'이전':>10} {'재사용':>10} {'배율':>7}")
+    for label, before, after in rows:
+        print(f"{label:<12} {before:>8.2f}us {after:>8.2f}us {before / after:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
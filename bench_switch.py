@@ -0,0 +1,347 @@
+"""CoreAudio 이벤트부터 새 장치에서 소리가 날 때까지의 출력 전환 벤치마크.
+
+fake_audio의 FakeHAL/FakePortAudio/RunLoop 위에 앱과 데몬이 쓰는 EngineService를
+그대로 띄운다(리스너 → 이벤트 합치기 → refresh → select → get_sd_index → restart).
+--worker면 앱처럼 오디오 워커 프로세스에서 엔진을 돌리고, 두 프로세스가 각자
+PortAudio 장치 목록을 갖는다. macOS나 오디오 장치 없이 돈다. 시나리오마다
+이벤트부터 새 출력의 첫 소리까지 걸린 시간, 프로필 적용 시간, HAL 호출 수,
+스트림 열기/실패 수, PortAudio 재초기화 수와 재초기화로 죽은 스트림 수(drop)를
+출력한다. 전환이 끝난 출력이나 그 출력의 컴프레서 값이 기대와 다르거나, 열린
+스트림을 재초기화로 죽였으면 종료 코드 1로 실패한다. 헤드폰과 스피커는 서로
+다른 프로필을 쓴다.
+
+사용 예:
+    python3 bench_switch.py
+    python3 bench_switch.py --scenarios disconnect disconnect_standby --repeat 5
+    python3 bench_switch.py --worker --settle 0.05 --hal-delay-ms 1 --json switch_output.json
+"""
+
+import argparse
+import functools
+import json
+import logging
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import portaudio_index
+from audio_router import DEFAULT_CROSSFADE_MS
+from config_store import ConfigStore
+from device_manager import DEFAULT_SETTLE_SECONDS, DeviceChanges
+from engine_defaults import BACKEND_NUMPY
+from engine_service import HISTORY_CONFIG_KEYS, EngineService
+from fake_audio import FakeHAL, FakePortAudio, RunLoop, SharedFakeAudio
+from profiles import ProcessingProfile
+from stream_controller import StreamResult
+
+
+SPEAKERS = "MacBook Pro Speakers"
+HEADPHONES_UID = "USB-Headphones-0001"
+HEADPHONES = "USB Headphones"
+HEADPHONES_PROFILE = ProcessingProfile(-30.0, 20.0, 4.0)
+EXPECTED_THRESHOLD = {SPEAKERS: ProcessingProfile().threshold_db, HEADPHONES: HEADPHONES_PROFILE.threshold_db}
+# 워커 모드는 spawn 프로세스가 numpy까지 불러와야 첫 출력이 열린다.
+STARTUP_TIMEOUT = 30.0
+SWITCH_TIMEOUT = 5.0
+QUIET_MARGIN = 0.3
+
+
+@dataclass(slots=True)
+class SwitchResult:
+    scenario: str
+    run: int
+    ok: bool
+    output: str | None
+    latency_ms: float | None
+    refresh_ms: float | None
+    open_ms: float | None
+    profile_ms: float | None
+    hal_calls: int
+    stream_opens: int
+    failed_opens: int
+    reinitializations: int
+    dropped_streams: int
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """setup은 엔진을 만들기 전 장치 구성, trigger는 측정할 HAL 변화. expected가 None이면 전환이 없어야 한다."""
+
+    setup: Callable[["SwitchHarness"], None]
+    trigger: Callable[["SwitchHarness"], None]
+    expected: str | None
+    standby: int = 0
+
+
+class SwitchHarness:
+    """임시 설정 파일로 EngineService를 띄우고 결과와 장치 변경 시각만 가로채 잰다."""
+
+    def __init__(self, args, logger: logging.Logger):
+        self.args = args
+        self.logger = logger
+        self.loop = RunLoop()
+        self.hal = FakeHAL()
+        self.hal.blackhole()
+        self.hal.builtin(name=SPEAKERS)
+        self.recent_connected: list[str] = []
+        self.directory = tempfile.TemporaryDirectory(prefix="bench_switch-")
+        self.manager = None
+        self.last_result: StreamResult | None = None
+        self.changed_at = 0.0
+        self.result_at = 0.0
+
+    def build(self, standby: int):
+        args = self.args
+        delays = (args.init_delay_ms * 1e-3, args.open_delay_ms * 1e-3)
+        if args.worker:
+            self.manager = multiprocessing.Manager()
+            shared = SharedFakeAudio.create(self.manager)
+            self.hal.share(shared)
+            portaudio_factory = functools.partial(FakePortAudio.shared, shared, *delays)
+        else:
+            portaudio_factory = functools.partial(FakePortAudio, self.hal, *delays)
+
+        root = Path(self.directory.name)
+        store = ConfigStore(root / "config.json", root / "devices.json", HISTORY_CONFIG_KEYS, self.logger)
+        store.update(
+            {
+                "audio_worker": args.worker,
+                "is_running": True,
+                "dsp_backend": BACKEND_NUMPY,
+                "crossfade_ms": args.crossfade_ms,
+                "standby_count": standby,
+                "standby_warm": True,
+                "device_settle_seconds": args.settle,
+                "physical_output_history": self.recent_connected,
+                "output_profiles": {HEADPHONES_UID: HEADPHONES_PROFILE.to_config()},
+            }
+        )
+        store.close()
+        self.service = EngineService(
+            self.logger,
+            config_path=root / "config.json",
+            history_path=root / "devices.json",
+            audio_worker=args.worker,
+            hal=self.hal,
+            call_after=self.loop.call_after,
+            call_later=self.loop.call_later,
+            lock_path=root / "engine.lock",
+            portaudio_factory=portaudio_factory,
+        )
+        # 워커 모드면 호출 수와 첫 소리 기록은 두 프로세스가 함께 쓴다.
+        self.portaudio = portaudio_index.backend()
+
+        controller = self.service.stream_controller
+        handle_result = controller.on_result
+        device_manager = self.service.device_manager
+        handle_change = device_manager.on_change
+
+        def on_result(result: StreamResult):
+            if not result.request.is_stop:
+                self.last_result = result
+                self.result_at = time.perf_counter()
+            handle_result(result)
+
+        def on_change(changes: DeviceChanges):
+            if not self.changed_at:
+                self.changed_at = time.perf_counter()
+            handle_change(changes)
+
+        controller.on_result = on_result
+        device_manager.on_change = on_change
+
+    def start(self) -> bool:
+        service = self.service
+        service.start()
+        started = self.loop.run_until(
+            lambda: service.current_output_uid is not None and service.pending_output_uid is None,
+            STARTUP_TIMEOUT,
+        )
+        self.loop.run_until(lambda: not service.stream_controller.busy, SWITCH_TIMEOUT)
+        if service.standby_count:
+            self.loop.run_for(0.1)
+        self.hal.call_delay = self.args.hal_delay_ms * 1e-3
+        return started
+
+    def audible_since(self, name: str, since: float) -> float:
+        for stream_name, audible_at in reversed(list(self.portaudio.audible)):
+            if stream_name == name and audible_at > since:
+                return audible_at
+        return 0.0
+
+    def measure(self, scenario_name: str, run: int, scenario: Scenario) -> SwitchResult:
+        service = self.service
+        calls = self.portaudio.calls
+        hal_calls = self.hal.total_calls
+        opens = calls["stream_open"]
+        failed = calls["stream_open_failed"]
+        initializations = calls["initialize"]
+        dropped = calls["terminated_open_streams"]
+        self.changed_at = 0.0
+        self.result_at = 0.0
+        self.last_result = None
+        started = time.perf_counter()
+        scenario.trigger(self)
+
+        latency = None
+        if scenario.expected is None:
+            self.loop.run_for(self.args.settle + QUIET_MARGIN)
+            ok = service.current_output_uid is not None and calls["stream_open"] == opens
+        else:
+            done = self.loop.run_until(
+                lambda: service.pending_output_uid is None and self.audible_since(scenario.expected, started) > 0.0,
+                SWITCH_TIMEOUT,
+            )
+            ok = (
+                done
+                and service.audio_router.current_output_name == scenario.expected
+                and service.profile.threshold_db == EXPECTED_THRESHOLD[scenario.expected]
+            )
+            if done:
+                latency = (self.audible_since(scenario.expected, started) - started) * 1e3
+        dropped_streams = calls["terminated_open_streams"] - dropped
+        result = self.last_result
+
+        return SwitchResult(
+            scenario=scenario_name,
+            run=run,
+            ok=ok and dropped_streams == 0,
+            output=service.audio_router.current_output_name,
+            latency_ms=latency,
+            refresh_ms=(self.changed_at - started) * 1e3 if self.changed_at else None,
+            open_ms=result.elapsed * 1e3 if result is not None else None,
+            profile_ms=result.profile_ms if result is not None else None,
+            hal_calls=self.hal.total_calls - hal_calls,
+            stream_opens=calls["stream_open"] - opens,
+            failed_opens=calls["stream_open_failed"] - failed,
+            reinitializations=calls["initialize"] - initializations,
+            dropped_streams=dropped_streams,
+        )
+
+    def close(self):
+        service = getattr(self, "service", None)
+        if service is not None:
+            service.shutdown()
+        if self.manager is not None:
+            self.manager.shutdown()
+        self.directory.cleanup()
+
+
+def _headphones_active(harness: SwitchHarness):
+    harness.hal.add_device(HEADPHONES_UID, HEADPHONES)
+    harness.recent_connected.append(HEADPHONES_UID)
+
+
+def _no_setup(_harness: SwitchHarness):
+    pass
+
+
+def _disconnect(harness: SwitchHarness):
+    harness.hal.remove_device(HEADPHONES_UID)
+
+
+def _connect(harness: SwitchHarness):
+    harness.hal.add_device(HEADPHONES_UID, HEADPHONES)
+
+
+def _connect_failing_open(harness: SwitchHarness):
+    harness.hal.add_device(HEADPHONES_UID, HEADPHONES, open_failures=1)
+
+
+def _flap(harness: SwitchHarness):
+    harness.hal.remove_device(HEADPHONES_UID)
+    time.sleep(0.05)
+    harness.hal.add_device(HEADPHONES_UID, HEADPHONES)
+
+
+def _rename_burst(harness: SwitchHarness):
+    device = harness.hal.find("BuiltInSpeakerDevice")
+    for _ in range(20):
+        harness.hal.rename_device(device.uid, device.name)
+
+
+SCENARIOS = {
+    "disconnect": Scenario(_headphones_active, _disconnect, SPEAKERS),
+    "disconnect_standby": Scenario(_headphones_active, _disconnect, SPEAKERS, standby=1),
+    "connect": Scenario(_no_setup, _connect, HEADPHONES),
+    "connect_open_failure": Scenario(_no_setup, _connect_failing_open, HEADPHONES),
+    "flap": Scenario(_headphones_active, _flap, None),
+    "property_burst": Scenario(_no_setup, _rename_burst, None),
+}
+
+
+def run_scenario(name: str, run: int, args, logger: logging.Logger) -> SwitchResult:
+    scenario = SCENARIOS[name]
+    harness = SwitchHarness(args, logger)
+    scenario.setup(harness)
+    try:
+        harness.build(scenario.standby)
+        if not harness.start():
+            raise RuntimeError(f"{name}: 첫 출력을 열지 못함")
+        return harness.measure(name, run, scenario)
+    finally:
+        harness.close()
+
+
+def _median(values: list[float | None], spec: str = ".1f") -> str:
+    values = [value for value in values if value is not None]
+    return f"{statistics.median(values):8{spec}}ms" if values else f"{'-':>10}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="장치 전환 지연 벤치마크 (가짜 CoreAudio/PortAudio)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS, help="CoreAudio 이벤트 합치기 창(초)")
+    parser.add_argument("--worker", action="store_true", help="앱처럼 오디오 워커 프로세스에서 엔진을 돌린다")
+    parser.add_argument("--crossfade-ms", type=float, default=DEFAULT_CROSSFADE_MS)
+    parser.add_argument("--hal-delay-ms", type=float, default=0.0, help="HAL 속성 읽기 한 번의 지연")
+    parser.add_argument("--open-delay-ms", type=float, default=0.0, help="스트림 열기 한 번의 지연")
+    parser.add_argument("--init-delay-ms", type=float, default=0.0, help="PortAudio 재초기화 한 번의 지연")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--verbose", action="store_true", help="엔진 로그를 stderr로 출력")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL, format="%(message)s")
+    logger = logging.getLogger("bench_switch")
+
+    results = [run_scenario(name, run, args, logger) for name in args.scenarios for run in range(args.repeat)]
+
+    print(
+        f"{'scenario':<22} {'runs':>4} {'이벤트→소리':>11} {'이벤트→refresh':>14} {'요청→완료':>10} {'프로필':>9} "
+        f"{'HAL':>5} {'open':>5} {'fail':>5} {'reinit':>6} {'drop':>5}  결과"
+    )
+    for name in args.scenarios:
+        runs = [result for result in results if result.scenario == name]
+        failed = [result for result in runs if not result.ok]
+        print(
+            f"{name:<22} {len(runs):>4} {_median([r.latency_ms for r in runs]):>12} "
+            f"{_median([r.refresh_ms for r in runs]):>15} {_median([r.open_ms for r in runs]):>11} "
+            f"{_median([r.profile_ms for r in runs], '.3f'):>12} "
+            f"{statistics.median(r.hal_calls for r in runs):>5.0f} "
+            f"{statistics.median(r.stream_opens for r in runs):>5.0f} "
+            f"{statistics.median(r.failed_opens for r in runs):>5.0f} "
+            f"{statistics.median(r.reinitializations for r in runs):>6.0f} "
+            f"{max(r.dropped_streams for r in runs):>5}  "
+            f"{'통과' if not failed else f'실패 {len(failed)}회 (출력={failed[0].output})'}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump({"args": vars(args), "results": [asdict(result) for result in results]}, handle, indent=2)
+
+    failures = [result for result in results if not result.ok]
+    if failures:
+        print(f"\n실패: {len(failures)}회 전환이 기대한 출력으로 끝나지 않았거나 열린 스트림이 끊김", file=sys.stderr)
+        return 1
+    print(f"\n통과: {len(results)}회 전환 모두 기대한 출력")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
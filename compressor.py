@@ -0,0 +1,222 @@
+import dataclasses
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+# 재귀 필터를 닫힌 형태로 풀 때 한 번에 처리하는 구간 길이.
+# a^-k 항이 float64 범위를 벗어나지 않도록 구간을 나눈다.
+ENVELOPE_CHUNK = 256
+MIN_TIME_MS = 0.1
+DB_PER_NEPER = 20 / math.log(10)
+
+
+def time_coefficient(time_ms: float, samplerate: int) -> float:
+    samples = max(time_ms, MIN_TIME_MS) * 1e-3 * samplerate
+    return math.exp(-1.0 / samples)
+
+
+def power_tables(coeff: float) -> tuple[np.ndarray, np.ndarray]:
+    steps = np.arange(ENVELOPE_CHUNK, dtype=np.float64)
+    pow_table = coeff ** steps
+    inv_table = coeff ** -steps
+    pow_table.flags.writeable = False
+    inv_table.flags.writeable = False
+    return pow_table, inv_table
+
+
+def peak_release(
+    values: np.ndarray,
+    scratch: np.ndarray,
+    coeff: float,
+    pow_table: np.ndarray,
+    inv_table: np.ndarray,
+    state: float,
+) -> float:
+    """y[n] = max(x[n], a * y[n-1])를 제자리에서 계산하고 마지막 상태를 돌려준다.
+
+    y[n] = a^n * max(max_k x[k] * a^-k, a * y[-1]) 이므로 누적 최대값 한 번으로 풀린다.
+    values 길이는 ENVELOPE_CHUNK 이하여야 한다.
+    """
+    count = values.shape[0]
+    np.multiply(values, inv_table[:count], out=scratch)
+    np.maximum.accumulate(scratch, out=scratch)
+    np.maximum(scratch, state * coeff, out=scratch)
+    np.multiply(scratch, pow_table[:count], out=values)
+    return float(values[-1])
+
+
+@dataclass(frozen=True, slots=True)
+class DynamicsParams:
+    """오디오 스레드에 넘기는 불변 파라미터 스냅샷.
+
+    dB 값으로 만들면 블록마다 필요한 선형 계수(역 threshold, 리덕션 기울기,
+    선형 makeup 게인, 어택/릴리즈 계수와 거듭제곱 테이블)를 미리 계산해 둔다.
+    바꿀 때는 replace()로 새 스냅샷을 만들어 참조 하나만 교체한다.
+    """
+
+    threshold_db: float = -20.0
+    makeup_gain_db: float = 10.0
+    ratio: float = 4.0
+    attack_ms: float = 5.0
+    release_ms: float = 150.0
+    samplerate: int = 48000
+
+    inv_threshold: float = field(init=False, repr=False)
+    inv_ratio: float = field(init=False, repr=False)
+    reduction_slope: float = field(init=False, repr=False)
+    makeup_gain: float = field(init=False, repr=False)
+    attack_coeff: float = field(init=False, repr=False)
+    attack_pow: np.ndarray = field(init=False, repr=False, compare=False)
+    attack_inv: np.ndarray = field(init=False, repr=False, compare=False)
+    release_coeff: float = field(init=False, repr=False)
+    release_pow: np.ndarray = field(init=False, repr=False, compare=False)
+    release_inv: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        derived = {
+            "inv_threshold": 10 ** (-self.threshold_db / 20),
+            "inv_ratio": 1.0 / self.ratio,
+            "reduction_slope": 1.0 - 1.0 / self.ratio,
+            "makeup_gain": 10 ** (self.makeup_gain_db / 20),
+            "attack_coeff": time_coefficient(self.attack_ms, self.samplerate),
+            "release_coeff": time_coefficient(self.release_ms, self.samplerate),
+        }
+        derived["attack_pow"], derived["attack_inv"] = power_tables(derived["attack_coeff"])
+        derived["release_pow"], derived["release_inv"] = power_tables(derived["release_coeff"])
+        for name, value in derived.items():
+            object.__setattr__(self, name, value)
+
+    def replace(self, **changes) -> "DynamicsParams":
+        changes = {name: value for name, value in changes.items() if value is not None}
+        if not changes:
+            return self
+        return dataclasses.replace(self, **changes)
+
+
+class CompressorKernel:
+    """샘플 단위 어택/릴리즈 엔벨로프를 쓰는 컴프레서.
+
+    게인 리덕션을 자연로그 영역에서 지수 릴리즈 피크 홀드 → 1극 어택 스무딩
+    순서로 추적한다. 두 재귀 모두 구간별 닫힌 형태(누적 최대값, 누적합)로
+    벡터화하고, 필터 상태는 콜백 사이에 유지하므로 블록 크기와 무관하게 같은
+    곡선이 나온다. 스크래치 버퍼는 prepare()에서 한 번만 만든다.
+    파라미터는 DynamicsParams 스냅샷으로 바꾸며, process()는 블록 시작에서
+    self.params를 한 번만 읽으므로 설정이 반쯤 바뀐 조합을 보지 않는다.
+    출력은 클리핑하지 않으므로 뒤에 리미터나 np.clip 단계가 와야 한다.
+    """
+
+    def __init__(
+        self,
+        threshold_db: float = -20.0,
+        makeup_gain_db: float = 10.0,
+        ratio: float = 4.0,
+        attack_ms: float = 5.0,
+        release_ms: float = 150.0,
+    ):
+        self.params = DynamicsParams(threshold_db, makeup_gain_db, ratio, attack_ms, release_ms)
+        self.max_frames = 0
+        self.channels = 0
+        self._release_state = 0.0
+        self._attack_state = 0.0
+        self._allocate(0, 0)
+
+    def configure(
+        self,
+        threshold_db: float,
+        makeup_gain_db: float,
+        ratio: float,
+        attack_ms: float | None = None,
+        release_ms: float | None = None,
+    ):
+        self.params = self.params.replace(
+            threshold_db=threshold_db,
+            makeup_gain_db=makeup_gain_db,
+            ratio=ratio,
+            attack_ms=attack_ms,
+            release_ms=release_ms,
+        )
+
+    def prepare(self, max_frames: int, channels: int, samplerate: int | None = None):
+        self.params = self.params.replace(samplerate=samplerate)
+        self._allocate(max_frames, channels)
+        self.reset()
+
+    @property
+    def gain_reduction_db(self) -> float:
+        """가장 최근 샘플의 게인 리덕션(dB). 미터 표시용."""
+        return self._attack_state * DB_PER_NEPER
+
+    def reset(self):
+        self._release_state = 0.0
+        self._attack_state = 0.0
+
+    def _allocate(self, max_frames: int, channels: int):
+        self.max_frames = max_frames
+        self.channels = channels
+        self._level = np.zeros(max_frames, dtype=np.float32)
+        self._channel = np.zeros(max_frames, dtype=np.float32)
+        self._gain = np.zeros(max_frames, dtype=np.float32)
+        self._envelope = np.zeros(max_frames, dtype=np.float64)
+        self._segment = np.zeros(ENVELOPE_CHUNK, dtype=np.float64)
+
+    def process(self, indata: np.ndarray, outdata: np.ndarray):
+        params = self.params
+        frames = indata.shape[0]
+        if frames > self.max_frames or indata.shape[1] != self.channels:
+            self._allocate(max(frames, self.max_frames), indata.shape[1])
+
+        full = frames == self.max_frames
+        level = self._level if full else self._level[:frames]
+        channel = self._channel if full else self._channel[:frames]
+        gain = self._gain if full else self._gain[:frames]
+        envelope = self._envelope if full else self._envelope[:frames]
+
+        # 프레임별 피크 레벨 → 정적 게인 리덕션 곡선 ln(level / threshold) * (1 - 1/ratio).
+        # 채널 단위로 처리해야 브로드캐스트/형변환 임시 버퍼가 생기지 않는다.
+        np.abs(indata[:, 0], out=level)
+        for index in range(1, self.channels):
+            np.abs(indata[:, index], out=channel)
+            np.maximum(level, channel, out=level)
+        np.copyto(envelope, level)
+        np.maximum(envelope, 1e-9, out=envelope)
+        envelope *= params.inv_threshold
+        np.log(envelope, out=envelope)
+        envelope *= params.reduction_slope
+        np.maximum(envelope, 0.0, out=envelope)
+
+        for start in range(0, frames, ENVELOPE_CHUNK):
+            self._smooth_segment(params, envelope[start:start + ENVELOPE_CHUNK])
+
+        # 선형 게인 = makeup * exp(-리덕션)
+        np.negative(envelope, out=envelope)
+        np.exp(envelope, out=envelope)
+        envelope *= params.makeup_gain
+        np.copyto(gain, envelope, casting="same_kind")
+
+        for index in range(self.channels):
+            np.multiply(indata[:, index], gain, out=outdata[:, index])
+
+    def _smooth_segment(self, params: DynamicsParams, values: np.ndarray):
+        count = values.shape[0]
+        scratch = self._segment[:count]
+
+        self._release_state = peak_release(
+            values,
+            scratch,
+            params.release_coeff,
+            params.release_pow,
+            params.release_inv,
+            self._release_state,
+        )
+
+        # 어택: y[n] = aA * y[n-1] + (1 - aA) * x[n]
+        # = aA^n * (aA * y[-1] + (1 - aA) * sum_k x[k] * aA^-k)
+        attack_coeff = params.attack_coeff
+        np.multiply(values, params.attack_inv[:count], out=scratch)
+        np.add.accumulate(scratch, out=scratch)
+        scratch *= 1.0 - attack_coeff
+        scratch += self._attack_state * attack_coeff
+        np.multiply(scratch, params.attack_pow[:count], out=values)
+        self._attack_state = float(values[-1])
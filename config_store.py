@@ -0,0 +1,200 @@
+"""설정 파일 write-behind 저장소.
+
+메인 스레드는 update()로 값만 넘기고 바로 돌아온다. 실제 쓰기는 백그라운드
+스레드가 변경이 잦아들 때 한 번에 하고, 같은 디렉터리의 임시 파일에 쓴 뒤
+os.replace로 바꾸므로 쓰는 도중에 죽어도 이전 파일이 온전히 남는다.
+
+스키마 2부터 장치별 기록(history_keys)은 history_path에 따로 둔다. 메뉴 설정만
+바뀌면 설정 파일만 다시 쓰고, 장치 기록이 커져도 설정 파일 읽기/쓰기는 작게
+유지된다. 스키마 1 파일(버전 키 없이 전부 한 파일)은 그대로 읽고, 다음 쓰기에서
+두 파일로 나눈다.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+
+CONFIG_SCHEMA_VERSION = 2
+SCHEMA_KEY = "schema_version"
+DEFAULT_WRITE_DELAY = 0.5
+DEFAULT_MAX_WRITE_DELAY = 3.0
+WRITE_RETRY_DELAY = 2.0
+
+
+class ConfigStore:
+    """dirty 표시와 쓰기 스레드로 설정을 저장한다.
+
+    update()는 값이 실제로 바뀌었을 때만 dirty로 표시한다. 쓰기 스레드는 마지막
+    변경 뒤 delay만큼 조용하거나 첫 변경 뒤 max_delay가 지나면 쓴다. 파일마다
+    마지막으로 쓴 내용을 기억해 두고 내용이 같은 파일은 다시 쓰지 않는다.
+    쓰기에 실패하면 다시 dirty로 두고 WRITE_RETRY_DELAY 뒤에 다시 쓴다.
+    update()에 넘긴 값은 저장소가 가지므로 넘긴 뒤에 고치면 안 된다.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        history_path: Path,
+        history_keys: Iterable[str],
+        logger: logging.Logger,
+        delay: float = DEFAULT_WRITE_DELAY,
+        max_delay: float = DEFAULT_MAX_WRITE_DELAY,
+    ):
+        self.path = path
+        self.history_path = history_path
+        self.history_keys = frozenset(history_keys)
+        self.logger = logger
+        self.delay = delay
+        self.max_delay = max_delay
+        self._data: dict = {}
+        self._written: dict[Path, bytes] = {}
+        self._dirty = False
+        self._first_dirty_at = 0.0
+        self._last_update_at = 0.0
+        self._retry_at = 0.0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def load(self) -> dict:
+        """두 파일을 읽어 합친다. 없거나 읽을 수 없으면 빈 dict."""
+        settings, settings_raw = self._read(self.path)
+        version = settings.pop(SCHEMA_KEY, 1)
+        if not isinstance(version, int):
+            version = 1
+        if version > CONFIG_SCHEMA_VERSION:
+            self.logger.warning(f"설정 파일 스키마 {version}가 이 버전({CONFIG_SCHEMA_VERSION})보다 새로움 - 아는 키만 사용")
+        data = settings
+        if version >= 2:
+            history, history_raw = self._read(self.history_path)
+            history.pop(SCHEMA_KEY, None)
+            data.update(history)
+            # 읽은 그대로면 다시 쓸 필요가 없다. 스키마 1은 다음 쓰기에서 나눠 쓴다.
+            self._written[self.path] = settings_raw
+            self._written[self.history_path] = history_raw
+        with self._condition:
+            self._data = dict(data)
+        return data
+
+    def _read(self, path: Path) -> tuple[dict, bytes]:
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return {}, b""
+        except OSError as exc:
+            self.logger.error(f"설정 파일 읽기 실패: {path}: {exc}")
+            return {}, b""
+        try:
+            data = json.loads(raw)
+        except ValueError as exc:
+            self.logger.error(f"설정 파일 해석 실패: {path}: {exc}")
+            return {}, b""
+        if not isinstance(data, dict):
+            return {}, b""
+        return data, raw
+
+    def update(self, values: dict):
+        with self._condition:
+            if self._closed or values == self._data:
+                return
+            self._data = values
+            now = time.monotonic()
+            if not self._dirty:
+                self._dirty = True
+                self._first_dirty_at = now
+            self._last_update_at = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self):
+        """대기 중인 변경을 지금 이 스레드에서 쓴다."""
+        self._write_pending()
+
+    def close(self):
+        """남은 변경을 쓰고 쓰기 스레드를 멈춘다. 이후 update()는 무시된다."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._write_pending()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._dirty and not self._closed:
+                    self._condition.wait()
+                while not self._closed:
+                    deadline = min(self._last_update_at + self.delay, self._first_dirty_at + self.max_delay)
+                    deadline = max(deadline, self._retry_at)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._condition:
+                if not self._dirty:
+                    return
+                data = self._data
+                first_dirty_at = self._first_dirty_at
+                self._dirty = False
+
+            settings = {SCHEMA_KEY: CONFIG_SCHEMA_VERSION}
+            history = {SCHEMA_KEY: CONFIG_SCHEMA_VERSION}
+            for key, value in data.items():
+                (history if key in self.history_keys else settings)[key] = value
+
+            # 설정 파일이 스키마 2를 가리키기 전에 장치 기록 파일이 먼저 있어야 한다.
+            for path, part in ((self.history_path, history), (self.path, settings)):
+                payload = json.dumps(part, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                if self._written.get(path) == payload:
+                    continue
+                started = time.perf_counter()
+                try:
+                    self._replace(path, payload)
+                except OSError as exc:
+                    self.logger.error(f"설정 저장 실패: {path}: {exc}")
+                    self._mark_failed(first_dirty_at)
+                    return
+                self._written[path] = payload
+                self.logger.debug(
+                    f"설정 저장: {path.name} {len(payload)}B {(time.perf_counter() - started) * 1e3:.1f}ms"
+                )
+
+    def _mark_failed(self, first_dirty_at: float):
+        with self._condition:
+            if self._dirty:
+                first_dirty_at = min(first_dirty_at, self._first_dirty_at)
+            self._dirty = True
+            self._first_dirty_at = first_dirty_at
+            self._retry_at = time.monotonic() + WRITE_RETRY_DELAY
+            self._condition.notify()
+
+    def _replace(self, path: Path, payload: bytes):
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(payload)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,256 @@
+"""CoreAudio HAL 접근 계층.
+
+DeviceManager는 이 인터페이스(device_ids/get_string/get_u32/has_output_streams/
+add_listener/remove_listener)로만 HAL을 읽으므로 fake_audio.FakeHAL로 바꿔
+끼우면 macOS 밖에서도 돈다. 리스너 콜백은 (object_id, 바뀐 selector 집합)을
+받고 CoreAudio 리스너 스레드에서 불린다.
+"""
+
+import ctypes
+import threading
+from collections.abc import Callable
+
+
+CORE_AUDIO_PATH = "/System/Library/Frameworks/CoreAudio.framework/CoreAudio"
+CORE_FOUNDATION_PATH = "/System/Library/Frameworks/CoreFoundation.framework/CoreFoundation"
+
+
+def fourcc(code: str) -> int:
+    return int.from_bytes(code.encode("ascii"), "big")
+
+
+class AudioObjectPropertyAddress(ctypes.Structure):
+    _fields_ = [
+        ("mSelector", ctypes.c_uint32),
+        ("mScope", ctypes.c_uint32),
+        ("mElement", ctypes.c_uint32),
+    ]
+
+
+AudioObjectPropertyListenerProc = ctypes.CFUNCTYPE(
+    ctypes.c_int32,
+    ctypes.c_uint32,
+    ctypes.c_uint32,
+    ctypes.POINTER(AudioObjectPropertyAddress),
+    ctypes.c_void_p,
+)
+
+
+kAudioObjectSystemObject = 1
+kAudioObjectPropertyScopeGlobal = fourcc("glob")
+kAudioObjectPropertyScopeOutput = fourcc("outp")
+kAudioObjectPropertyElementMain = 0
+kAudioHardwarePropertyDevices = fourcc("dev#")
+kAudioHardwarePropertyRunLoop = fourcc("rnlp")
+kAudioObjectPropertyName = fourcc("lnam")
+kAudioObjectPropertyManufacturer = fourcc("lmak")
+kAudioDevicePropertyDeviceUID = fourcc("uid ")
+kAudioDevicePropertyTransportType = fourcc("tran")
+kAudioDevicePropertyDeviceIsAlive = fourcc("livn")
+kAudioDevicePropertyStreams = fourcc("stm#")
+
+kAudioDeviceTransportTypeBuiltIn = fourcc("bltn")
+kAudioDeviceTransportTypeVirtual = fourcc("virt")
+kCFStringEncodingUTF8 = 0x08000100
+
+STRING_BUFFER_SIZE = 256
+DEVICE_ID_CAPACITY = 64
+_U32_SIZE = ctypes.sizeof(ctypes.c_uint32)
+_POINTER_SIZE = ctypes.sizeof(ctypes.c_void_p)
+
+ListenerCallback = Callable[[int, set[int]], None]
+
+
+class CoreAudioHAL:
+    """속성 읽기는 미리 만든 ctypes 객체를 재사용한다.
+
+    (selector, scope)마다 AudioObjectPropertyAddress 포인터를 한 번만 만들고,
+    값/크기 변수와 문자열 버퍼, 장치 ID 배열도 계속 쓴다. 문자열 버퍼가
+    모자라면 CFStringGetLength로 필요한 크기를 보고 그때만 키운다. 공유 버퍼를
+    쓰므로 읽기는 잠금 안에서 한다.
+    """
+
+    def __init__(self, coreaudio=None, corefoundation=None):
+        self.coreaudio = coreaudio or ctypes.cdll.LoadLibrary(CORE_AUDIO_PATH)
+        self.corefoundation = corefoundation or ctypes.cdll.LoadLibrary(CORE_FOUNDATION_PATH)
+        self._configure_ctypes()
+        # CoreAudio는 등록할 때 쓴 함수 포인터로만 리스너를 지우므로 콜백마다 하나를 계속 쥐고 있는다.
+        self._procs: dict[ListenerCallback, AudioObjectPropertyListenerProc] = {}
+        self._lock = threading.Lock()
+        self._addresses: dict[tuple[int, int], object] = {}
+        self._size = ctypes.c_uint32(0)
+        self._size_ref = ctypes.byref(self._size)
+        self._u32 = ctypes.c_uint32(0)
+        self._u32_ref = ctypes.byref(self._u32)
+        self._cfstring = ctypes.c_void_p()
+        self._cfstring_ref = ctypes.byref(self._cfstring)
+        self._string_buffer = ctypes.create_string_buffer(STRING_BUFFER_SIZE)
+        self._allocate_ids(DEVICE_ID_CAPACITY)
+        self._get_size = self.coreaudio.AudioObjectGetPropertyDataSize
+        self._get_data = self.coreaudio.AudioObjectGetPropertyData
+
+    def _configure_ctypes(self):
+        self.coreaudio.AudioObjectGetPropertyDataSize.argtypes = [
+            ctypes.c_uint32,
+            ctypes.POINTER(AudioObjectPropertyAddress),
+            ctypes.c_uint32,
+            ctypes.c_void_p,
+            ctypes.POINTER(ctypes.c_uint32),
+        ]
+        self.coreaudio.AudioObjectGetPropertyDataSize.restype = ctypes.c_int32
+        self.coreaudio.AudioObjectGetPropertyData.argtypes = [
+            ctypes.c_uint32,
+            ctypes.POINTER(AudioObjectPropertyAddress),
+            ctypes.c_uint32,
+            ctypes.c_void_p,
+            ctypes.POINTER(ctypes.c_uint32),
+            ctypes.c_void_p,
+        ]
+        self.coreaudio.AudioObjectGetPropertyData.restype = ctypes.c_int32
+        self.coreaudio.AudioObjectSetPropertyData.argtypes = [
+            ctypes.c_uint32,
+            ctypes.POINTER(AudioObjectPropertyAddress),
+            ctypes.c_uint32,
+            ctypes.c_void_p,
+            ctypes.c_uint32,
+            ctypes.c_void_p,
+        ]
+        self.coreaudio.AudioObjectSetPropertyData.restype = ctypes.c_int32
+        self.coreaudio.AudioObjectAddPropertyListener.argtypes = [
+            ctypes.c_uint32,
+            ctypes.POINTER(AudioObjectPropertyAddress),
+            AudioObjectPropertyListenerProc,
+            ctypes.c_void_p,
+        ]
+        self.coreaudio.AudioObjectAddPropertyListener.restype = ctypes.c_int32
+        self.coreaudio.AudioObjectRemovePropertyListener.argtypes = [
+            ctypes.c_uint32,
+            ctypes.POINTER(AudioObjectPropertyAddress),
+            AudioObjectPropertyListenerProc,
+            ctypes.c_void_p,
+        ]
+        self.coreaudio.AudioObjectRemovePropertyListener.restype = ctypes.c_int32
+
+        self.corefoundation.CFStringGetCString.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_char_p,
+            ctypes.c_long,
+            ctypes.c_uint32,
+        ]
+        self.corefoundation.CFStringGetCString.restype = ctypes.c_bool
+        self.corefoundation.CFStringGetLength.argtypes = [ctypes.c_void_p]
+        self.corefoundation.CFStringGetLength.restype = ctypes.c_long
+        self.corefoundation.CFStringGetMaximumSizeForEncoding.argtypes = [ctypes.c_long, ctypes.c_uint32]
+        self.corefoundation.CFStringGetMaximumSizeForEncoding.restype = ctypes.c_long
+        self.corefoundation.CFRelease.argtypes = [ctypes.c_void_p]
+        self.corefoundation.CFRelease.restype = None
+
+    def _address(self, selector: int, scope: int = kAudioObjectPropertyScopeGlobal):
+        """(selector, scope)마다 한 번 만든 주소 구조체의 byref. byref가 구조체를 붙잡고 있다."""
+        key = (selector, scope)
+        address = self._addresses.get(key)
+        if address is None:
+            address = ctypes.byref(AudioObjectPropertyAddress(selector, scope, kAudioObjectPropertyElementMain))
+            self._addresses[key] = address
+        return address
+
+    def _allocate_ids(self, capacity: int):
+        self._ids = (ctypes.c_uint32 * capacity)()
+        self._ids_ref = ctypes.byref(self._ids)
+
+    def _proc(self, callback: ListenerCallback) -> AudioObjectPropertyListenerProc:
+        proc = self._procs.get(callback)
+        if proc is None:
+
+            def listener(object_id, num_addresses, addresses, _client_data):
+                callback(object_id, {addresses[index].mSelector for index in range(num_addresses)})
+                return 0
+
+            proc = self._procs[callback] = AudioObjectPropertyListenerProc(listener)
+        return proc
+
+    def add_listener(self, object_id: int, selector: int, scope: int, callback: ListenerCallback) -> int:
+        """OSStatus를 돌려준다(0이면 성공)."""
+        return self.coreaudio.AudioObjectAddPropertyListener(
+            object_id, self._address(selector, scope), self._proc(callback), None
+        )
+
+    def remove_listener(self, object_id: int, selector: int, scope: int, callback: ListenerCallback):
+        proc = self._procs.get(callback)
+        if proc is None:
+            return
+        self.coreaudio.AudioObjectRemovePropertyListener(object_id, self._address(selector, scope), proc, None)
+
+    def use_own_notification_thread(self) -> int:
+        """리스너를 HAL이 만든 스레드에서 부르게 한다. 메인 런루프를 돌리지 않는 프로세스(데몬)는
+        이것을 부르지 않으면 장치 변경 알림을 못 받는다. OSStatus를 돌려준다."""
+        run_loop = ctypes.c_void_p(None)
+        return self.coreaudio.AudioObjectSetPropertyData(
+            kAudioObjectSystemObject, self._address(kAudioHardwarePropertyRunLoop), 0, None, _POINTER_SIZE, ctypes.byref(run_loop)
+        )
+
+    def device_ids(self) -> list[int] | None:
+        """읽기에 실패하면 None."""
+        address = self._address(kAudioHardwarePropertyDevices)
+        size = self._size
+        with self._lock:
+            size.value = 0
+            status = self._get_size(kAudioObjectSystemObject, address, 0, None, self._size_ref)
+            if status != 0:
+                return None
+            if size.value == 0:
+                return []
+
+            count = size.value // _U32_SIZE
+            if count > len(self._ids):
+                self._allocate_ids(count)
+            status = self._get_data(kAudioObjectSystemObject, address, 0, None, self._size_ref, self._ids_ref)
+            if status != 0:
+                return None
+            # 배열 슬라이스는 C에서 한 번에 int 리스트로 바꾼다.
+            return self._ids[: size.value // _U32_SIZE]
+
+    def get_u32(self, object_id: int, selector: int, default: int = 0) -> int:
+        address = self._address(selector)
+        with self._lock:
+            self._size.value = _U32_SIZE
+            status = self._get_data(object_id, address, 0, None, self._size_ref, self._u32_ref)
+            if status != 0:
+                return default
+            return self._u32.value
+
+    def get_string(self, object_id: int, selector: int) -> str | None:
+        address = self._address(selector)
+        with self._lock:
+            self._size.value = _POINTER_SIZE
+            self._cfstring.value = None
+            status = self._get_data(object_id, address, 0, None, self._size_ref, self._cfstring_ref)
+            string = self._cfstring.value
+            if status != 0 or not string:
+                return None
+            try:
+                return self._decode_cfstring(string)
+            finally:
+                self.corefoundation.CFRelease(string)
+
+    def _decode_cfstring(self, string: int) -> str | None:
+        corefoundation = self.corefoundation
+        buffer = self._string_buffer
+        if not corefoundation.CFStringGetCString(string, buffer, len(buffer), kCFStringEncodingUTF8):
+            # 버퍼가 모자란 경우만 길이를 물어 키우고 한 번 더 읽는다.
+            needed = corefoundation.CFStringGetMaximumSizeForEncoding(
+                corefoundation.CFStringGetLength(string), kCFStringEncodingUTF8
+            ) + 1
+            if needed <= len(buffer):
+                return None
+            buffer = self._string_buffer = ctypes.create_string_buffer(needed)
+            if not corefoundation.CFStringGetCString(string, buffer, len(buffer), kCFStringEncodingUTF8):
+                return None
+        return buffer.value.decode("utf-8")
+
+    def has_output_streams(self, object_id: int) -> bool:
+        address = self._address(kAudioDevicePropertyStreams, kAudioObjectPropertyScopeOutput)
+        with self._lock:
+            self._size.value = 0
+            status = self._get_size(object_id, address, 0, None, self._size_ref)
+            return status == 0 and self._size.value > 0
@@ -0,0 +1,120 @@
+"""night_daemon 제어 소켓의 동기 클라이언트와 명령줄 도구.
+
+엔진 모듈을 불러오지 않으므로 스크립트나 배포 도구에서 가볍게 쓸 수 있다.
+
+사용 예:
+    python3 daemon_client.py status
+    python3 daemon_client.py set_profile threshold_db=-30
+    python3 daemon_client.py select_output uid=BuiltInSpeakerDevice
+    python3 daemon_client.py watch
+"""
+
+import argparse
+import itertools
+import json
+import socket
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+from engine_defaults import default_socket_path
+
+
+DEFAULT_TIMEOUT = 10.0
+
+
+class DaemonError(Exception):
+    pass
+
+
+class DaemonClient:
+    """연결 하나로 요청을 차례로 보낸다. 응답을 기다리는 동안 온 알림은 events에 쌓인다."""
+
+    def __init__(self, socket_path: Path | None = None, timeout: float = DEFAULT_TIMEOUT):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(str(socket_path or default_socket_path()))
+        self._file = self.socket.makefile("rb")
+        self._ids = itertools.count(1)
+        self.events: list[dict] = []
+
+    def close(self):
+        self._file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def call(self, cmd: str, **args):
+        request_id = next(self._ids)
+        payload = {"id": request_id, "cmd": cmd, "args": args}
+        self.socket.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        while True:
+            message = self._read()
+            if "event" in message:
+                self.events.append(message)
+                continue
+            if message.get("id") != request_id:
+                continue
+            if not message.get("ok"):
+                raise DaemonError(message.get("error"))
+            return message.get("result")
+
+    def watch(self) -> Iterator[dict]:
+        """subscribe하고 알림을 하나씩 돌려준다. 연결이 끊기면 끝난다."""
+        yield {"event": "status", "status": self.call("subscribe")}
+        yield from self.events
+        self.events.clear()
+        self.socket.settimeout(None)
+        while True:
+            yield self._read()
+
+    def _read(self) -> dict:
+        line = self._file.readline()
+        if not line:
+            raise DaemonError("데몬이 연결을 닫음")
+        return json.loads(line)
+
+
+def parse_value(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="야간 모드 데몬 제어")
+    parser.add_argument("--socket", type=Path, default=default_socket_path(), help="제어 소켓 경로")
+    parser.add_argument("cmd", help="status, devices, stats, start, stop, set_mode, ... 또는 watch")
+    parser.add_argument("args", nargs="*", help="key=value (값은 JSON으로 읽고, 안 되면 문자열)")
+    args = parser.parse_args(argv)
+
+    call_args = {}
+    for item in args.args:
+        key, separator, value = item.partition("=")
+        if not separator:
+            parser.error(f"key=value 형식이 아님: {item}")
+        call_args[key] = parse_value(value)
+
+    try:
+        with DaemonClient(args.socket) as client:
+            if args.cmd == "watch":
+                for message in client.watch():
+                    print(json.dumps(message, ensure_ascii=False), flush=True)
+                return 0
+            result = client.call(args.cmd, **call_args)
+    except (OSError, DaemonError) as exc:
+        print(f"실패: {exc}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
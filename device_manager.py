@@ -1,53 +1,37 @@
-import ctypes
+import threading
+import time
 from collections.abc import Callable
-from dataclasses import dataclass
-
-from PyObjCTools import AppHelper
-
-
-CORE_AUDIO_PATH = "/System/Library/Frameworks/CoreAudio.framework/CoreAudio"
-CORE_FOUNDATION_PATH = "/System/Library/Frameworks/CoreFoundation.framework/CoreFoundation"
-
-
-def fourcc(code: str) -> int:
-    return int.from_bytes(code.encode("ascii"), "big")
-
-
-class AudioObjectPropertyAddress(ctypes.Structure):
-    _fields_ = [
-        ("mSelector", ctypes.c_uint32),
-        ("mScope", ctypes.c_uint32),
-        ("mElement", ctypes.c_uint32),
-    ]
-
-
-AudioObjectPropertyListenerProc = ctypes.CFUNCTYPE(
-    ctypes.c_int32,
-    ctypes.c_uint32,
-    ctypes.c_uint32,
-    ctypes.POINTER(AudioObjectPropertyAddress),
-    ctypes.c_void_p,
+from dataclasses import dataclass, field, replace
+
+import portaudio_index
+from coreaudio_hal import (
+    kAudioDevicePropertyDeviceIsAlive,
+    kAudioDevicePropertyDeviceUID,
+    kAudioDevicePropertyStreams,
+    kAudioDevicePropertyTransportType,
+    kAudioDeviceTransportTypeBuiltIn,
+    kAudioDeviceTransportTypeVirtual,
+    kAudioHardwarePropertyDevices,
+    kAudioObjectPropertyManufacturer,
+    kAudioObjectPropertyName,
+    kAudioObjectPropertyScopeGlobal,
+    kAudioObjectPropertyScopeOutput,
+    kAudioObjectSystemObject,
 )
 
 
-kAudioObjectSystemObject = 1
-kAudioObjectPropertyScopeGlobal = fourcc("glob")
-kAudioObjectPropertyScopeOutput = fourcc("outp")
-kAudioObjectPropertyElementMain = 0
-kAudioHardwarePropertyDevices = fourcc("dev#")
-kAudioObjectPropertyName = fourcc("lnam")
-kAudioObjectPropertyManufacturer = fourcc("lmak")
-kAudioDevicePropertyDeviceUID = fourcc("uid ")
-kAudioDevicePropertyTransportType = fourcc("tran")
-kAudioDevicePropertyDeviceIsAlive = fourcc("livn")
-kAudioDevicePropertyStreams = fourcc("stm#")
+# 장치마다 리스너를 거는 속성. 이벤트가 오면 해당 속성만 다시 읽는다.
+DEVICE_LISTENED_PROPERTIES = (
+    (kAudioDevicePropertyDeviceIsAlive, kAudioObjectPropertyScopeGlobal),
+    (kAudioObjectPropertyName, kAudioObjectPropertyScopeGlobal),
+    (kAudioDevicePropertyStreams, kAudioObjectPropertyScopeOutput),
+)
 
-kAudioDeviceTransportTypeBuiltIn = fourcc("bltn")
-kAudioDeviceTransportTypeVirtual = fourcc("virt")
-kCFStringEncodingUTF8 = 0x08000100
+DEFAULT_SETTLE_SECONDS = 0.3
+MAX_SETTLE_DELAY_SECONDS = 1.5
 
 
-@dataclass(slots=True)
+@dataclass(frozen=True, slots=True)
 class DeviceInfo:
     object_id: int
     uid: str
@@ -72,115 +56,215 @@ class DeviceInfo:
         return self.name
 
 
+@dataclass(frozen=True, slots=True)
+class OutputSnapshot:
+    """출력으로 고를 수 있는 장치 목록. 장치 구성이 바뀔 때만 새로 만든다.
+
+    devices는 메뉴 순서(내장 먼저, 이름순)로 정렬되어 있다. version이 같으면
+    내용도 같으므로 호출하는 쪽은 version으로 자기 캐시를 맞출 수 있다.
+    """
+
+    version: int
+    devices: tuple[DeviceInfo, ...] = ()
+    by_uid: dict[str, DeviceInfo] = field(default_factory=dict)
+    display_names: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class DeviceChanges:
+    """refresh() 한 번에 생긴 변화(UID 집합)."""
+
+    added: set[str] = field(default_factory=set)
+    removed: set[str] = field(default_factory=set)
+    changed: set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+class EventCoalescer:
+    """CoreAudio 리스너 스레드에서 들어오는 이벤트를 모아 메인 스레드에서 한 번에 넘긴다.
+
+    마지막 이벤트 뒤 settle_seconds 동안 새 이벤트가 없으면 모인 것을 flush로
+    넘긴다. 이벤트가 끊이지 않아도 첫 이벤트에서 max_delay_seconds가 지나면
+    넘긴다. post()는 아무 스레드에서나 부를 수 있고 flush는 메인 스레드에서 불린다.
+    call_after/call_later는 메인 런루프에 일을 넣는 함수로, 기본은 AppHelper다.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[dict[int, set[int]], int], None],
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        max_delay_seconds: float = MAX_SETTLE_DELAY_SECONDS,
+        call_after: Callable | None = None,
+        call_later: Callable | None = None,
+    ):
+        if call_after is None or call_later is None:
+            from PyObjCTools import AppHelper
+
+            call_after = call_after or AppHelper.callAfter
+            call_later = call_later or AppHelper.callLater
+        self.call_after = call_after
+        self.call_later = call_later
+        self.flush = flush
+        self.settle_seconds = settle_seconds
+        self.max_delay_seconds = max(max_delay_seconds, settle_seconds)
+        self._lock = threading.Lock()
+        self._properties: dict[int, set[int]] = {}
+        self._events = 0
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._armed = False
+        self._generation = 0
+
+    def post(self, object_id: int | None = None, selectors: set[int] | None = None):
+        with self._lock:
+            now = time.monotonic()
+            if self._events == 0:
+                self._first_at = now
+            self._events += 1
+            self._last_at = now
+            if object_id is not None and selectors:
+                self._properties.setdefault(object_id, set()).update(selectors)
+            if self._armed:
+                return
+            self._armed = True
+            generation = self._generation
+        self.call_after(self._schedule, generation, self.settle_seconds)
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            self._armed = False
+            self._properties = {}
+            self._events = 0
+
+    def _schedule(self, generation: int, delay: float):
+        self.call_later(delay, self._fire, generation)
+
+    def _fire(self, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            now = time.monotonic()
+            due = min(self._last_at + self.settle_seconds, self._first_at + self.max_delay_seconds)
+            if due > now:
+                self._schedule(generation, due - now)
+                return
+            properties = self._properties
+            events = self._events
+            self._properties = {}
+            self._events = 0
+            self._armed = False
+        self.flush(properties, events)
+
+
 class DeviceManager:
-    def __init__(self, logger, on_change: Callable[[], None] | None = None):
+    """CoreAudio 장치 목록과 속성 캐시.
+
+    refresh()는 dev# 객체 ID 목록을 직전 목록과 비교해서 새로 생긴 장치만 전부
+    읽고, 사라진 장치는 캐시에서 뺀다. 이미 아는 장치는 리스너가 알려 준 속성만
+    다시 읽어 새 DeviceInfo로 바꾼다. 캐시를 버리고 전부 다시 읽는
+    것은 refresh(full=True)로 명시적으로 요청할 때만 한다.
+    CoreAudio 이벤트는 settle_seconds 창 안에서 하나로 합쳐서 refresh 한 번,
+    on_change(DeviceChanges) 한 번으로 처리한다.
+    무언가 바뀐 refresh는 출력 장치 스냅샷(OutputSnapshot)을 한 번 새로 만들고,
+    list_output_devices()/output_snapshot()은 다음 변화까지 그것을 그대로 돌려준다.
+    hal을 주지 않으면 CoreAudioHAL을 쓴다. 테스트와 벤치마크는 fake_audio.FakeHAL과
+    그 런루프의 call_after/call_later를 넘긴다.
+    """
+
+    def __init__(
+        self,
+        logger,
+        on_change: Callable[[DeviceChanges], None] | None = None,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        hal=None,
+        call_after: Callable | None = None,
+        call_later: Callable | None = None,
+    ):
         self.logger = logger
         self.on_change = on_change
-        self.coreaudio = ctypes.cdll.LoadLibrary(CORE_AUDIO_PATH)
-        self.corefoundation = ctypes.cdll.LoadLibrary(CORE_FOUNDATION_PATH)
-        self._configure_ctypes()
+        self.events = EventCoalescer(
+            self._handle_coreaudio_events,
+            settle_seconds,
+            call_after=call_after,
+            call_later=call_later,
+        )
+        if hal is None:
+            from coreaudio_hal import CoreAudioHAL
+
+            hal = CoreAudioHAL()
+        self.hal = hal
 
         self.devices_by_uid: dict[str, DeviceInfo] = {}
         self.device_ids_by_uid: dict[str, int] = {}
-        self._system_listener = None
-        self._device_listener = None
-        self._system_addresses: list[AudioObjectPropertyAddress] = []
-        self._device_listener_addresses: dict[int, AudioObjectPropertyAddress] = {}
-
-    def _configure_ctypes(self):
-        self.coreaudio.AudioObjectGetPropertyDataSize.argtypes = [
-            ctypes.c_uint32,
-            ctypes.POINTER(AudioObjectPropertyAddress),
-            ctypes.c_uint32,
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.c_uint32),
-        ]
-        self.coreaudio.AudioObjectGetPropertyDataSize.restype = ctypes.c_int32
-        self.coreaudio.AudioObjectGetPropertyData.argtypes = [
-            ctypes.c_uint32,
-            ctypes.POINTER(AudioObjectPropertyAddress),
-            ctypes.c_uint32,
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.c_uint32),
-            ctypes.c_void_p,
-        ]
-        self.coreaudio.AudioObjectGetPropertyData.restype = ctypes.c_int32
-        self.coreaudio.AudioObjectAddPropertyListener.argtypes = [
-            ctypes.c_uint32,
-            ctypes.POINTER(AudioObjectPropertyAddress),
-            AudioObjectPropertyListenerProc,
-            ctypes.c_void_p,
-        ]
-        self.coreaudio.AudioObjectAddPropertyListener.restype = ctypes.c_int32
-        self.coreaudio.AudioObjectRemovePropertyListener.argtypes = [
-            ctypes.c_uint32,
-            ctypes.POINTER(AudioObjectPropertyAddress),
-            AudioObjectPropertyListenerProc,
-            ctypes.c_void_p,
-        ]
-        self.coreaudio.AudioObjectRemovePropertyListener.restype = ctypes.c_int32
-
-        self.corefoundation.CFStringGetCString.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-            ctypes.c_long,
-            ctypes.c_uint32,
-        ]
-        self.corefoundation.CFStringGetCString.restype = ctypes.c_bool
-        self.corefoundation.CFRelease.argtypes = [ctypes.c_void_p]
-        self.corefoundation.CFRelease.restype = None
-
-    def _address(self, selector: int, scope: int = kAudioObjectPropertyScopeGlobal) -> AudioObjectPropertyAddress:
-        return AudioObjectPropertyAddress(selector, scope, kAudioObjectPropertyElementMain)
+        self.devices_by_id: dict[int, DeviceInfo] = {}
+        self._snapshot = OutputSnapshot(version=0)
+        self._sd_index_by_uid: dict[str, int] = {}
+        self._uid_by_sd_index: dict[int, str] = {}
+        self._sd_generation = -1
+        self._sd_lock = threading.Lock()
+        self._listening = False
+        self._device_listener_addresses: dict[int, list[tuple[int, int]]] = {}
+        self._property_readers = {
+            kAudioObjectPropertyName: (
+                "name",
+                lambda object_id: self.hal.get_string(object_id, kAudioObjectPropertyName),
+            ),
+            kAudioObjectPropertyManufacturer: (
+                "manufacturer",
+                lambda object_id: self.hal.get_string(object_id, kAudioObjectPropertyManufacturer),
+            ),
+            kAudioDevicePropertyTransportType: (
+                "transport_type",
+                lambda object_id: self.hal.get_u32(object_id, kAudioDevicePropertyTransportType),
+            ),
+            kAudioDevicePropertyDeviceIsAlive: (
+                "is_alive",
+                lambda object_id: bool(self.hal.get_u32(object_id, kAudioDevicePropertyDeviceIsAlive, default=1)),
+            ),
+            kAudioDevicePropertyStreams: ("has_output", self.hal.has_output_streams),
+        }
 
     def start(self):
         self._register_listeners()
         self.refresh()
 
     def stop(self):
+        self.events.cancel()
         self._remove_listeners()
 
     def _register_listeners(self):
-        def system_listener(_object_id, _num_addresses, _addresses, _client_data):
-            AppHelper.callAfter(self._handle_coreaudio_event)
-            return 0
+        status = self.hal.add_listener(
+            kAudioObjectSystemObject,
+            kAudioHardwarePropertyDevices,
+            kAudioObjectPropertyScopeGlobal,
+            self._on_system_event,
+        )
+        if status != 0:
+            self.logger.error(f"Failed to add system CoreAudio listener {kAudioHardwarePropertyDevices}: {status}")
+        self._listening = True
 
-        def device_listener(_object_id, _num_addresses, _addresses, _client_data):
-            AppHelper.callAfter(self._handle_coreaudio_event)
-            return 0
+    def _on_system_event(self, _object_id: int, _selectors: set[int]):
+        self.events.post()
 
-        self._system_listener = AudioObjectPropertyListenerProc(system_listener)
-        self._device_listener = AudioObjectPropertyListenerProc(device_listener)
-        self._system_addresses = [self._address(kAudioHardwarePropertyDevices)]
+    def _on_device_event(self, object_id: int, selectors: set[int]):
+        self.events.post(object_id, selectors)
 
-        for address in self._system_addresses:
-            status = self.coreaudio.AudioObjectAddPropertyListener(
+    def _remove_listeners(self):
+        if self._listening:
+            self.hal.remove_listener(
                 kAudioObjectSystemObject,
-                ctypes.byref(address),
-                self._system_listener,
-                None,
+                kAudioHardwarePropertyDevices,
+                kAudioObjectPropertyScopeGlobal,
+                self._on_system_event,
             )
-            if status != 0:
-                self.logger.error(f"Failed to add system CoreAudio listener {address.mSelector}: {status}")
+            self._listening = False
 
-    def _remove_listeners(self):
-        if self._system_listener is not None:
-            for address in self._system_addresses:
-                self.coreaudio.AudioObjectRemovePropertyListener(
-                    kAudioObjectSystemObject,
-                    ctypes.byref(address),
-                    self._system_listener,
-                    None,
-                )
-
-        if self._device_listener is not None:
-            for object_id, address in self._device_listener_addresses.items():
-                self.coreaudio.AudioObjectRemovePropertyListener(
-                    object_id,
-                    ctypes.byref(address),
-                    self._device_listener,
-                    None,
-                )
+        for object_id, addresses in self._device_listener_addresses.items():
+            for selector, scope in addresses:
+                self.hal.remove_listener(object_id, selector, scope, self._on_device_event)
 
         self._device_listener_addresses.clear()
 
@@ -189,57 +273,152 @@ class DeviceManager:
         new_ids = set(object_ids)
 
         for removed_id in current_ids - new_ids:
-            address = self._device_listener_addresses.pop(removed_id)
-            self.coreaudio.AudioObjectRemovePropertyListener(
-                removed_id,
-                ctypes.byref(address),
-                self._device_listener,
-                None,
-            )
+            for selector, scope in self._device_listener_addresses.pop(removed_id):
+                self.hal.remove_listener(removed_id, selector, scope, self._on_device_event)
 
         for added_id in new_ids - current_ids:
-            address = self._address(kAudioDevicePropertyDeviceIsAlive)
-            status = self.coreaudio.AudioObjectAddPropertyListener(
-                added_id,
-                ctypes.byref(address),
-                self._device_listener,
-                None,
-            )
-            if status == 0:
-                self._device_listener_addresses[added_id] = address
-            else:
-                self.logger.error(f"Failed to add device alive listener {added_id}: {status}")
-
-    def _handle_coreaudio_event(self):
-        self.refresh()
-        if self.on_change is not None:
-            self.on_change()
-
-    def refresh(self):
+            addresses = []
+            for selector, scope in DEVICE_LISTENED_PROPERTIES:
+                status = self.hal.add_listener(added_id, selector, scope, self._on_device_event)
+                if status == 0:
+                    addresses.append((selector, scope))
+                else:
+                    self.logger.error(f"Failed to add device listener {added_id} {selector}: {status}")
+            self._device_listener_addresses[added_id] = addresses
+
+    def _handle_coreaudio_events(self, changed_properties: dict[int, set[int]], events: int):
+        changes = self.refresh(changed_properties)
+        self.logger.debug(
+            f"CoreAudio 이벤트 {events}개 합침: 추가={sorted(changes.added)} "
+            f"제거={sorted(changes.removed)} 변경={sorted(changes.changed)}"
+        )
+        if changes and self.on_change is not None:
+            self.on_change(changes)
+
+    def refresh(
+        self,
+        changed_properties: dict[int, set[int]] | None = None,
+        full: bool = False,
+    ) -> DeviceChanges:
+        """changed_properties: 객체 ID → 리스너가 알려 준 바뀐 속성 selector."""
         object_ids = self._get_device_ids()
+        if object_ids is None:
+            # 목록을 못 읽은 것을 장치가 모두 사라진 것으로 보지 않는다. 다음 이벤트에서 다시 읽는다.
+            return DeviceChanges()
         self._sync_device_listeners(object_ids)
+        if full:
+            return self._full_rescan(object_ids)
+
+        changes = DeviceChanges()
+        present = set(object_ids)
+        for object_id in [object_id for object_id in self.devices_by_id if object_id not in present]:
+            device = self._forget_device(object_id)
+            changes.removed.add(device.uid)
 
-        devices_by_uid: dict[str, DeviceInfo] = {}
-        device_ids_by_uid: dict[str, int] = {}
         for object_id in object_ids:
+            if object_id in self.devices_by_id:
+                continue
             device = self._load_device(object_id)
             if device is None:
                 continue
-            devices_by_uid[device.uid] = device
-            device_ids_by_uid[device.uid] = object_id
+            self._remember_device(device)
+            changes.added.add(device.uid)
 
-        self.devices_by_uid = devices_by_uid
+        for object_id, selectors in (changed_properties or {}).items():
+            device = self.devices_by_id.get(object_id)
+            if device is None or device.uid in changes.added:
+                continue
+            if self._update_device(device, selectors):
+                changes.changed.add(device.uid)
+
+        # 같은 UID가 새 객체 ID로 다시 나타난 경우는 추가가 아니라 변경이다.
+        reappeared = changes.added & changes.removed
+        changes.added -= reappeared
+        changes.removed -= reappeared
+        changes.changed |= reappeared
+        if changes:
+            self._rebuild_snapshot()
+        return changes
+
+    def _full_rescan(self, object_ids: list[int]) -> DeviceChanges:
+        # 컨트롤러 스레드가 get_sd_index()/get_device()로 읽고 있으므로 새 사전을 다 채운 뒤 한 번에 바꾼다.
+        previous = self.devices_by_uid
+        devices_by_id: dict[int, DeviceInfo] = {}
+        current: dict[str, DeviceInfo] = {}
+        device_ids_by_uid: dict[str, int] = {}
+        for object_id in object_ids:
+            device = self._load_device(object_id)
+            if device is not None:
+                devices_by_id[object_id] = device
+                current[device.uid] = device
+                device_ids_by_uid[device.uid] = object_id
+        self.devices_by_id = devices_by_id
+        self.devices_by_uid = current
         self.device_ids_by_uid = device_ids_by_uid
 
-    def list_output_devices(self) -> list[DeviceInfo]:
-        return sorted(
-            [
-                device
-                for device in self.devices_by_uid.values()
-                if device.has_output and device.is_alive and not device.is_virtual
-            ],
-            key=lambda device: (not device.is_builtin, device.display_name.lower()),
+        self.logger.info(f"CoreAudio 장치 전체 재검색: {len(current)}개")
+        changes = DeviceChanges(
+            added=current.keys() - previous.keys(),
+            removed=previous.keys() - current.keys(),
+            changed={uid for uid in current.keys() & previous.keys() if current[uid] != previous[uid]},
         )
+        if changes:
+            self._rebuild_snapshot()
+        return changes
+
+    def _remember_device(self, device: DeviceInfo):
+        self.devices_by_id[device.object_id] = device
+        self.devices_by_uid[device.uid] = device
+        self.device_ids_by_uid[device.uid] = device.object_id
+
+    def _forget_device(self, object_id: int) -> DeviceInfo:
+        device = self.devices_by_id.pop(object_id)
+        if self.device_ids_by_uid.get(device.uid) == object_id:
+            del self.devices_by_uid[device.uid]
+            del self.device_ids_by_uid[device.uid]
+            self._forget_sd_index(device.uid)
+        return device
+
+    def _update_device(self, device: DeviceInfo, selectors: set[int]) -> bool:
+        """리스너가 알려 준 속성만 다시 읽는다. 바뀌었으면 새 DeviceInfo로 바꿔 넣는다.
+
+        DeviceInfo는 고치지 않으므로 이미 나간 스냅샷은 그대로 남는다.
+        """
+        updates = {}
+        for selector in selectors:
+            reader = self._property_readers.get(selector)
+            if reader is None:
+                continue
+            field_name, read = reader
+            value = read(device.object_id)
+            if value is None or value == getattr(device, field_name):
+                continue
+            updates[field_name] = value
+        if not updates:
+            return False
+        self._remember_device(replace(device, **updates))
+        return True
+
+    def _rebuild_snapshot(self):
+        keyed = []
+        for device in self.devices_by_uid.values():
+            if device.has_output and device.is_alive and not device.is_virtual:
+                display_name = device.display_name
+                keyed.append(((not device.is_builtin, display_name.lower()), display_name, device))
+        keyed.sort(key=lambda item: item[0])
+        self._snapshot = OutputSnapshot(
+            version=self._snapshot.version + 1,
+            devices=tuple(device for _, _, device in keyed),
+            by_uid={device.uid: device for _, _, device in keyed},
+            display_names={device.uid: display_name for _, display_name, device in keyed},
+        )
+
+    def output_snapshot(self) -> OutputSnapshot:
+        return self._snapshot
+
+    def list_output_devices(self) -> tuple[DeviceInfo, ...]:
+        """내장 먼저, 이름순. 마지막 스냅샷을 그대로 돌려주므로 호출 비용이 없다."""
+        return self._snapshot.devices
 
     def get_device(self, uid: str | None) -> DeviceInfo | None:
         if uid is None:
@@ -256,86 +435,81 @@ class DeviceManager:
         """CoreAudio UID를 sounddevice 인덱스로 변환.
 
         PortAudio와 CoreAudio 모두 HAL에서 장치 이름을 가져오므로
-        device.name으로 직접 매핑한다.
+        device.name으로 직접 매핑한다. 결과는 PortAudio 세대마다 UID ↔ 인덱스
+        양방향으로 캐시한다. 캐시는 컨트롤러 스레드(조회)와 메인 스레드(장치 제거)가
+        같이 건드리므로 _sd_lock 안에서만 읽고 쓴다.
         """
-        import sounddevice as sd
-
         device = self.devices_by_uid.get(uid)
         if device is None:
             self.logger.error(f"UID {uid}를 장치 캐시에서 찾을 수 없음")
             return None
 
         target_name = device.name
-
-        ca_hostapi = None
-        for i, h in enumerate(sd.query_hostapis()):
-            if "Core Audio" in h["name"]:
-                ca_hostapi = i
-                break
-        if ca_hostapi is None:
+        devices = portaudio_index.snapshot()
+        with self._sd_lock:
+            if devices.generation != self._sd_generation:
+                self._sd_index_by_uid.clear()
+                self._uid_by_sd_index.clear()
+                self._sd_generation = devices.generation
+            sd_idx = self._sd_index_by_uid.get(uid)
+
+        if sd_idx is not None and devices.name_by_index.get(sd_idx) == target_name:
+            return sd_idx
+
+        if devices.core_audio_hostapi is None:
             self.logger.error("sounddevice에서 Core Audio 호스트 API를 찾을 수 없음")
             return None
 
-        for sd_idx, dev in enumerate(sd.query_devices()):
-            if dev["hostapi"] != ca_hostapi:
-                continue
-            if dev["name"] == target_name and dev["max_output_channels"] > 0:
-                self.logger.debug(
-                    f"UID {uid} → name={target_name!r} → sd_index {sd_idx}"
-                )
-                return sd_idx
-
-        sd_names = [
-            dev["name"]
-            for dev in sd.query_devices()
-            if dev["hostapi"] == ca_hostapi
-        ]
-        self.logger.error(
-            f"UID {uid} (name={target_name!r})에 대응하는 sounddevice 인덱스를 찾을 수 없음. "
-            f"sounddevice Core Audio 장치 목록: {sd_names}"
-        )
-        return None
+        sd_idx = devices.output_index_by_name.get(target_name)
+        if sd_idx is None:
+            self.logger.error(
+                f"UID {uid} (name={target_name!r})에 대응하는 sounddevice 인덱스를 찾을 수 없음. "
+                f"sounddevice Core Audio 출력 장치 목록: {devices.output_names()}"
+            )
+            return None
 
-    def _get_device_ids(self) -> list[int]:
-        address = self._address(kAudioHardwarePropertyDevices)
-        size = ctypes.c_uint32(0)
-        status = self.coreaudio.AudioObjectGetPropertyDataSize(
-            kAudioObjectSystemObject,
-            ctypes.byref(address),
-            0,
-            None,
-            ctypes.byref(size),
-        )
-        if status != 0 or size.value == 0:
-            return []
+        with self._sd_lock:
+            if devices.generation == self._sd_generation:
+                self._drop_sd_index(uid)
+                self._sd_index_by_uid[uid] = sd_idx
+                self._uid_by_sd_index[sd_idx] = uid
+        self.logger.debug(f"UID {uid} → name={target_name!r} → sd_index {sd_idx}")
+        return sd_idx
+
+    def get_uid_for_sd_index(self, sd_index: int) -> str | None:
+        """get_sd_index()로 이미 찾은 인덱스의 역방향 조회."""
+        generation = portaudio_index.generation()
+        with self._sd_lock:
+            if self._sd_generation != generation:
+                return None
+            return self._uid_by_sd_index.get(sd_index)
 
-        count = size.value // ctypes.sizeof(ctypes.c_uint32)
-        buffer = (ctypes.c_uint32 * count)()
-        io_size = ctypes.c_uint32(size.value)
-        status = self.coreaudio.AudioObjectGetPropertyData(
-            kAudioObjectSystemObject,
-            ctypes.byref(address),
-            0,
-            None,
-            ctypes.byref(io_size),
-            ctypes.byref(buffer),
-        )
-        if status != 0:
-            self.logger.error(f"CoreAudio 장치 목록 읽기 실패: {status}")
-            return []
+    def _forget_sd_index(self, uid: str):
+        with self._sd_lock:
+            self._drop_sd_index(uid)
 
-        return [int(buffer[idx]) for idx in range(count)]
+    def _drop_sd_index(self, uid: str):
+        sd_idx = self._sd_index_by_uid.pop(uid, None)
+        if sd_idx is not None and self._uid_by_sd_index.get(sd_idx) == uid:
+            self._uid_by_sd_index.pop(sd_idx, None)
+
+    def _get_device_ids(self) -> list[int] | None:
+        object_ids = self.hal.device_ids()
+        if object_ids is None:
+            self.logger.error("CoreAudio 장치 목록 읽기 실패")
+        return object_ids
 
     def _load_device(self, object_id: int) -> DeviceInfo | None:
-        uid = self._get_cfstring(object_id, kAudioDevicePropertyDeviceUID)
-        name = self._get_cfstring(object_id, kAudioObjectPropertyName)
+        hal = self.hal
+        uid = hal.get_string(object_id, kAudioDevicePropertyDeviceUID)
+        name = hal.get_string(object_id, kAudioObjectPropertyName)
         if not uid or not name:
             return None
 
-        manufacturer = self._get_cfstring(object_id, kAudioObjectPropertyManufacturer) or ""
-        transport_type = self._get_u32(object_id, kAudioDevicePropertyTransportType)
-        is_alive = bool(self._get_u32(object_id, kAudioDevicePropertyDeviceIsAlive, default=1))
-        has_output = self._has_output_streams(object_id)
+        manufacturer = hal.get_string(object_id, kAudioObjectPropertyManufacturer) or ""
+        transport_type = hal.get_u32(object_id, kAudioDevicePropertyTransportType)
+        is_alive = bool(hal.get_u32(object_id, kAudioDevicePropertyDeviceIsAlive, default=1))
+        has_output = hal.has_output_streams(object_id)
 
         return DeviceInfo(
             object_id=object_id,
@@ -346,60 +520,3 @@ class DeviceManager:
             is_alive=is_alive,
             has_output=has_output,
         )
-
-    def _get_u32(self, object_id: int, selector: int, default: int = 0) -> int:
-        address = self._address(selector)
-        value = ctypes.c_uint32(0)
-        size = ctypes.c_uint32(ctypes.sizeof(value))
-        status = self.coreaudio.AudioObjectGetPropertyData(
-            object_id,
-            ctypes.byref(address),
-            0,
-            None,
-            ctypes.byref(size),
-            ctypes.byref(value),
-        )
-        if status != 0:
-            return default
-        return int(value.value)
-
-    def _get_cfstring(self, object_id: int, selector: int) -> str | None:
-        address = self._address(selector)
-        value = ctypes.c_void_p()
-        size = ctypes.c_uint32(ctypes.sizeof(value))
-        status = self.coreaudio.AudioObjectGetPropertyData(
-            object_id,
-            ctypes.byref(address),
-            0,
-            None,
-            ctypes.byref(size),
-            ctypes.byref(value),
-        )
-        if status != 0 or not value.value:
-            return None
-
-        try:
-            buffer = ctypes.create_string_buffer(1024)
-            ok = self.corefoundation.CFStringGetCString(
-                value,
-                buffer,
-                len(buffer),
-                kCFStringEncodingUTF8,
-            )
-            if not ok:
-                return None
-            return buffer.value.decode("utf-8")
-        finally:
-            self.corefoundation.CFRelease(value)
-
-    def _has_output_streams(self, object_id: int) -> bool:
-        address = self._address(kAudioDevicePropertyStreams, kAudioObjectPropertyScopeOutput)
-        size = ctypes.c_uint32(0)
-        status = self.coreaudio.AudioObjectGetPropertyDataSize(
-            object_id,
-            ctypes.byref(address),
-            0,
-            None,
-            ctypes.byref(size),
-        )
-        return status == 0 and size.value > 0
@@ -0,0 +1,148 @@
+import importlib
+
+import numpy as np
+
+from compressor import CompressorKernel, DynamicsParams
+from engine_defaults import BACKEND_AUTO, BACKEND_NUMBA, BACKEND_NUMPY, KERNEL_BACKENDS
+from limiter import LookaheadLimiter
+
+
+def load_backend(name: str) -> str:
+    """백엔드 모듈을 불러와 커널 컴파일까지 끝내고 실제로 쓸 백엔드 이름을 돌려준다.
+
+    numba 커널은 import 시점에 컴파일(또는 캐시 로드)되므로 시작할 때 한 번
+    불러 두면 오디오 콜백에서는 컴파일이 일어나지 않는다. numba가 없거나
+    컴파일에 실패하면 기준 구현인 NumPy 백엔드를 쓴다.
+    """
+    if name == BACKEND_NUMPY:
+        return BACKEND_NUMPY
+    try:
+        importlib.import_module("dsp_numba")
+    except Exception:
+        if name == BACKEND_NUMBA:
+            raise
+        return BACKEND_NUMPY
+    return BACKEND_NUMBA
+
+
+class ProcessingChain:
+    """컴프레서 → (리미터 | 클립) 처리 체인. 실시간 콜백과 오프라인 렌더가 같이 쓴다.
+
+    backend가 "numba"면 같은 체인을 dsp_numba의 단일 패스 커널로 돌린다.
+    NumPy 구현(CompressorKernel, LookaheadLimiter)이 기준이고 파라미터도 여전히
+    compressor.params 스냅샷 하나로 넘어간다.
+    """
+
+    def __init__(
+        self,
+        threshold_db: float = -20.0,
+        makeup_gain_db: float = 10.0,
+        ratio: float = 4.0,
+        attack_ms: float = 5.0,
+        release_ms: float = 150.0,
+        limiter_enabled: bool = True,
+        lookahead_ms: float = 1.5,
+        backend: str = BACKEND_NUMPY,
+    ):
+        self.compressor = CompressorKernel(threshold_db, makeup_gain_db, ratio, attack_ms, release_ms)
+        self.limiter = LookaheadLimiter(lookahead_ms=lookahead_ms)
+        self.limiter_enabled = limiter_enabled
+        self.active_limiter: LookaheadLimiter | None = None
+        self.backend = load_backend(backend)
+        self.fused = None
+        self.max_frames = 0
+        self._stage = np.zeros((0, 0), dtype=np.float32)
+
+    @property
+    def params(self) -> DynamicsParams:
+        return self.compressor.params
+
+    def configure(
+        self,
+        threshold_db: float,
+        makeup_gain_db: float,
+        ratio: float,
+        attack_ms: float | None = None,
+        release_ms: float | None = None,
+    ):
+        self.compressor.configure(threshold_db, makeup_gain_db, ratio, attack_ms, release_ms)
+
+    def configure_limiter(self, enabled: bool, lookahead_ms: float | None = None):
+        """리미터 설정은 다음 prepare()부터 적용된다(지연 길이가 바뀌기 때문)."""
+        self.limiter_enabled = enabled
+        if lookahead_ms is not None:
+            self.limiter.lookahead_ms = lookahead_ms
+
+    def clone(self) -> "ProcessingChain":
+        """같은 설정(파라미터 스냅샷, 리미터, 백엔드)의 새 체인. 필터 상태는 공유하지 않는다.
+
+        두 스트림을 잠깐 동시에 돌리는 출력 전환에서 스트림마다 체인을 따로 쓴다.
+        """
+        chain = ProcessingChain(
+            limiter_enabled=self.limiter_enabled,
+            lookahead_ms=self.limiter.lookahead_ms,
+            backend=self.backend,
+        )
+        chain.compressor.params = self.compressor.params
+        chain.limiter.release_ms = self.limiter.release_ms
+        chain.limiter.ceiling_db = self.limiter.ceiling_db
+        return chain
+
+    def set_backend(self, name: str) -> str:
+        """커널 백엔드는 다음 prepare()부터 적용된다. 실제로 고른 백엔드 이름을 돌려준다."""
+        self.backend = load_backend(name)
+        return self.backend
+
+    @property
+    def gain_reduction_db(self) -> float:
+        """가장 최근 샘플의 컴프레서 게인 리덕션(dB). 미터 표시용."""
+        if self.fused is not None:
+            return self.fused.gain_reduction_db
+        return self.compressor.gain_reduction_db
+
+    @property
+    def latency_frames(self) -> int:
+        if self.active_limiter is None:
+            return 0
+        return self.active_limiter.latency_frames
+
+    @property
+    def latency_ms(self) -> float:
+        if self.active_limiter is None:
+            return 0.0
+        return self.active_limiter.latency_ms
+
+    def prepare(self, max_frames: int, channels: int, samplerate: int):
+        self.max_frames = max_frames
+        self.compressor.prepare(max_frames, channels, samplerate)
+        self.active_limiter = self.limiter if self.limiter_enabled else None
+        if self.active_limiter is not None:
+            self.active_limiter.prepare(max_frames, channels, samplerate)
+        self._stage = np.zeros((max_frames, channels), dtype=np.float32)
+        if self.backend == BACKEND_NUMBA:
+            from dsp_numba import FusedChain
+
+            self.fused = FusedChain()
+            self.fused.prepare(channels, self.active_limiter)
+        else:
+            self.fused = None
+
+    def process(self, indata: np.ndarray, outdata: np.ndarray):
+        fused = self.fused
+        if fused is not None:
+            fused.process(self.compressor.params, indata, outdata)
+            return
+
+        limiter = self.active_limiter
+        if limiter is None:
+            self.compressor.process(indata, outdata)
+            np.clip(outdata, -1.0, 1.0, out=outdata)
+            return
+
+        frames = indata.shape[0]
+        if frames > self.max_frames or indata.shape[1] != self._stage.shape[1]:
+            self.max_frames = max(frames, self.max_frames)
+            self._stage = np.zeros((self.max_frames, indata.shape[1]), dtype=np.float32)
+        stage = self._stage if frames == self.max_frames else self._stage[:frames]
+        self.compressor.process(indata, stage)
+        limiter.process(stage, outdata)
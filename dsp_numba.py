@@ -0,0 +1,196 @@
+"""Numba로 컴파일한 단일 패스 처리 커널.
+
+compressor.py/limiter.py의 NumPy 구현이 기준이고, 이 모듈은 같은 곡선을 샘플
+루프 하나로 계산한다. 레벨 검출 → 컴프레서 엔벨로프 → 게인 → 리미터 룩어헤드
+→ 지연선 → 클립을 샘플마다 한 번에 처리하므로 블록당 임시 패스가 없다.
+시그니처를 명시해서 import 시점에 컴파일(또는 캐시 로드)을 끝내고, 그 밖의
+타입으로는 컴파일하지 않으므로 오디오 콜백에서 JIT이 일어나지 않는다.
+numba가 없으면 import가 실패하고 dsp_engine이 NumPy 백엔드로 돌아간다.
+"""
+
+import math
+
+import numba
+import numpy as np
+
+from compressor import DB_PER_NEPER, DynamicsParams, time_coefficient
+
+
+_INV_THRESHOLD = 0
+_REDUCTION_SLOPE = 1
+_MAKEUP_GAIN = 2
+_ATTACK_COEFF = 3
+_RELEASE_COEFF = 4
+_CEILING = 5
+_LIMITER_RELEASE_COEFF = 6
+_COEFF_SIZE = 7
+
+_COMPRESSOR_RELEASE = 0
+_COMPRESSOR_ATTACK = 1
+_LIMITER_RELEASE = 2
+_WINDOW_MAX = 3
+_WINDOW_SUM = 4
+_STATE_SIZE = 5
+
+_DELAY_POS = 0
+_RING_POS = 1
+
+_SIGNATURE = numba.void(
+    numba.float32[:, :],
+    numba.float32[:, :],
+    numba.float64[:],
+    numba.float64[:],
+    numba.float32[:, :],
+    numba.float64[:],
+    numba.float64[:],
+    numba.int64[:],
+    numba.boolean,
+)
+
+
+@numba.njit(_SIGNATURE, cache=True, nogil=True)
+def process_block(indata, outdata, coeffs, state, delay, required, hold, positions, limiter):
+    frames = indata.shape[0]
+    channels = indata.shape[1]
+    inv_threshold = coeffs[_INV_THRESHOLD]
+    reduction_slope = coeffs[_REDUCTION_SLOPE]
+    makeup_gain = coeffs[_MAKEUP_GAIN]
+    attack_coeff = coeffs[_ATTACK_COEFF]
+    release_coeff = coeffs[_RELEASE_COEFF]
+    ceiling = coeffs[_CEILING]
+    limiter_release_coeff = coeffs[_LIMITER_RELEASE_COEFF]
+    release = state[_COMPRESSOR_RELEASE]
+    attack = state[_COMPRESSOR_ATTACK]
+    limiter_release = state[_LIMITER_RELEASE]
+    held = state[_WINDOW_MAX]
+    total = state[_WINDOW_SUM]
+    lookahead = delay.shape[0]
+    window = required.shape[0]
+    delay_pos = positions[_DELAY_POS]
+    ring_pos = positions[_RING_POS]
+
+    for n in range(frames):
+        level = np.float32(0.0)
+        for c in range(channels):
+            level = max(level, abs(indata[n, c]))
+        reduction = max(math.log(max(np.float64(level), 1e-9) * inv_threshold) * reduction_slope, 0.0)
+        release = max(reduction, release * release_coeff)
+        attack = attack * attack_coeff + (1.0 - attack_coeff) * release
+        gain = np.float32(makeup_gain * math.exp(-attack))
+
+        if not limiter:
+            for c in range(channels):
+                outdata[n, c] = min(max(indata[n, c] * gain, np.float32(-1.0)), np.float32(1.0))
+            continue
+
+        peak = np.float32(0.0)
+        for c in range(channels):
+            peak = max(peak, abs(indata[n, c] * gain))
+        # 윈도우 최대값과 합은 링에서 빠지는 값만 보고 갱신한다. 최대값이 빠질 때만
+        # 다시 훑고, 합은 링을 한 바퀴 돌 때마다 새로 더해서 오차가 쌓이지 않게 한다.
+        incoming = 1.0 - ceiling / max(np.float64(peak), ceiling)
+        outgoing = required[ring_pos]
+        required[ring_pos] = incoming
+        if incoming >= held:
+            held = incoming
+        elif outgoing >= held:
+            held = 0.0
+            for k in range(window):
+                held = max(held, required[k])
+        total += held - hold[ring_pos]
+        hold[ring_pos] = held
+        ring_pos += 1
+        if ring_pos == window:
+            ring_pos = 0
+            total = 0.0
+            for k in range(window):
+                total += hold[k]
+
+        limiter_release = max(total / window, limiter_release * limiter_release_coeff)
+        limiter_gain = np.float32(1.0 - limiter_release)
+        for c in range(channels):
+            staged = indata[n, c] * gain
+            delayed = delay[delay_pos, c]
+            delay[delay_pos, c] = staged
+            outdata[n, c] = min(max(delayed * limiter_gain, np.float32(-1.0)), np.float32(1.0))
+        delay_pos += 1
+        if delay_pos == lookahead:
+            delay_pos = 0
+
+    state[_COMPRESSOR_RELEASE] = release
+    state[_COMPRESSOR_ATTACK] = attack
+    state[_LIMITER_RELEASE] = limiter_release
+    state[_WINDOW_MAX] = held
+    state[_WINDOW_SUM] = total
+    positions[_DELAY_POS] = delay_pos
+    positions[_RING_POS] = ring_pos
+
+
+class FusedChain:
+    """ProcessingChain의 numba 백엔드. 필터 상태와 룩어헤드 링 버퍼를 직접 가진다.
+
+    리미터 설정(룩어헤드, ceiling, 릴리즈)은 prepare()된 LookaheadLimiter에서 읽고,
+    컴프레서 파라미터는 블록마다 넘겨받은 DynamicsParams가 바뀌었을 때만 다시 채운다.
+    """
+
+    def __init__(self):
+        self._coeffs = np.zeros(_COEFF_SIZE, dtype=np.float64)
+        self._state = np.zeros(_STATE_SIZE, dtype=np.float64)
+        self._positions = np.zeros(2, dtype=np.int64)
+        self._params: DynamicsParams | None = None
+        self.limiter = False
+        self.channels = 0
+        self._allocate(1, 0)
+
+    @property
+    def gain_reduction_db(self) -> float:
+        return float(self._state[_COMPRESSOR_ATTACK]) * DB_PER_NEPER
+
+    def prepare(self, channels: int, limiter=None):
+        """limiter가 None이면 리미터 없이 클립만 한다."""
+        self.limiter = limiter is not None
+        if limiter is not None:
+            self._coeffs[_CEILING] = limiter.ceiling
+            self._coeffs[_LIMITER_RELEASE_COEFF] = time_coefficient(limiter.release_ms, limiter.samplerate)
+            self._allocate(limiter.lookahead, channels)
+        else:
+            self._allocate(1, channels)
+        self._params = None
+        self.reset()
+
+    def reset(self):
+        self._state.fill(0.0)
+        self._positions.fill(0)
+        self._delay.fill(0.0)
+        self._required.fill(0.0)
+        self._hold.fill(0.0)
+
+    def _allocate(self, lookahead: int, channels: int):
+        self.channels = channels
+        self._delay = np.zeros((lookahead, channels), dtype=np.float32)
+        self._required = np.zeros(lookahead + 1, dtype=np.float64)
+        self._hold = np.zeros(lookahead + 1, dtype=np.float64)
+
+    def process(self, params: DynamicsParams, indata: np.ndarray, outdata: np.ndarray):
+        if params is not self._params:
+            coeffs = self._coeffs
+            coeffs[_INV_THRESHOLD] = params.inv_threshold
+            coeffs[_REDUCTION_SLOPE] = params.reduction_slope
+            coeffs[_MAKEUP_GAIN] = params.makeup_gain
+            coeffs[_ATTACK_COEFF] = params.attack_coeff
+            coeffs[_RELEASE_COEFF] = params.release_coeff
+            self._params = params
+        if indata.shape[1] != self.channels:
+            self._allocate(self._delay.shape[0], indata.shape[1])
+            self.reset()
+        process_block(
+            indata,
+            outdata,
+            self._coeffs,
+            self._state,
+            self._delay,
+            self._required,
+            self._hold,
+            self._positions,
+            self.limiter,
+        )
@@ -0,0 +1,19 @@
+"""앱과 오디오 엔진이 같이 쓰는 이름과 기본값.
+
+메뉴바 앱과 데몬 클라이언트는 numpy를 불러오지 않도록 엔진 모듈 대신 여기서 가져온다.
+"""
+
+from pathlib import Path
+
+
+BACKEND_NUMPY = "numpy"
+BACKEND_NUMBA = "numba"
+BACKEND_AUTO = "auto"
+KERNEL_BACKENDS = (BACKEND_NUMPY, BACKEND_NUMBA)
+
+DEFAULT_CROSSFADE_MS = 30.0
+
+
+def default_socket_path() -> Path:
+    """night_daemon 제어 소켓."""
+    return Path.home() / ".night_mode.sock"
@@ -0,0 +1,613 @@
+"""UI 없이 도는 야간 모드 엔진.
+
+DeviceManager, AutoSelector, StreamController(그 뒤의 AudioRouter/오디오 워커),
+프로필과 설정 저장을 묶는다. 메뉴바 앱(night_mode_audio)과 헤드리스 데몬
+(night_daemon)이 같은 EngineService를 쓰고, 화면에 보이는 것은 각자 맡는다.
+
+메서드와 리스너는 전부 한 스레드(메뉴바 앱은 메인 스레드, 데몬은 asyncio 루프
+스레드)에서 불린다. call_after/call_later가 그 스레드에 일을 넣는 함수다.
+"""
+
+import fcntl
+import logging
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import portaudio_index
+from auto_selector import AutoSelector
+from config_store import ConfigStore
+from device_manager import DEFAULT_SETTLE_SECONDS, DeviceChanges, DeviceInfo, DeviceManager, OutputSnapshot
+from engine_defaults import BACKEND_AUTO, DEFAULT_CROSSFADE_MS
+from latency_tuner import (
+    LATENCY_PROFILE_AUTO,
+    LATENCY_PROFILE_BALANCED,
+    LATENCY_PROFILES,
+    LatencySetting,
+    LatencyTuner,
+)
+from profiles import ProcessingProfile, ProfileStore
+from startup import StartupTimer
+from stream_controller import STATE_RUNNING, StreamController, StreamResult
+from stream_stats import StatsSnapshot
+
+
+OUTPUT_MODE_AUTO = "auto"
+OUTPUT_MODE_MANUAL = "manual"
+OUTPUT_MODES = (OUTPUT_MODE_AUTO, OUTPUT_MODE_MANUAL)
+LATENCY_PROFILE_NAMES = (*LATENCY_PROFILES, LATENCY_PROFILE_AUTO)
+STATS_POLL_INTERVAL = 2.0
+STANDBY_REFRESH_INTERVAL = 30.0
+DEFAULT_STANDBY_COUNT = 1
+# 장치가 늘수록 커지는 기록. 설정 파일과 따로 저장한다.
+HISTORY_CONFIG_KEYS = (
+    "physical_output_history",
+    "last_success_uid",
+    "latency_by_uid",
+    "output_reliability",
+    "output_profiles",
+)
+
+# 리스너에 넘기는 변경 종류.
+EVENT_STATE = "state"
+EVENT_OUTPUT = "output"
+EVENT_PROFILE = "profile"
+EVENT_NO_OUTPUT = "no_output"
+
+
+def default_config_path() -> Path:
+    return Path.home() / ".night_mode_config.json"
+
+
+def default_history_path() -> Path:
+    return Path.home() / ".night_mode_devices.json"
+
+
+def default_lock_path() -> Path:
+    return Path.home() / ".night_mode_engine.lock"
+
+
+class EngineLockedError(RuntimeError):
+    pass
+
+
+def acquire_engine_lock(path: Path) -> int:
+    """엔진을 하나만 돌리도록 잠금 파일을 잡고 그 fd를 돌려준다.
+
+    메뉴바 앱과 데몬은 같은 설정/기록 파일과 장치를 쓰므로 동시에 돌면 안 된다.
+    flock이라 프로세스가 죽으면 OS가 풀어 준다. 이미 잡혀 있으면 EngineLockedError.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise EngineLockedError(f"다른 야간 모드 엔진(메뉴바 앱 또는 데몬)이 이미 실행 중: {path}") from None
+    return fd
+
+
+class EngineService:
+    """출력 선택, 스트림 시작/정지, 설정 변경과 저장.
+
+    start()가 엔진 준비(컨트롤러 스레드)와 장치 열거(call_after 차례)를 시작하고,
+    둘 다 끝나면 지난번에 켜져 있었을 때 처리를 다시 시작한다. 상태가 바뀌면
+    add_listener로 등록한 함수를 EVENT_* 하나와 함께 부른다. 잠금 파일(lock_path)을
+    잡으므로 메뉴바 앱이든 데몬이든 한 번에 하나만 만들 수 있다.
+
+    portaudio_factory는 sounddevice 대신 쓸 PortAudio를 만드는 함수로, 이 프로세스와
+    오디오 워커 프로세스에서 한 번씩 불려 각자 자기 장치 목록을 갖는다(가짜 오디오용).
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        config_path: Path | None = None,
+        history_path: Path | None = None,
+        log_file: str | None = None,
+        startup: StartupTimer | None = None,
+        audio_worker: bool | None = None,
+        hal=None,
+        call_after: Callable | None = None,
+        call_later: Callable | None = None,
+        lock_path: Path | None = None,
+        portaudio_factory: Callable | None = None,
+    ):
+        # 설정을 읽거나 장치를 건드리기 전에 잡는다.
+        self._lock_fd = acquire_engine_lock(lock_path or default_lock_path())
+        self.portaudio_factory = portaudio_factory
+        if portaudio_factory is not None:
+            portaudio_index.use_backend(portaudio_factory())
+        if call_after is None or call_later is None:
+            from PyObjCTools import AppHelper
+
+            call_after = call_after or AppHelper.callAfter
+            call_later = call_later or AppHelper.callLater
+        self.logger = logger
+        self.log_file = log_file
+        self.startup = startup or StartupTimer(logger)
+        self.call_after = call_after
+        self._listeners: list[Callable[[str], None]] = []
+
+        self.profile = ProcessingProfile()
+        self.limiter_enabled = True
+        self.limiter_lookahead_ms = 1.5
+        self.dsp_backend = BACKEND_AUTO
+        self.crossfade_ms = DEFAULT_CROSSFADE_MS
+        self.standby_count = DEFAULT_STANDBY_COUNT
+        self.standby_warm = False
+        self._last_standby_refresh = 0.0
+        self.latency_profile = LATENCY_PROFILE_BALANCED
+        self.latency_by_uid = {}
+        self.latency_tuner = LatencyTuner()
+        self.latency_tuner_uid = None
+        self._skip_latency_windows = 0
+        self.stats_log_interval = 60.0
+        self.device_settle_seconds = DEFAULT_SETTLE_SECONDS
+        self._last_stats_log = 0.0
+        self.last_stats: StatsSnapshot | None = None
+        self.output_mode = OUTPUT_MODE_AUTO
+        self.manual_output_uid = None
+        self.should_auto_start_processing = False
+        self.is_running = False
+        self.current_output_uid = None
+        self.pending_output_uid = None
+        self._stream_serial = 0
+        self._stream_target = None
+        self._profile_lookup_ms = 0.0
+        self.previous_auto_uids = set()
+        self.audio_router = None
+        self._devices_ready = False
+        self._startup_done = False
+        self._first_audio_marked = False
+
+        self.config_store = ConfigStore(
+            config_path or default_config_path(),
+            history_path or default_history_path(),
+            HISTORY_CONFIG_KEYS,
+            logger,
+        )
+        self.load_config()
+        self.logger.info(f"Config loaded: {sorted(self.config_data)}")
+        self.audio_worker = self.config_data.get("audio_worker", True) if audio_worker is None else audio_worker
+        self.profiles = ProfileStore(self.profile, self.config_data.get("output_profiles"))
+
+        recent_connected = self.config_data.get("physical_output_history", [])
+        last_success_uid = self.config_data.get("last_success_uid")
+        self.auto_selector = AutoSelector(
+            recent_connected=recent_connected,
+            last_success_uid=last_success_uid,
+            reliability=self.config_data.get("output_reliability"),
+        )
+        self.startup.mark("config")
+
+        self.device_manager = DeviceManager(
+            logger,
+            on_change=self.handle_devices_changed,
+            settle_seconds=self.device_settle_seconds,
+            hal=hal,
+            call_after=call_after,
+            call_later=call_later,
+        )
+        self.stream_controller = StreamController(
+            None,
+            self.device_manager.get_sd_index,
+            logger,
+            on_result=self.handle_stream_result,
+            post=call_after,
+        )
+
+    @property
+    def config_data(self):
+        return getattr(self, "_config_data", {})
+
+    @property
+    def ready(self) -> bool:
+        return self._startup_done
+
+    def add_listener(self, callback: Callable[[str], None]):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def notify(self, event: str):
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception:
+                self.logger.exception(f"엔진 리스너 실패: {event}")
+
+    def start(self):
+        # 엔진(numpy, 오디오 워커, PortAudio)은 컨트롤러 스레드에서 만든다. 아래 설정 호출은 그 뒤에 돈다.
+        self.stream_controller.prepare(self.create_audio_engine, self.handle_engine_ready)
+        self.stream_controller.call("configure", self.profile.threshold_db, self.profile.makeup_gain_db, self.profile.ratio)
+        self.stream_controller.call("configure_limiter", self.limiter_enabled, self.limiter_lookahead_ms)
+        self.stream_controller.call("set_kernel_backend", self.dsp_backend)
+        self.stream_controller.call("configure_switch", self.crossfade_ms)
+        self.stream_controller.call("configure_standby", self.standby_count, self.standby_warm)
+        self.call_after(self.enumerate_devices)
+
+    def enumerate_devices(self):
+        started = time.perf_counter()
+        self.device_manager.start()
+        self.handle_devices_changed()
+        self.startup.mark("devices", since=started)
+        self._devices_ready = True
+        self.finish_startup()
+
+    def create_audio_engine(self):
+        """컨트롤러 스레드에서 돈다. 기본은 별도 프로세스 워커, 못 띄우면 프로세스 안 AudioRouter.
+
+        엔진 모듈(numpy)과 PortAudio는 여기서 처음 불러오고 warm_up으로 장치 목록까지
+        만들어 두므로 첫 스트림 열기가 그 비용을 치르지 않는다.
+        """
+        started = time.perf_counter()
+        engine = None
+        if self.audio_worker:
+            from audio_worker import AudioWorkerClient
+
+            client = AudioWorkerClient(self.logger, self.log_file, self.portaudio_factory)
+            if client.launch():
+                engine = client
+            else:
+                self.logger.error("오디오 워커 시작 실패 - 프로세스 내 오디오 엔진 사용")
+        if engine is None:
+            from audio_router import AudioRouter
+
+            engine = AudioRouter(self.logger)
+        self.startup.mark("engine imports", since=started)
+        engine.warm_up()
+        try:
+            # 이 프로세스도 UID → sounddevice 인덱스 변환에 PortAudio를 쓴다.
+            portaudio_index.snapshot()
+        except Exception:
+            self.logger.exception("PortAudio 장치 목록 준비 실패")
+        self.startup.mark("audio engine", since=started)
+        return engine
+
+    def handle_engine_ready(self, engine):
+        if engine is None:
+            self.logger.error("오디오 엔진을 준비하지 못함")
+            return
+        self.audio_router = engine
+        self.finish_startup()
+
+    def finish_startup(self):
+        """장치 목록과 오디오 엔진이 둘 다 준비되면 한 번 돈다. 자동 시작은 이 신호로 한다."""
+        if self._startup_done or not self._devices_ready or self.audio_router is None:
+            return
+        self._startup_done = True
+        self.startup.mark("ready")
+        if self.should_auto_start_processing and not self.is_running:
+            self.logger.info("시작 준비 완료 - 자동 시작")
+            self.start_processing()
+
+    def load_config(self):
+        self._config_data = self.config_store.load()
+        if not self._config_data:
+            return
+
+        self.manual_output_uid = self.config_data.get("manual_output_uid")
+        self.output_mode = self.config_data.get("output_mode", OUTPUT_MODE_AUTO)
+        self.should_auto_start_processing = self.config_data.get("is_running", False)
+        try:
+            self.profile = ProcessingProfile(
+                threshold_db=float(self.config_data.get("threshold_db", -20.0)),
+                makeup_gain_db=float(self.config_data.get("makeup_gain_db", 10.0)),
+                ratio=float(self.config_data.get("ratio", 4.0)),
+            )
+        except (TypeError, ValueError) as exc:
+            self.logger.warning(f"설정 파일의 기본 프로필 무시: {exc}")
+            self.profile = ProcessingProfile()
+        self.limiter_enabled = self.config_data.get("limiter_enabled", True)
+        self.limiter_lookahead_ms = self.config_data.get("limiter_lookahead_ms", 1.5)
+        self.dsp_backend = self.config_data.get("dsp_backend", BACKEND_AUTO)
+        self.crossfade_ms = self.config_data.get("crossfade_ms", DEFAULT_CROSSFADE_MS)
+        self.standby_count = self.config_data.get("standby_count", DEFAULT_STANDBY_COUNT)
+        self.standby_warm = self.config_data.get("standby_warm", False)
+        self.latency_profile = self.config_data.get("latency_profile", LATENCY_PROFILE_BALANCED)
+        if self.latency_profile not in LATENCY_PROFILE_NAMES:
+            self.latency_profile = LATENCY_PROFILE_BALANCED
+        self.latency_by_uid = dict(self.config_data.get("latency_by_uid", {}))
+        self.stats_log_interval = self.config_data.get("stats_log_interval", 60.0)
+        self.device_settle_seconds = self.config_data.get("device_settle_seconds", DEFAULT_SETTLE_SECONDS)
+
+    def save_config(self):
+        recent_connected, last_success_uid = self.auto_selector.export_state()
+        config = {
+            "manual_output_uid": self.manual_output_uid,
+            "output_mode": self.output_mode,
+            "is_running": self.is_running,
+            "audio_worker": self.config_data.get("audio_worker", True),
+            "threshold_db": self.profiles.default.threshold_db,
+            "makeup_gain_db": self.profiles.default.makeup_gain_db,
+            "ratio": self.profiles.default.ratio,
+            "limiter_enabled": self.limiter_enabled,
+            "limiter_lookahead_ms": self.limiter_lookahead_ms,
+            "dsp_backend": self.dsp_backend,
+            "crossfade_ms": self.crossfade_ms,
+            "standby_count": self.standby_count,
+            "standby_warm": self.standby_warm,
+            "latency_profile": self.latency_profile,
+            "latency_by_uid": dict(self.latency_by_uid),
+            "stats_log_interval": self.stats_log_interval,
+            "device_settle_seconds": self.device_settle_seconds,
+            "physical_output_history": recent_connected,
+            "last_success_uid": last_success_uid,
+            "output_reliability": self.auto_selector.export_reliability(),
+            "output_profiles": self.profiles.export(),
+        }
+        # 쓰기는 저장소 스레드가 변경을 모아서 한다.
+        self.config_store.update(config)
+        self._config_data = config
+
+    def handle_devices_changed(self, changes: DeviceChanges | None = None):
+        """CoreAudio 이벤트 묶음마다 한 번 불린다. changes가 None이면 시작 시 동기화."""
+        if changes is not None:
+            self.logger.info(
+                f"장치 변경: 추가={sorted(changes.added)} 제거={sorted(changes.removed)} 변경={sorted(changes.changed)}"
+            )
+        snapshot = self.device_manager.output_snapshot()
+        self.previous_auto_uids = self.auto_selector.update_devices(snapshot.devices, self.previous_auto_uids)
+        self.notify(EVENT_OUTPUT)
+
+        if self.output_mode == OUTPUT_MODE_AUTO and self.is_running:
+            target = self.resolve_target_device()
+            if target is None:
+                self.stop_processing()
+            elif target.uid not in (self.current_output_uid, self.pending_output_uid):
+                self.start_processing(restart=True)
+
+        if self.output_mode == OUTPUT_MODE_MANUAL and self.is_running:
+            manual_device = self.device_manager.get_device(self.manual_output_uid)
+            if manual_device is None:
+                self.stop_processing()
+
+        if changes is not None:
+            self.update_standby()
+
+    def refresh_devices(self):
+        self.handle_devices_changed(self.device_manager.refresh(full=True))
+
+    def output_snapshot(self) -> OutputSnapshot:
+        return self.device_manager.output_snapshot()
+
+    def resolve_auto_device(self) -> DeviceInfo | None:
+        """재생 중인 출력은 기록이 나빠져도 그대로 둔다. 등급은 대체 장치를 고를 때만 쓴다."""
+        snapshot = self.device_manager.output_snapshot()
+        current_uid = self.current_output_uid if self.is_running else None
+        return self.auto_selector.select(snapshot.devices, snapshot.version, current_uid=current_uid)
+
+    def resolve_target_device(self) -> DeviceInfo | None:
+        if self.output_mode == OUTPUT_MODE_AUTO:
+            return self.resolve_auto_device()
+        return self.device_manager.get_device(self.manual_output_uid)
+
+    def start_processing(self, restart: bool = False) -> bool:
+        """대상 장치를 정해 스트림 컨트롤러에 넘긴다. 결과는 handle_stream_result로 돌아온다."""
+        self.logger.info(f"start_processing called restart={restart} is_running={self.is_running} mode={self.output_mode}")
+        if not self._startup_done:
+            self.logger.info("오디오 엔진/장치 준비 전 - 준비되면 시작")
+            self.should_auto_start_processing = True
+            return False
+        target = self.resolve_target_device()
+        if target is None:
+            self.logger.error("No target device resolved")
+            self.notify(EVENT_NO_OUTPUT)
+            self.stop_processing()
+            return False
+        started = time.perf_counter()
+        profile = self.profiles.get(target.uid)
+        self._profile_lookup_ms = (time.perf_counter() - started) * 1e3
+        self.show_profile(profile)
+        self._stream_serial = self.stream_controller.open(
+            target.uid,
+            target.name,
+            self.latency_setting_for(target.uid),
+            restart=restart or self.is_running,
+            profile=profile,
+        )
+        self.pending_output_uid = target.uid
+        self._stream_target = target
+        return True
+
+    def handle_stream_result(self, result: StreamResult):
+        if result.request.serial != self._stream_serial:
+            # 뒤에 낸 요청이 있으면 중간 결과는 반영하지 않는다.
+            return
+        self.pending_output_uid = None
+        if result.request.is_stop:
+            return
+
+        target = self._stream_target
+        opened = result.success and result.output_name == target.name
+        self.auto_selector.note_open(target.uid, result.elapsed, opened, result.recovered)
+        if not result.success:
+            if result.state == STATE_RUNNING:
+                self.logger.debug("스트림 재시작 실패 - 기존 서비스 상태 유지")
+                self.show_profile(self.profiles.get(self.current_output_uid))
+                return
+            self.is_running = False
+            self.current_output_uid = None
+            self.notify(EVENT_STATE)
+            self.save_config()
+            return
+
+        previous_output_uid = self.current_output_uid
+        self.is_running = True
+        self._skip_latency_windows = 1
+        if previous_output_uid is not None and not opened:
+            self.auto_selector.note_success(previous_output_uid)
+            self.show_profile(self.profiles.get(previous_output_uid))
+            self.logger.debug(
+                f"기존 출력 복구 유지: previous_uid={previous_output_uid} "
+                f"requested_uid={target.uid} actual_sd_index={result.output_index}"
+            )
+        else:
+            self.current_output_uid = target.uid
+            self.auto_selector.note_success(target.uid)
+        self.notify(EVENT_STATE)
+        self.save_config()
+        if not self._first_audio_marked:
+            self._first_audio_marked = True
+            self.startup.mark("first audio")
+        gap = f" 전환 무음 {result.switch_gap_ms:.1f}ms" if result.switch_gap_ms is not None else ""
+        profile_ms = f" 프로필 조회 {self._profile_lookup_ms:.3f}ms"
+        if result.profile_ms is not None:
+            profile_ms += f" 적용 {result.profile_ms:.3f}ms"
+        self.logger.info(
+            f"처리 시작: uid={target.uid} name={target.name} sd_index={result.output_index} "
+            f"({result.elapsed * 1e3:.0f}ms){gap}{profile_ms}"
+        )
+        self.update_standby()
+
+    def update_standby(self):
+        """AutoSelector가 다음에 고를 장치를 엔진 대기 풀에 미리 준비시킨다."""
+        self._last_standby_refresh = time.monotonic()
+        if not self.is_running or self.pending_output_uid is not None:
+            return
+        candidates = []
+        if self.output_mode == OUTPUT_MODE_AUTO and self.standby_count > 0:
+            devices = self.device_manager.list_output_devices()
+            candidates = [
+                (device.uid, device.name)
+                for device in self.auto_selector.standby_candidates(devices, self.current_output_uid, self.standby_count)
+            ]
+        self.stream_controller.standby(candidates)
+
+    def latency_setting_for(self, uid: str) -> LatencySetting:
+        if self.latency_profile != LATENCY_PROFILE_AUTO:
+            return LATENCY_PROFILES[self.latency_profile]
+        if uid != self.latency_tuner_uid:
+            self.latency_tuner.reset(LatencySetting.from_config(self.latency_by_uid.get(uid)))
+            self.latency_tuner_uid = uid
+        return self.latency_tuner.setting
+
+    def poll_stats(self) -> StatsSnapshot | None:
+        """STATS_POLL_INTERVAL마다 부른다. 처리 중이면 새 통계(last_stats에도 남는다), 아니면 None."""
+        if self.audio_router is None or self.stream_controller.busy:
+            # 컨트롤러가 엔진을 쓰는 동안에는 워커 호출이 그 작업을 기다리게 되므로 건너뛴다.
+            return None
+        if not self.is_running:
+            # 멈춘 동안의 창은 버릴 필요가 없다. 새 스트림이 시작되면 창 기준이 초기화된다.
+            self.last_stats = None
+            return None
+
+        snapshot = self.last_stats = self.audio_router.stats_snapshot()
+        now = time.monotonic()
+        if self.stats_log_interval and now - self._last_stats_log >= self.stats_log_interval:
+            self._last_stats_log = now
+            self.logger.info(
+                f"스트림 통계: blocks={snapshot.blocks} xruns={snapshot.xruns} "
+                f"mean={snapshot.mean_duration * 1e3:.3f}ms max={snapshot.max_duration * 1e3:.3f}ms "
+                f"deadline={snapshot.deadline * 1e3:.2f}ms "
+                f"dac_gap={snapshot.dac_gap_last * 1e3:.2f}ms (max {snapshot.dac_gap_max * 1e3:.2f}ms) "
+                f"cpu_load={snapshot.cpu_load} histogram={list(snapshot.histogram)}"
+            )
+        self.poll_latency_tuner()
+        if now - self._last_standby_refresh >= STANDBY_REFRESH_INTERVAL:
+            # 대기 풀은 압박 판정을 다시 하므로 주기적으로 맞춘다.
+            self.update_standby()
+        return snapshot
+
+    def poll_latency_tuner(self):
+        window = self.audio_router.take_callback_window()
+        if not self.is_running or self.current_output_uid is None:
+            return
+        if self._skip_latency_windows > 0:
+            # 스트림을 막 연 직후 구간은 초기 언더런이 섞여 있어 판단에서 뺀다.
+            self._skip_latency_windows -= 1
+            return
+        self.auto_selector.note_xruns(self.current_output_uid, window.blocks, window.xruns)
+        if self.latency_profile != LATENCY_PROFILE_AUTO or self.current_output_uid != self.latency_tuner_uid:
+            return
+
+        setting = self.latency_tuner.evaluate(window)
+        if setting is None:
+            return
+        self.logger.info(
+            f"지연 자동 조정: uid={self.current_output_uid} blocks={window.blocks} "
+            f"xruns={window.xruns} load={window.load:.2f} → "
+            f"blocksize={setting.blocksize} latency={setting.latency}"
+        )
+        self.latency_by_uid[self.current_output_uid] = setting.to_config()
+        self.start_processing(restart=True)
+        self.save_config()
+
+    def stop_processing(self):
+        self._stream_serial = self.stream_controller.close()
+        self.pending_output_uid = None
+        self.is_running = False
+        self.should_auto_start_processing = False
+        self.current_output_uid = None
+        self.notify(EVENT_STATE)
+        self.save_config()
+
+    def toggle_processing(self):
+        if self.is_running:
+            self.stop_processing()
+        else:
+            self.start_processing()
+
+    def set_latency_profile(self, profile: str):
+        if profile not in LATENCY_PROFILE_NAMES:
+            raise ValueError(f"알 수 없는 지연 모드: {profile}")
+        self.latency_profile = profile
+        self.latency_tuner_uid = None
+        if self.is_running:
+            self.start_processing(restart=True)
+        self.save_config()
+
+    def set_output_mode(self, mode: str):
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"알 수 없는 출력 모드: {mode}")
+        self.output_mode = mode
+        self.notify(EVENT_OUTPUT)
+        if self.is_running:
+            self.start_processing(restart=True)
+        self.save_config()
+
+    def select_output(self, uid: str):
+        """uid 장치로 수동 출력한다. 자동으로 돌아가려면 set_output_mode(OUTPUT_MODE_AUTO)."""
+        self.manual_output_uid = uid
+        self.set_output_mode(OUTPUT_MODE_MANUAL)
+
+    def profile_uid(self) -> str | None:
+        """고친 값이 들어갈 장치. 정지 중이면 다음에 열 장치, 장치가 없으면 None(기본 프로필)."""
+        if self.is_running:
+            return self.current_output_uid
+        target = self.resolve_target_device()
+        return target.uid if target is not None else None
+
+    def show_profile(self, profile: ProcessingProfile):
+        self.profile = profile
+        self.notify(EVENT_PROFILE)
+
+    def update_profile(self, **changes) -> ProcessingProfile:
+        """지금 장치의 프로필을 고치고, 나오고 있는 출력에는 바로 스냅샷으로 넣는다."""
+        self.show_profile(self.profiles.update(self.profile_uid(), **changes))
+        self.stream_controller.call("configure", self.profile.threshold_db, self.profile.makeup_gain_db, self.profile.ratio)
+        self.save_config()
+        return self.profile
+
+    def set_limiter(self, enabled: bool):
+        self.limiter_enabled = enabled
+        self.stream_controller.call("configure_limiter", self.limiter_enabled, self.limiter_lookahead_ms)
+        if self.is_running:
+            self.start_processing(restart=True)
+        self.save_config()
+
+    def shutdown(self):
+        if self.audio_router is not None:
+            self.stream_controller.close()
+        self.stream_controller.shutdown()
+        if self.audio_router is not None:
+            from audio_worker import AudioWorkerClient
+
+            if isinstance(self.audio_router, AudioWorkerClient):
+                self.audio_router.shutdown()
+        self.device_manager.stop()
+        self.config_store.close()
+        os.close(self._lock_fd)
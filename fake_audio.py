@@ -0,0 +1,608 @@
+"""macOS 밖에서 장치 전환 경로를 돌리기 위한 가짜 HAL/PortAudio/런루프.
+
+FakeHAL은 coreaudio_hal.CoreAudioHAL과, FakePortAudio는 sounddevice 모듈과 같은
+인터페이스를 흉내 낸다. 장치 추가/제거/속성 변경을 스크립트로 일으키고, 호출마다
+지연을 넣거나 스트림 열기를 실패시킬 수 있다. 호출 횟수는 전부 센다.
+RunLoop는 AppHelper.callAfter/callLater 대신 쓰는 단일 스레드 이벤트 루프다.
+오디오 워커처럼 다른 프로세스가 PortAudio를 쓸 때는 FakeHAL.share()로 장치 목록을
+SharedFakeAudio에 내보내고, 그 프로세스에서 FakePortAudio.shared()로 자기
+PortAudio를 만든다.
+FakeCoreAudio/FakeCoreFoundation은 FakeHAL을 C 함수 모양으로 감싸서
+CoreAudioHAL의 ctypes 코드까지 그대로 돌려 볼 수 있게 한다.
+
+    hal = FakeHAL()
+    portaudio = FakePortAudio(hal)
+    portaudio_index.use_backend(portaudio)
+    manager = DeviceManager(logger, hal=hal, call_after=loop.call_after, call_later=loop.call_later)
+
+    shared = SharedFakeAudio.create(multiprocessing.Manager())
+    hal.share(shared)
+    worker_portaudio = functools.partial(FakePortAudio.shared, shared)  # 워커 프로세스에서 부른다
+"""
+
+import ctypes
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import astuple, dataclass
+
+import numpy as np
+
+from coreaudio_hal import (
+    AudioObjectPropertyAddress,
+    fourcc,
+    kAudioDevicePropertyDeviceIsAlive,
+    kAudioDevicePropertyDeviceUID,
+    kAudioDevicePropertyStreams,
+    kAudioDevicePropertyTransportType,
+    kAudioDeviceTransportTypeBuiltIn,
+    kAudioDeviceTransportTypeVirtual,
+    kAudioHardwarePropertyDevices,
+    kAudioHardwarePropertyRunLoop,
+    kAudioObjectPropertyManufacturer,
+    kAudioObjectPropertyName,
+    kAudioObjectSystemObject,
+)
+
+
+TRANSPORT_USB = fourcc("usb ")
+TRANSPORT_BLUETOOTH = fourcc("blue")
+HAL_ERROR = fourcc("!obj")
+FIRST_OBJECT_ID = 100
+
+
+class FakePortAudioError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class FakeDevice:
+    object_id: int
+    uid: str
+    name: str
+    manufacturer: str = ""
+    transport_type: int = TRANSPORT_USB
+    is_alive: bool = True
+    input_channels: int = 0
+    output_channels: int = 2
+    samplerate: int = 48000
+    # 다음 N번의 스트림 열기를 실패시킨다.
+    open_failures: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class SharedFakeAudio:
+    """FakeHAL과 다른 프로세스의 FakePortAudio가 함께 보는 상태. multiprocessing 관리자 프록시라 spawn 프로세스에 넘길 수 있다.
+
+    devices는 "devices" 키 하나에 FakeDevice 필드 튜플들을 통째로 바꿔 넣어 읽는 쪽이
+    중간 상태를 보지 않는다. open_failures는 장치 이름별 남은 열기 실패 수, calls와
+    audible(이름, 첫 소리 시각)은 모든 프로세스의 FakePortAudio가 함께 쓴다.
+    """
+
+    devices: object
+    open_failures: object
+    calls: object
+    audible: object
+    lock: object
+
+    @classmethod
+    def create(cls, manager) -> "SharedFakeAudio":
+        return cls(manager.dict(), manager.dict(), manager.dict(), manager.list(), manager.Lock())
+
+
+class FakeHAL:
+    """스크립트로 조작하는 CoreAudio HAL.
+
+    리스너는 변경을 일으킨 스레드에서 바로 불린다(실제 HAL의 리스너 스레드 역할).
+    call_delay는 속성 읽기 한 번마다 잠드는 시간이다.
+    """
+
+    def __init__(self, call_delay: float = 0.0):
+        self.call_delay = call_delay
+        self.calls: Counter[str] = Counter()
+        self.devices: dict[int, FakeDevice] = {}
+        self.list_failures = 0
+        self.shared: SharedFakeAudio | None = None
+        self._ids = itertools.count(FIRST_OBJECT_ID)
+        self._lock = threading.Lock()
+        self._listeners: dict[tuple[int, int], list[Callable[[int, set[int]], None]]] = {}
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def _call(self, name: str):
+        self.calls[name] += 1
+        if self.call_delay:
+            time.sleep(self.call_delay)
+
+    def builtin(self, uid: str = "BuiltInSpeakerDevice", name: str = "MacBook Pro Speakers") -> FakeDevice:
+        return self.add_device(uid, name, manufacturer="Apple Inc.", transport_type=kAudioDeviceTransportTypeBuiltIn)
+
+    def blackhole(self) -> FakeDevice:
+        return self.add_device(
+            "BlackHole2ch_UID",
+            "BlackHole 2ch",
+            manufacturer="Existential Audio Inc.",
+            transport_type=kAudioDeviceTransportTypeVirtual,
+            input_channels=2,
+        )
+
+    def share(self, shared: SharedFakeAudio):
+        """이후 장치 변화를 shared에도 써서 다른 프로세스의 FakePortAudio.shared()가 보게 한다."""
+        self.shared = shared
+        for device in list(self.devices.values()):
+            shared.open_failures[device.name] = device.open_failures
+        self._publish()
+
+    def _publish(self):
+        if self.shared is None:
+            return
+        with self._lock:
+            self.shared.devices["devices"] = [astuple(device) for device in self.devices.values()]
+
+    def consume_open_failure(self, name: str) -> bool:
+        """name 장치의 열기 실패가 남아 있으면 하나 쓰고 True."""
+        if self.shared is not None:
+            return _consume_shared_failure(self.shared, name)
+        device = self.find_by_name(name)
+        if device is None or device.open_failures <= 0:
+            return False
+        device.open_failures -= 1
+        return True
+
+    def add_device(self, uid: str, name: str, **fields) -> FakeDevice:
+        with self._lock:
+            device = FakeDevice(next(self._ids), uid, name, **fields)
+            self.devices[device.object_id] = device
+        if self.shared is not None:
+            self.shared.open_failures[name] = device.open_failures
+        self._publish()
+        self._notify(kAudioObjectSystemObject, {kAudioHardwarePropertyDevices})
+        return device
+
+    def remove_device(self, uid: str) -> FakeDevice:
+        """실제 HAL처럼 장치의 livn이 먼저 바뀌고 시스템 dev#가 뒤따른다."""
+        device = self.find(uid)
+        device.is_alive = False
+        self._notify(device.object_id, {kAudioDevicePropertyDeviceIsAlive})
+        with self._lock:
+            del self.devices[device.object_id]
+        self._publish()
+        self._notify(kAudioObjectSystemObject, {kAudioHardwarePropertyDevices})
+        return device
+
+    def rename_device(self, uid: str, name: str):
+        device = self.find(uid)
+        device.name = name
+        self._publish()
+        self._notify(device.object_id, {kAudioObjectPropertyName})
+
+    def find(self, uid: str) -> FakeDevice:
+        for device in list(self.devices.values()):
+            if device.uid == uid:
+                return device
+        raise KeyError(uid)
+
+    def find_by_name(self, name: str) -> FakeDevice | None:
+        for device in list(self.devices.values()):
+            if device.name == name:
+                return device
+        return None
+
+    def _notify(self, object_id: int, selectors: set[int]):
+        for selector in selectors:
+            for callback in list(self._listeners.get((object_id, selector), ())):
+                callback(object_id, selectors)
+
+    def add_listener(self, object_id: int, selector: int, _scope: int, callback) -> int:
+        self._call("add_listener")
+        if object_id != kAudioObjectSystemObject and object_id not in self.devices:
+            return HAL_ERROR
+        self._listeners.setdefault((object_id, selector), []).append(callback)
+        return 0
+
+    def remove_listener(self, object_id: int, selector: int, _scope: int, callback):
+        self._call("remove_listener")
+        callbacks = self._listeners.get((object_id, selector), [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def device_ids(self) -> list[int] | None:
+        self._call("device_ids")
+        if self.list_failures > 0:
+            self.list_failures -= 1
+            return None
+        with self._lock:
+            return list(self.devices)
+
+    def get_string(self, object_id: int, selector: int) -> str | None:
+        self._call("get_string")
+        device = self.devices.get(object_id)
+        if device is None:
+            return None
+        if selector == kAudioDevicePropertyDeviceUID:
+            return device.uid
+        if selector == kAudioObjectPropertyName:
+            return device.name
+        if selector == kAudioObjectPropertyManufacturer:
+            return device.manufacturer
+        return None
+
+    def get_u32(self, object_id: int, selector: int, default: int = 0) -> int:
+        self._call("get_u32")
+        device = self.devices.get(object_id)
+        if device is None:
+            return default
+        if selector == kAudioDevicePropertyTransportType:
+            return device.transport_type
+        if selector == kAudioDevicePropertyDeviceIsAlive:
+            return int(device.is_alive)
+        return default
+
+    def has_output_streams(self, object_id: int) -> bool:
+        self._call("has_output_streams")
+        device = self.devices.get(object_id)
+        return device is not None and device.output_channels > 0
+
+
+def _consume_shared_failure(shared: SharedFakeAudio, name: str) -> bool:
+    with shared.lock:
+        remaining = shared.open_failures.get(name, 0)
+        if remaining <= 0:
+            return False
+        shared.open_failures[name] = remaining - 1
+        return True
+
+
+class SharedHALView:
+    """다른 프로세스에서 SharedFakeAudio를 통해 FakeHAL 장치 목록을 읽는다. FakePortAudio가 쓰는 것만 있다."""
+
+    def __init__(self, shared: SharedFakeAudio):
+        self.shared = shared
+
+    @property
+    def devices(self) -> dict[int, FakeDevice]:
+        devices = (FakeDevice(*fields) for fields in self.shared.devices.get("devices", ()))
+        return {device.object_id: device for device in devices}
+
+    def find_by_name(self, name: str) -> FakeDevice | None:
+        for device in self.devices.values():
+            if device.name == name:
+                return device
+        return None
+
+    def consume_open_failure(self, name: str) -> bool:
+        return _consume_shared_failure(self.shared, name)
+
+
+class _SharedCounter:
+    """여러 프로세스가 함께 세는 Counter. FakePortAudio가 쓰는 update와 읽기만 있다."""
+
+    def __init__(self, shared: SharedFakeAudio):
+        self.shared = shared
+
+    def __getitem__(self, key: str) -> int:
+        return self.shared.calls.get(key, 0)
+
+    def update(self, keys):
+        with self.shared.lock:
+            for key in keys:
+                self.shared.calls[key] = self.shared.calls.get(key, 0) + 1
+
+
+class FakePortAudio:
+    """sounddevice 모듈 대신 쓰는 PortAudio.
+
+    실제 PortAudio처럼 장치 목록은 _initialize() 때만 HAL에서 읽는다. 그 뒤에
+    생긴 장치는 재초기화 전까지 보이지 않고, 사라진 장치의 스트림은 콜백이 멈춘다.
+    _terminate()는 열려 있던 스트림을 모두 죽인다(terminated_open_streams로 센다).
+    init_delay/open_delay는 재초기화와 스트림 열기에 드는 시간이다. 첫 소리가 난
+    출력은 audible에 (이름, 시각)으로 남는다.
+    """
+
+    def __init__(
+        self,
+        hal: "FakeHAL | SharedHALView",
+        init_delay: float = 0.0,
+        open_delay: float = 0.0,
+        calls=None,
+        audible=None,
+    ):
+        self.hal = hal
+        self.init_delay = init_delay
+        self.open_delay = open_delay
+        self.calls: Counter[str] = Counter() if calls is None else calls
+        self.audible: list[tuple[str, float]] = [] if audible is None else audible
+        self.streams: list["FakeStream"] = []
+        self._devices: list[dict] = []
+        self._enumerate()
+
+    @classmethod
+    def shared(cls, shared: SharedFakeAudio, init_delay: float = 0.0, open_delay: float = 0.0) -> "FakePortAudio":
+        """FakeHAL.share()로 내보낸 장치를 보는, 이 프로세스만의 PortAudio. 호출 수와 첫 소리 기록은 함께 쓴다."""
+        return cls(SharedHALView(shared), init_delay, open_delay, calls=_SharedCounter(shared), audible=shared.audible)
+
+    def _count(self, name: str):
+        self.calls.update((name,))
+
+    def Stream(self, **kwargs) -> "FakeStream":
+        return FakeStream(self, **kwargs)
+
+    def _terminate(self):
+        self._count("terminate")
+        for stream in self.streams:
+            if stream.active:
+                self._count("terminated_open_streams")
+            stream._kill()
+        self._devices = []
+
+    def _initialize(self):
+        self._count("initialize")
+        if self.init_delay:
+            time.sleep(self.init_delay)
+        self._enumerate()
+
+    def _enumerate(self):
+        self._devices = [
+            {
+                "name": device.name,
+                "hostapi": 0,
+                "max_input_channels": device.input_channels,
+                "max_output_channels": device.output_channels,
+                "default_samplerate": float(device.samplerate),
+            }
+            for device in sorted(self.hal.devices.values(), key=lambda device: device.object_id)
+        ]
+
+    def query_hostapis(self):
+        self._count("query_hostapis")
+        return [{"name": "Core Audio"}]
+
+    def query_devices(self, device: int | None = None, kind: str | None = None):
+        self._count("query_devices")
+        if device is None:
+            return list(self._devices)
+        return self._devices[device]
+
+    def check_output_settings(self, device=None, channels=None, dtype=None, extra_settings=None, samplerate=None):
+        self._count("check_output_settings")
+        if self.hal.find_by_name(self._devices[device]["name"]) is None:
+            raise FakePortAudioError(f"장치 없음: {device}")
+
+    @property
+    def opens(self) -> int:
+        return self.calls["stream_open"]
+
+
+class FakeStream:
+    """콜백을 실시간 속도로 부르는 스트림. 출력이 처음 소리가 난 시각을 남긴다.
+
+    실제 PortAudio처럼 Pa_Terminate 뒤에는 죽은 스트림이라 stop/close도 실패한다.
+    """
+
+    def __init__(self, portaudio: FakePortAudio, device, channels, samplerate, blocksize, latency, callback):
+        portaudio._count("stream_open")
+        if portaudio.open_delay:
+            time.sleep(portaudio.open_delay)
+        _input_index, output_index = device
+        self.name = portaudio._devices[output_index]["name"]
+        if portaudio.hal.find_by_name(self.name) is None:
+            portaudio._count("stream_open_failed")
+            raise FakePortAudioError(f"Error opening Stream: 장치 없음 {self.name}")
+        if portaudio.hal.consume_open_failure(self.name):
+            portaudio._count("stream_open_failed")
+            raise FakePortAudioError(f"Error opening Stream: 주입된 실패 {self.name}")
+        self.hal = portaudio.hal
+        self.audible = portaudio.audible
+        self.callback = callback
+        self.channels = channels
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.latency = (0.005, blocksize / samplerate)
+        self.cpu_load = 0.05
+        self.first_audible_at = 0.0
+        self._running = False
+        self._terminated = False
+        self._thread: threading.Thread | None = None
+        portaudio.streams.append(self)
+
+    @property
+    def active(self) -> bool:
+        return self._running
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=f"fake-stream-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        period = self.blocksize / self.samplerate
+        indata = np.full((self.blocksize, self.channels), 0.1, dtype=np.float32)
+        outdata = np.zeros_like(indata)
+        next_at = time.perf_counter()
+        while self._running:
+            if self.hal.find_by_name(self.name) is None:
+                # 장치가 사라지면 실제 CoreAudio처럼 콜백이 더 오지 않는다.
+                time.sleep(period)
+                continue
+            self.callback(indata, outdata, self.blocksize, None, None)
+            if self.first_audible_at == 0.0 and outdata.any():
+                self.first_audible_at = time.perf_counter()
+                self.audible.append((self.name, self.first_audible_at))
+            next_at += period
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    def _kill(self):
+        self._halt()
+        self._terminated = True
+
+    def _halt(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def stop(self):
+        if self._terminated:
+            raise FakePortAudioError("PortAudio not initialized")
+        self._halt()
+
+    def close(self):
+        self.stop()
+
+
+class RunLoop:
+    """AppHelper 대신 쓰는 메인 스레드 루프. call_after/call_later는 아무 스레드에서나 부른다."""
+
+    def __init__(self):
+        self._queue: list[tuple[float, int, Callable, tuple]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def call_after(self, func: Callable, *args):
+        self.call_later(0.0, func, *args)
+
+    def call_later(self, delay: float, func: Callable, *args):
+        with self._condition:
+            heapq.heappush(self._queue, (time.monotonic() + delay, next(self._counter), func, args))
+            self._condition.notify()
+
+    def run_until(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        """predicate가 참이 될 때까지 예약된 일을 돌린다. 시간 초과면 False."""
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            with self._condition:
+                now = time.monotonic()
+                if now >= deadline:
+                    return False
+                if not self._queue or self._queue[0][0] > now:
+                    wake = deadline if not self._queue else min(deadline, self._queue[0][0])
+                    self._condition.wait(wake - now)
+                    continue
+                _due, _order, func, args = heapq.heappop(self._queue)
+            func(*args)
+        return True
+
+    def run_for(self, seconds: float):
+        self.run_until(lambda: False, seconds)
+
+
+def _deref(argument):
+    """byref()나 pointer()로 넘어온 ctypes 객체."""
+    return argument._obj if hasattr(argument, "_obj") else argument.contents
+
+
+class _CFunction:
+    """argtypes/restype를 붙일 수 있는 가짜 C 함수."""
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self.argtypes = None
+        self.restype = None
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+
+class FakeCoreFoundation:
+    """CFStringRef를 정수 핸들로 흉내 낸다."""
+
+    def __init__(self):
+        self.strings: dict[int, bytes] = {}
+        self._handles = itertools.count(0x1000)
+        self.CFStringGetCString = _CFunction(self._get_cstring)
+        self.CFStringGetLength = _CFunction(lambda string: len(self.strings[_handle(string)].decode("utf-8")))
+        self.CFStringGetMaximumSizeForEncoding = _CFunction(lambda length, _encoding: length * 3)
+        self.CFRelease = _CFunction(lambda string: self.strings.pop(_handle(string)))
+
+    def create(self, text: str) -> int:
+        handle = next(self._handles)
+        self.strings[handle] = text.encode("utf-8")
+        return handle
+
+    def _get_cstring(self, string, buffer, size: int, _encoding: int) -> bool:
+        data = self.strings[_handle(string)] + b"\0"
+        if len(data) > size:
+            return False
+        ctypes.memmove(buffer, data, len(data))
+        return True
+
+
+def _handle(string) -> int:
+    return string.value if isinstance(string, ctypes.c_void_p) else string
+
+
+class FakeCoreAudio:
+    """AudioObjectGetPropertyData 등 CoreAudio C 함수를 FakeHAL 위에 흉내 낸다."""
+
+    _STRING_SELECTORS = (kAudioDevicePropertyDeviceUID, kAudioObjectPropertyName, kAudioObjectPropertyManufacturer)
+
+    def __init__(self, hal: FakeHAL, corefoundation: FakeCoreFoundation):
+        self.hal = hal
+        self.corefoundation = corefoundation
+        self._listeners: dict[tuple[int, int, int], Callable] = {}
+        self.AudioObjectGetPropertyDataSize = _CFunction(self._get_size)
+        self.AudioObjectGetPropertyData = _CFunction(self._get_data)
+        self.AudioObjectSetPropertyData = _CFunction(self._set_data)
+        self.AudioObjectAddPropertyListener = _CFunction(self._add_listener)
+        self.AudioObjectRemovePropertyListener = _CFunction(self._remove_listener)
+
+    def _get_size(self, object_id: int, address, _qualifier_size, _qualifier, size) -> int:
+        selector = _deref(address).mSelector
+        if selector == kAudioHardwarePropertyDevices:
+            _deref(size).value = len(self.hal.device_ids() or ()) * ctypes.sizeof(ctypes.c_uint32)
+        elif selector == kAudioDevicePropertyStreams:
+            _deref(size).value = ctypes.sizeof(ctypes.c_uint32) if self.hal.has_output_streams(object_id) else 0
+        else:
+            return HAL_ERROR
+        return 0
+
+    def _set_data(self, object_id: int, address, _qualifier_size, _qualifier, _size, _data) -> int:
+        if object_id == kAudioObjectSystemObject and _deref(address).mSelector == kAudioHardwarePropertyRunLoop:
+            return 0
+        return HAL_ERROR
+
+    def _get_data(self, object_id: int, address, _qualifier_size, _qualifier, size, data) -> int:
+        selector = _deref(address).mSelector
+        target = _deref(data)
+        if selector == kAudioHardwarePropertyDevices:
+            io_size = _deref(size)
+            object_ids = (self.hal.device_ids() or [])[: io_size.value // ctypes.sizeof(ctypes.c_uint32)]
+            target[: len(object_ids)] = object_ids
+            io_size.value = len(object_ids) * ctypes.sizeof(ctypes.c_uint32)
+            return 0
+        if selector in self._STRING_SELECTORS:
+            text = self.hal.get_string(object_id, selector)
+            if text is None:
+                return HAL_ERROR
+            target.value = self.corefoundation.create(text)
+            return 0
+        value = self.hal.get_u32(object_id, selector, default=-1)
+        if value < 0:
+            return HAL_ERROR
+        target.value = value
+        return 0
+
+    def _add_listener(self, object_id: int, address, proc, _client_data) -> int:
+        selector = _deref(address).mSelector
+
+        def callback(changed_id: int, selectors: set[int]):
+            addresses = (AudioObjectPropertyAddress * len(selectors))(
+                *(AudioObjectPropertyAddress(changed, 0, 0) for changed in selectors)
+            )
+            proc(changed_id, len(selectors), addresses, None)
+
+        status = self.hal.add_listener(object_id, selector, 0, callback)
+        if status == 0:
+            self._listeners[(object_id, selector, id(proc))] = callback
+        return status
+
+    def _remove_listener(self, object_id: int, address, proc, _client_data) -> int:
+        selector = _deref(address).mSelector
+        callback = self._listeners.pop((object_id, selector, id(proc)), None)
+        if callback is not None:
+            self.hal.remove_listener(object_id, selector, 0, callback)
+        return 0
@@ -0,0 +1,126 @@
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class LatencySetting:
+    blocksize: int
+    latency: str
+
+    def to_config(self) -> list:
+        return [self.blocksize, self.latency]
+
+    @classmethod
+    def from_config(cls, value) -> "LatencySetting | None":
+        try:
+            blocksize, latency = value
+            return cls(int(blocksize), str(latency))
+        except (TypeError, ValueError):
+            return None
+
+
+@dataclass(frozen=True, slots=True)
+class CallbackWindow:
+    """한 평가 구간 동안 콜백이 남긴 기록."""
+
+    blocks: int
+    xruns: int
+    max_duration: float
+    deadline: float
+
+    @property
+    def load(self) -> float:
+        if self.deadline <= 0:
+            return 0.0
+        return self.max_duration / self.deadline
+
+
+LATENCY_PROFILE_LOWEST = "lowest"
+LATENCY_PROFILE_BALANCED = "balanced"
+LATENCY_PROFILE_SAFE = "safe"
+LATENCY_PROFILE_AUTO = "auto"
+
+LATENCY_PROFILES = {
+    LATENCY_PROFILE_LOWEST: LatencySetting(128, "low"),
+    LATENCY_PROFILE_BALANCED: LatencySetting(512, "low"),
+    LATENCY_PROFILE_SAFE: LatencySetting(1024, "high"),
+}
+
+# 자동 조정이 오르내리는 사다리. 아래로 갈수록 지연이 짧다.
+AUTO_TUNE_LADDER = [
+    LatencySetting(64, "low"),
+    LatencySetting(128, "low"),
+    LatencySetting(256, "low"),
+    LatencySetting(512, "low"),
+    LatencySetting(1024, "high"),
+    LatencySetting(2048, "high"),
+]
+DEFAULT_AUTO_TUNE_SETTING = LATENCY_PROFILES[LATENCY_PROFILE_BALANCED]
+
+
+class LatencyTuner:
+    """콜백 처리 시간과 xrun 플래그를 보고 블록 크기/지연을 한 칸씩 조정한다.
+
+    xrun이 나거나 콜백이 데드라인의 step_up_load를 넘으면 한 칸 올리고,
+    그 칸은 cooldown 동안 다시 내려가지 않도록 막는다. stable_windows 구간
+    연속으로 xrun 없이 step_down_load 아래면 한 칸 내린다.
+    """
+
+    def __init__(
+        self,
+        stable_windows: int = 5,
+        step_up_load: float = 0.7,
+        step_down_load: float = 0.3,
+        cooldown: float = 600.0,
+    ):
+        self.stable_windows = stable_windows
+        self.step_up_load = step_up_load
+        self.step_down_load = step_down_load
+        self.cooldown = cooldown
+        self.rung = AUTO_TUNE_LADDER.index(DEFAULT_AUTO_TUNE_SETTING)
+        self._stable_count = 0
+        self._blocked_until: dict[int, float] = {}
+
+    @property
+    def setting(self) -> LatencySetting:
+        return AUTO_TUNE_LADDER[self.rung]
+
+    def reset(self, setting: LatencySetting | None = None):
+        """장치가 바뀔 때 그 장치에서 기억한 설정(없으면 기본값)에서 다시 시작한다."""
+        setting = setting or DEFAULT_AUTO_TUNE_SETTING
+        self.rung = self._nearest_rung(setting)
+        self._stable_count = 0
+        self._blocked_until.clear()
+
+    def evaluate(self, window: CallbackWindow, now: float | None = None) -> LatencySetting | None:
+        """바꿔야 하면 새 설정을, 그대로면 None을 돌려준다."""
+        if window.blocks == 0:
+            return None
+        now = time.monotonic() if now is None else now
+
+        if window.xruns > 0 or window.load > self.step_up_load:
+            self._stable_count = 0
+            self._blocked_until[self.rung] = now + self.cooldown
+            if self.rung + 1 < len(AUTO_TUNE_LADDER):
+                self.rung += 1
+                return self.setting
+            return None
+
+        if window.load > self.step_down_load:
+            self._stable_count = 0
+            return None
+
+        self._stable_count += 1
+        if self._stable_count < self.stable_windows or self.rung == 0:
+            return None
+        if self._blocked_until.get(self.rung - 1, 0.0) > now:
+            return None
+        self._stable_count = 0
+        self.rung -= 1
+        return self.setting
+
+    def _nearest_rung(self, setting: LatencySetting) -> int:
+        for index, candidate in enumerate(AUTO_TUNE_LADDER):
+            if candidate.blocksize >= setting.blocksize:
+                return index
+        return len(AUTO_TUNE_LADDER) - 1
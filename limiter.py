@@ -0,0 +1,171 @@
+import math
+
+import numpy as np
+
+from compressor import ENVELOPE_CHUNK, peak_release, power_tables, time_coefficient
+
+
+class LookaheadLimiter:
+    """룩어헤드 브릭월 리미터. 두 채널을 묶어서 같은 게인을 건다.
+
+    필요한 게인 리덕션을 (룩어헤드+1) 길이 윈도우 최대값으로 잡고 같은 길이로
+    이동 평균해서 어택 램프를 만든다. 신호는 룩어헤드만큼 지연되므로 피크가
+    출력되기 전에 게인이 이미 내려가 있고, 출력은 ceiling을 넘지 않는다.
+    윈도우 최대값은 van Herk/Gil-Werman 방식(블록별 누적 최대값)으로 벡터화한다.
+    인터샘플 피크는 오버샘플링 대신 ceiling 여유(-1 dBFS)로 대응한다.
+    """
+
+    def __init__(self, lookahead_ms: float = 1.5, release_ms: float = 50.0, ceiling_db: float = -1.0):
+        self.lookahead_ms = lookahead_ms
+        self.release_ms = release_ms
+        self.ceiling_db = ceiling_db
+        self.samplerate = 48000
+        self.lookahead = 1
+        self.max_frames = 0
+        self.channels = 0
+        self.prepare(0, 0, self.samplerate)
+
+    @property
+    def latency_frames(self) -> int:
+        return self.lookahead
+
+    @property
+    def latency_ms(self) -> float:
+        return self.lookahead * 1e3 / self.samplerate
+
+    def prepare(self, max_frames: int, channels: int, samplerate: int | None = None):
+        if samplerate is not None:
+            self.samplerate = samplerate
+        self.lookahead = max(1, int(round(self.lookahead_ms * 1e-3 * self.samplerate)))
+        self.window = self.lookahead + 1
+        self.ceiling = 10 ** (self.ceiling_db / 20)
+        self._release_coeff = time_coefficient(self.release_ms, self.samplerate)
+        self._release_pow, self._release_inv = power_tables(self._release_coeff)
+        self._allocate(max_frames, channels)
+        self.reset()
+
+    def reset(self):
+        self._delay.fill(0.0)
+        self._delay_pos = 0
+        self._required_bufs[self._active].fill(0.0)
+        self._hold_bufs[self._active].fill(0.0)
+        self._release_state = 0.0
+
+    def _allocate(self, max_frames: int, channels: int):
+        self.max_frames = max_frames
+        self.channels = channels
+        span = self.lookahead + max_frames
+        padded = math.ceil(span / self.window) * self.window
+
+        self._delay = np.zeros((self.lookahead, channels), dtype=np.float32)
+        self._level = np.zeros(max_frames, dtype=np.float32)
+        self._channel = np.zeros(max_frames, dtype=np.float32)
+        self._gain = np.zeros(max_frames, dtype=np.float32)
+        # [직전 블록 꼬리 lookahead개 | 현재 블록]. 매 블록 번갈아 써서 겹침 복사를 피한다.
+        self._required_bufs = (np.zeros(padded, dtype=np.float64), np.zeros(padded, dtype=np.float64))
+        self._hold_bufs = (np.zeros(span, dtype=np.float64), np.zeros(span, dtype=np.float64))
+        self._active = 0
+        self._prefix = np.zeros(padded, dtype=np.float64)
+        self._suffix = np.zeros(padded, dtype=np.float64)
+        self._cumulative = np.zeros(span + 1, dtype=np.float64)
+        self._reduction = np.zeros(max_frames, dtype=np.float64)
+        self._segment = np.zeros(ENVELOPE_CHUNK, dtype=np.float64)
+
+    def process(self, indata: np.ndarray, outdata: np.ndarray):
+        """indata와 outdata는 서로 다른 버퍼여야 한다."""
+        frames = indata.shape[0]
+        if frames > self.max_frames or indata.shape[1] != self.channels:
+            self._resize(max(frames, self.max_frames), indata.shape[1])
+
+        lookahead = self.lookahead
+        span = lookahead + frames
+        required = self._required_bufs[self._active]
+        hold = self._hold_bufs[self._active]
+        level = self._level[:frames]
+        channel = self._channel[:frames]
+
+        # 샘플별 필요 리덕션 = 1 - ceiling / max(|x|, ceiling)
+        np.abs(indata[:, 0], out=level)
+        for index in range(1, self.channels):
+            np.abs(indata[:, index], out=channel)
+            np.maximum(level, channel, out=level)
+        block_required = required[lookahead:span]
+        np.copyto(block_required, level)
+        np.maximum(block_required, self.ceiling, out=block_required)
+        np.divide(self.ceiling, block_required, out=block_required)
+        np.subtract(1.0, block_required, out=block_required)
+
+        self._window_max(required, span, hold[lookahead:span])
+
+        # (lookahead+1) 길이 이동 평균으로 어택 램프
+        cumulative = self._cumulative[:span + 1]
+        np.add.accumulate(hold[:span], out=cumulative[1:])
+        reduction = self._reduction[:frames]
+        np.subtract(cumulative[self.window:], cumulative[:frames], out=reduction)
+        reduction *= 1.0 / self.window
+
+        for start in range(0, frames, ENVELOPE_CHUNK):
+            segment = reduction[start:start + ENVELOPE_CHUNK]
+            self._release_state = peak_release(
+                segment,
+                self._segment[:segment.shape[0]],
+                self._release_coeff,
+                self._release_pow,
+                self._release_inv,
+                self._release_state,
+            )
+
+        gain = self._gain[:frames]
+        np.subtract(1.0, reduction, out=reduction)
+        np.copyto(gain, reduction, casting="same_kind")
+
+        self._delay_line(indata, outdata)
+        for index in range(self.channels):
+            np.multiply(outdata[:, index], gain, out=outdata[:, index])
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+
+        # 다음 블록에 필요한 꼬리만 반대편 버퍼 앞쪽으로 넘긴다.
+        self._active ^= 1
+        np.copyto(self._required_bufs[self._active][:lookahead], required[frames:span])
+        np.copyto(self._hold_bufs[self._active][:lookahead], hold[frames:span])
+
+    def _window_max(self, values: np.ndarray, span: int, out: np.ndarray):
+        """out[j] = max(values[j:j + window]), j = 0..len(out)-1."""
+        window = self.window
+        padded = math.ceil(span / window) * window
+        values[span:padded] = 0.0
+        blocks = values[:padded].reshape(-1, window)
+        prefix = self._prefix[:padded].reshape(-1, window)
+        suffix = self._suffix[:padded].reshape(-1, window)
+        np.maximum.accumulate(blocks, axis=1, out=prefix)
+        np.maximum.accumulate(blocks[:, ::-1], axis=1, out=suffix[:, ::-1])
+        count = out.shape[0]
+        np.maximum(self._suffix[:count], self._prefix[window - 1:window - 1 + count], out=out)
+
+    def _delay_line(self, indata: np.ndarray, outdata: np.ndarray):
+        frames = indata.shape[0]
+        lookahead = self.lookahead
+        delay = self._delay
+        position = self._delay_pos
+
+        if frames >= lookahead:
+            first = lookahead - position
+            np.copyto(outdata[:first], delay[position:])
+            np.copyto(outdata[first:lookahead], delay[:position])
+            np.copyto(outdata[lookahead:], indata[:frames - lookahead])
+            np.copyto(delay, indata[frames - lookahead:])
+            self._delay_pos = 0
+            return
+
+        first = min(frames, lookahead - position)
+        np.copyto(outdata[:first], delay[position:position + first])
+        np.copyto(delay[position:position + first], indata[:first])
+        rest = frames - first
+        if rest:
+            np.copyto(outdata[first:], delay[:rest])
+            np.copyto(delay[:rest], indata[first:])
+        self._delay_pos = (position + frames) % lookahead
+
+    def _resize(self, max_frames: int, channels: int):
+        self._allocate(max_frames, channels)
+        self.reset()
@@ -0,0 +1,398 @@
+"""메뉴바 없이 도는 야간 모드 데몬.
+
+EngineService를 asyncio 루프 위에서 돌리고 유닉스 도메인 소켓으로 제어/통계 API를
+연다. 메시지는 한 줄에 JSON 하나다.
+
+    요청: {"id": 1, "cmd": "set_profile", "args": {"threshold_db": -30}}
+    응답: {"id": 1, "ok": true, "result": {...}}  또는  {"id": 1, "ok": false, "error": "..."}
+    알림: {"event": "status", "status": {...}}  (subscribe한 연결에만)
+
+명령은 EngineDaemon.commands에 있다. 연결 하나는 코루틴 하나이고, 알림은 루프 한 차례에 한 번만
+JSON으로 만들어 모든 구독자에게 같은 바이트를 쓴다. 읽지 않는 구독자는 쓰기 버퍼가
+MAX_CLIENT_BUFFER를 넘으면 끊는다. 통계는 STATS_POLL_INTERVAL마다 한 번 읽어
+두고 stats 명령과 알림은 그것을 돌려주므로 클라이언트 수가 엔진 호출 수를 늘리지 않는다.
+메뉴바 앱과 같은 설정 파일을 쓰므로 둘을 동시에 돌리지 않는다.
+
+사용 예:
+    python3 night_daemon.py
+    python3 night_daemon.py --socket /tmp/night.sock --simulate
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+from engine_service import (
+    EVENT_NO_OUTPUT,
+    LATENCY_PROFILE_NAMES,
+    OUTPUT_MODES,
+    STATS_POLL_INTERVAL,
+    EngineLockedError,
+    EngineService,
+    default_config_path,
+    default_history_path,
+)
+from engine_defaults import default_socket_path
+from stream_stats import StatsSnapshot
+
+
+PROTOCOL_VERSION = 1
+MAX_REQUEST_BYTES = 64 * 1024
+MAX_CLIENT_BUFFER = 256 * 1024
+# 스크립트가 한꺼번에 붙어도 connect가 EAGAIN으로 튕기지 않게 한다(커널 somaxconn이 상한).
+LISTEN_BACKLOG = 512
+PROFILE_FIELDS = ("threshold_db", "makeup_gain_db", "ratio")
+
+
+def stats_payload(snapshot: StatsSnapshot | None) -> dict | None:
+    if snapshot is None:
+        return None
+    payload = asdict(snapshot)
+    payload["histogram"] = list(snapshot.histogram)
+    payload["max_load"] = snapshot.max_load
+    payload["p99_duration"] = snapshot.duration_percentile(99)
+    payload["summary"] = snapshot.summary()
+    return payload
+
+
+class CommandError(Exception):
+    pass
+
+
+class EngineDaemon:
+    """소켓 서버와 통계 폴링. EngineService는 전부 루프 스레드에서만 부른다."""
+
+    def __init__(self, service: EngineService, socket_path: Path, logger: logging.Logger):
+        self.service = service
+        self.socket_path = socket_path
+        self.logger = logger
+        self.commands = {
+            "status": self.cmd_status,
+            "devices": self.cmd_devices,
+            "stats": self.cmd_stats,
+            "start": self.cmd_start,
+            "stop": self.cmd_stop,
+            "set_mode": self.cmd_set_mode,
+            "select_output": self.cmd_select_output,
+            "set_profile": self.cmd_set_profile,
+            "set_latency_profile": self.cmd_set_latency_profile,
+            "set_limiter": self.cmd_set_limiter,
+            "refresh": self.cmd_refresh,
+            "subscribe": self.cmd_subscribe,
+            "shutdown": self.cmd_shutdown,
+        }
+        self._subscribers: set[asyncio.StreamWriter] = set()
+        self._clients: dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._status_pending = False
+        self._stopped = asyncio.Event()
+        self._server: asyncio.AbstractServer | None = None
+        service.add_listener(self.handle_service_event)
+
+    async def bind(self):
+        """소켓을 연다. 이미 다른 데몬이 듣고 있으면 RuntimeError, 남은 소켓 파일은 지운다."""
+        path = self.socket_path
+        if path.exists():
+            try:
+                _reader, writer = await asyncio.open_unix_connection(str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                path.unlink(missing_ok=True)
+            else:
+                writer.close()
+                raise RuntimeError(f"이미 실행 중인 데몬이 있음: {path}")
+        # 소켓 파일은 처음부터 소유자만 열 수 있게 만든다. 엔진 스레드가 생기기 전에 부른다.
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self.handle_client, path=str(path), limit=MAX_REQUEST_BYTES, backlog=LISTEN_BACKLOG
+            )
+        finally:
+            os.umask(previous_umask)
+        self.logger.info(f"데몬 소켓: {path}")
+
+    async def serve(self):
+        poller = asyncio.create_task(self.poll_stats())
+        try:
+            await self._stopped.wait()
+        finally:
+            poller.cancel()
+            self._server.close()
+            # 연결을 닫아 각 연결 코루틴이 EOF를 보고 스스로 끝나게 한다.
+            tasks = list(self._clients.values())
+            for writer in list(self._clients):
+                writer.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._server.wait_closed()
+            self.socket_path.unlink(missing_ok=True)
+
+    def stop(self):
+        self._stopped.set()
+
+    async def poll_stats(self):
+        while True:
+            await asyncio.sleep(STATS_POLL_INTERVAL)
+            snapshot = self.service.poll_stats()
+            if snapshot is not None and self._subscribers:
+                self.broadcast({"event": "stats", "stats": stats_payload(snapshot)})
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # limit을 넘는 줄. 스트림 위치를 믿을 수 없으므로 연결을 닫는다.
+                    self.logger.warning("데몬 요청이 너무 큼 - 연결 닫음")
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self.handle_request(line, writer))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def handle_request(self, line: bytes, writer: asyncio.StreamWriter) -> bytes:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise CommandError("요청은 JSON 객체여야 함")
+            request_id = request.get("id")
+            command = self.commands.get(request.get("cmd"))
+            if command is None:
+                raise CommandError(f"알 수 없는 명령: {request.get('cmd')}")
+            args = request.get("args") or {}
+            if not isinstance(args, dict):
+                raise CommandError("args는 JSON 객체여야 함")
+            result = command(writer, **args)
+            response = {"id": request_id, "ok": True, "result": result}
+        except (CommandError, ValueError, TypeError) as exc:
+            response = {"id": request_id, "ok": False, "error": str(exc)}
+        except Exception as exc:
+            self.logger.exception("데몬 명령 실패")
+            response = {"id": request_id, "ok": False, "error": f"내부 오류: {exc}"}
+        return self.encode(response)
+
+    def encode(self, message: dict) -> bytes:
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def handle_service_event(self, event: str):
+        if event == EVENT_NO_OUTPUT:
+            self.broadcast({"event": EVENT_NO_OUTPUT})
+        self.schedule_status()
+
+    def schedule_status(self):
+        """한 명령이나 결과가 여러 변경을 알려도 상태 알림은 루프 한 차례에 한 번만 보낸다."""
+        if self._status_pending or not self._subscribers:
+            return
+        self._status_pending = True
+        asyncio.get_running_loop().call_soon(self._send_status)
+
+    def _send_status(self):
+        self._status_pending = False
+        self.broadcast({"event": "status", "status": self.status()})
+
+    def broadcast(self, message: dict):
+        if not self._subscribers:
+            return
+        data = self.encode(message)
+        for writer in list(self._subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.logger.warning("알림을 읽지 않는 구독자 연결을 닫음")
+                self._subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(data)
+
+    def status(self) -> dict:
+        service = self.service
+        profile = service.profile
+        return {
+            "protocol": PROTOCOL_VERSION,
+            "ready": service.ready,
+            "running": service.is_running,
+            "output_mode": service.output_mode,
+            "manual_output_uid": service.manual_output_uid,
+            "current_output_uid": service.current_output_uid,
+            "pending_output_uid": service.pending_output_uid,
+            "profile_uid": service.profile_uid(),
+            "profile": {field: getattr(profile, field) for field in PROFILE_FIELDS},
+            "latency_profile": service.latency_profile,
+            "limiter_enabled": service.limiter_enabled,
+            "devices_version": service.output_snapshot().version,
+        }
+
+    def cmd_status(self, _writer) -> dict:
+        return self.status()
+
+    def cmd_devices(self, _writer) -> list[dict]:
+        snapshot = self.service.output_snapshot()
+        selector = self.service.auto_selector
+        return [
+            {
+                "uid": device.uid,
+                "name": device.name,
+                "display_name": snapshot.display_names.get(device.uid, device.display_name),
+                "manufacturer": device.manufacturer,
+                "builtin": device.is_builtin,
+                "tier": selector.tier(device.uid),
+            }
+            for device in snapshot.devices
+        ]
+
+    def cmd_stats(self, _writer) -> dict | None:
+        return stats_payload(self.service.last_stats)
+
+    def cmd_start(self, _writer) -> dict:
+        """준비 전이면 준비되는 대로 시작한다. 결과는 status 알림으로 나온다."""
+        return {"accepted": self.service.start_processing(restart=self.service.is_running)}
+
+    def cmd_stop(self, _writer) -> dict:
+        self.service.stop_processing()
+        return self.status()
+
+    def cmd_set_mode(self, _writer, mode: str) -> dict:
+        if mode not in OUTPUT_MODES:
+            raise CommandError(f"mode는 {'/'.join(OUTPUT_MODES)} 중 하나: {mode}")
+        self.service.set_output_mode(mode)
+        return self.status()
+
+    def cmd_select_output(self, _writer, uid: str) -> dict:
+        if self.service.device_manager.get_device(uid) is None:
+            raise CommandError(f"출력 장치 없음: {uid}")
+        self.service.select_output(uid)
+        return self.status()
+
+    def cmd_set_profile(self, _writer, **changes) -> dict:
+        unknown = set(changes) - set(PROFILE_FIELDS)
+        if unknown or not changes:
+            raise CommandError(f"고칠 수 있는 값: {', '.join(PROFILE_FIELDS)}")
+        try:
+            # ProcessingProfile이 범위를 검사하므로 잘못된 값은 저장되기 전에 여기서 막힌다.
+            profile = self.service.update_profile(**{key: float(value) for key, value in changes.items()})
+        except (TypeError, ValueError) as exc:
+            raise CommandError(f"프로필 값이 잘못됨: {exc}") from None
+        return {field: getattr(profile, field) for field in PROFILE_FIELDS}
+
+    def cmd_set_latency_profile(self, _writer, profile: str) -> dict:
+        if profile not in LATENCY_PROFILE_NAMES:
+            raise CommandError(f"profile은 {'/'.join(LATENCY_PROFILE_NAMES)} 중 하나: {profile}")
+        self.service.set_latency_profile(profile)
+        return self.status()
+
+    def cmd_set_limiter(self, _writer, enabled: bool) -> dict:
+        self.service.set_limiter(bool(enabled))
+        return self.status()
+
+    def cmd_refresh(self, writer) -> list[dict]:
+        self.service.refresh_devices()
+        return self.cmd_devices(writer)
+
+    def cmd_subscribe(self, writer) -> dict:
+        """이 연결에 status/stats/no_output 알림을 보낸다. 지금 상태를 돌려준다."""
+        self._subscribers.add(writer)
+        return self.status()
+
+    def cmd_shutdown(self, _writer) -> None:
+        asyncio.get_running_loop().call_soon(self.stop)
+
+
+def make_simulated_hal():
+    """--simulate: 가짜 CoreAudio/PortAudio 위에서 돈다. 오디오 장치 없는 머신에서 API를 시험할 때."""
+    import portaudio_index
+    from fake_audio import FakeHAL, FakePortAudio
+
+    hal = FakeHAL()
+    hal.blackhole()
+    hal.builtin()
+    portaudio_index.use_backend(FakePortAudio(hal))
+    return hal
+
+
+async def run(args, logger: logging.Logger) -> int:
+    loop = asyncio.get_running_loop()
+
+    def call_after(func, *call_args):
+        loop.call_soon_threadsafe(func, *call_args)
+
+    def call_later(delay, func, *call_args):
+        loop.call_soon_threadsafe(loop.call_later, delay, func, *call_args)
+
+    if args.simulate:
+        hal = make_simulated_hal()
+    else:
+        from coreaudio_hal import CoreAudioHAL
+
+        hal = CoreAudioHAL()
+        status = hal.use_own_notification_thread()
+        if status != 0:
+            logger.warning(f"HAL 알림 스레드 설정 실패: {status}")
+
+    try:
+        service = EngineService(
+            logger,
+            config_path=args.config,
+            history_path=args.history,
+            log_file=args.log_file,
+            audio_worker=False if args.simulate or args.in_process else None,
+            hal=hal,
+            call_after=call_after,
+            call_later=call_later,
+        )
+    except EngineLockedError as exc:
+        logger.error(str(exc))
+        print(exc, file=sys.stderr)
+        return 1
+    daemon = EngineDaemon(service, args.socket, logger)
+    try:
+        await daemon.bind()
+    except (RuntimeError, OSError) as exc:
+        logger.error(f"데몬 소켓을 열 수 없음: {exc}")
+        print(exc, file=sys.stderr)
+        service.shutdown()
+        return 1
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, daemon.stop)
+    service.start()
+    try:
+        await daemon.serve()
+    finally:
+        logger.info("데몬 종료")
+        service.shutdown()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="야간 모드 헤드리스 데몬")
+    parser.add_argument("--socket", type=Path, default=default_socket_path(), help="제어 소켓 경로")
+    parser.add_argument("--config", type=Path, default=default_config_path(), help="설정 파일")
+    parser.add_argument("--history", type=Path, default=default_history_path(), help="장치 기록 파일")
+    parser.add_argument("--log-file", default=os.path.expanduser("~/night_mode_daemon.log"))
+    parser.add_argument("--in-process", action="store_true", help="오디오 워커 프로세스 없이 돌린다")
+    parser.add_argument("--simulate", action="store_true", help="가짜 CoreAudio/PortAudio를 쓴다")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        filename=args.log_file,
+        level=logging.DEBUG,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    return asyncio.run(run(args, logging.getLogger(__name__)))
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,17 +1,44 @@
-import json
 import logging
+import multiprocessing
 import os
 import plistlib
 import time
 import sys
 from pathlib import Path
 
+# 모듈 import 단계 시간을 재는 기준점. 무거운 import보다 먼저 잡는다.
+STARTED_AT = time.perf_counter()
+
 import rumps
 from PyObjCTools import AppHelper
 
-from audio_router import AudioRouter
-from auto_selector import AutoSelector
-from device_manager import DeviceManager
+from device_manager import OutputSnapshot
+from engine_service import (
+    EVENT_NO_OUTPUT,
+    EVENT_OUTPUT,
+    EVENT_PROFILE,
+    EVENT_STATE,
+    OUTPUT_MODE_AUTO,
+    OUTPUT_MODE_MANUAL,
+    STATS_POLL_INTERVAL,
+    EngineLockedError,
+    EngineService,
+)
+from latency_tuner import (
+    LATENCY_PROFILE_AUTO,
+    LATENCY_PROFILE_BALANCED,
+    LATENCY_PROFILE_LOWEST,
+    LATENCY_PROFILE_SAFE,
+)
+from startup import StartupTimer
+
+
+def set_menu_item(item, title: str, state: bool):
+    """값이 실제로 바뀔 때만 NSMenuItem을 건드린다."""
+    if item.title != title:
+        item.title = title
+    if bool(item.state) != state:
+        item.state = state
 
 
 def resource_path(relative_path: str) -> str:
@@ -34,8 +61,15 @@ def resource_path(relative_path: str) -> str:
 
 APP_NAME = "Night Mode"
 AUTO_OUTPUT_LABEL = "자동 출력 장치"
-OUTPUT_MODE_AUTO = "auto"
-OUTPUT_MODE_MANUAL = "manual"
+LATENCY_PROFILE_TITLES = {
+    LATENCY_PROFILE_LOWEST: "최저 지연",
+    LATENCY_PROFILE_BALANCED: "균형",
+    LATENCY_PROFILE_SAFE: "안정",
+    LATENCY_PROFILE_AUTO: "자동 조정",
+}
+STATS_IDLE_TITLE = "상태: 정지"
+THRESHOLD_TITLES = {-10.0: "약하게 (-10dB)", -20.0: "보통 (-20dB)", -30.0: "강하게 (-30dB)"}
+GAIN_TITLES = {0.0: "낮게 (0dB)", 10.0: "보통 (+10dB)", 20.0: "높게 (+20dB)"}
 
 log_file = os.path.expanduser("~/night_mode_debug.log")
 logging.basicConfig(
@@ -46,62 +80,44 @@ logging.basicConfig(
 
 
 class NightModeApp(rumps.App):
+    """EngineService 위의 메뉴바 UI. 메뉴 콜백은 서비스 메서드를 부르고, 서비스가 알리는 변경으로 메뉴를 맞춘다."""
+
     def __init__(self):
         super().__init__(APP_NAME, icon=resource_path("menu_icon.png"), quit_button=None)
         logging.info("Rumps init successful")
+        self.startup = StartupTimer(logging.getLogger(__name__), STARTED_AT)
+        self.startup.mark("imports")
 
-        self.threshold_db = -20.0
-        self.makeup_gain_db = 10.0
-        self.ratio = 4.0
-        self.output_mode = OUTPUT_MODE_AUTO
-        self.manual_output_uid = None
-        self.should_auto_start_processing = False
-        self.is_running = False
-        self.current_output_uid = None
         self.output_menu_items = {}
-        self.previous_auto_uids = set()
-        self._startup_timer = None
-
-        self.load_config()
-        logging.info(f"Config loaded: {self.config_data}")
-
-        recent_connected = self.config_data.get("physical_output_history", [])
-        last_success_uid = self.config_data.get("last_success_uid")
-        self.auto_selector = AutoSelector(recent_connected=recent_connected, last_success_uid=last_success_uid)
-        self.audio_router = AudioRouter(logging.getLogger(__name__))
-        self.audio_router.configure(self.threshold_db, self.makeup_gain_db, self.ratio)
-        self.device_manager = DeviceManager(logging.getLogger(__name__), on_change=self.handle_devices_changed)
+        self._output_menu_view = None
+        self.service = EngineService(logging.getLogger(__name__), log_file=log_file, startup=self.startup)
+        self.service.add_listener(self.handle_service_event)
 
         self.build_menu()
-        logging.info("Menu built successfully")
-        self.device_manager.start()
-        logging.info("Device manager started")
-        self.handle_devices_changed()
-        logging.info("Initial device sync completed")
-
         self.menu["설정"]["로그인 시 자동 실행"].state = self.is_auto_start_enabled()
-
-        if self.should_auto_start_processing:
-            logging.info("Scheduling deferred auto-start")
-            self._startup_timer = rumps.Timer(self._deferred_auto_start_timer, 0.5)
-            self._startup_timer.start()
-
-    def _deferred_auto_start_timer(self, _sender):
-        if self._startup_timer is not None:
-            self._startup_timer.stop()
-            self._startup_timer = None
-        self.defer_auto_start()
-
-    def defer_auto_start(self):
-        logging.info("Deferred auto-start fired")
-        self.start_processing()
-
-    @property
-    def config_data(self):
-        return getattr(self, "_config_data", {})
+        self.menu["설정"]["피크 리미터"].state = self.service.limiter_enabled
+
+        self._stats_timer = rumps.Timer(self.poll_stream_stats, STATS_POLL_INTERVAL)
+        self._stats_timer.start()
+        self.startup.mark("menu")
+        # run()이 상태 표시줄 아이콘을 만든 뒤 런루프의 첫 차례에 장치를 읽는다.
+        AppHelper.callAfter(self.startup.mark, "icon")
+        self.service.start()
+
+    def handle_service_event(self, event: str):
+        if event == EVENT_STATE:
+            self.sync_processing_ui()
+        elif event == EVENT_OUTPUT:
+            self.sync_output_mode_menu()
+            self.refresh_output_menu(self.service.output_snapshot())
+        elif event == EVENT_PROFILE:
+            self.sync_profile_menu()
+        elif event == EVENT_NO_OUTPUT:
+            rumps.alert("알림", "사용 가능한 출력 장치가 없습니다.")
 
     def build_menu(self):
         toggle_item = rumps.MenuItem("야간 모드 시작", callback=self.toggle_processing)
+        self.status_item = rumps.MenuItem(STATS_IDLE_TITLE)
 
         threshold_menu = rumps.MenuItem("압축 강도 (Threshold)")
         threshold_menu.add(rumps.MenuItem("약하게 (-10dB)", callback=self.set_threshold_weak))
@@ -113,24 +129,34 @@ class NightModeApp(rumps.App):
         gain_menu.add(rumps.MenuItem("보통 (+10dB)", callback=self.set_gain_normal))
         gain_menu.add(rumps.MenuItem("높게 (+20dB)", callback=self.set_gain_high))
 
+        latency_menu = rumps.MenuItem("지연 모드")
+        for profile, title in LATENCY_PROFILE_TITLES.items():
+            item = rumps.MenuItem(title, callback=self.select_latency_profile)
+            item.latency_profile = profile
+            latency_menu.add(item)
+
         mode_menu = rumps.MenuItem("출력 장치 모드")
         mode_menu.add(rumps.MenuItem("자동", callback=self.set_output_mode_auto))
         mode_menu.add(rumps.MenuItem("수동", callback=self.set_output_mode_manual))
 
         output_menu = rumps.MenuItem("출력 장치 선택")
-        output_menu.add(rumps.MenuItem(AUTO_OUTPUT_LABEL, callback=self.select_auto_output))
+        self.auto_output_item = rumps.MenuItem(AUTO_OUTPUT_LABEL, callback=self.select_auto_output)
+        output_menu.add(self.auto_output_item)
         output_menu.add(rumps.separator)
         output_menu.add(rumps.MenuItem("목록 새로고침", callback=self.manual_refresh_devices))
         output_menu.add(rumps.separator)
 
         settings_menu = rumps.MenuItem("설정")
         settings_menu.add(rumps.MenuItem("로그인 시 자동 실행", callback=self.toggle_auto_start))
+        settings_menu.add(rumps.MenuItem("피크 리미터", callback=self.toggle_limiter))
 
         self.menu = [
             toggle_item,
+            self.status_item,
             rumps.separator,
             threshold_menu,
             gain_menu,
+            latency_menu,
             rumps.separator,
             mode_menu,
             output_menu,
@@ -139,57 +165,9 @@ class NightModeApp(rumps.App):
             rumps.MenuItem("종료", callback=self.quit_app),
         ]
 
-        self.menu["출력 장치 모드"]["자동"].state = self.output_mode == OUTPUT_MODE_AUTO
-        self.menu["출력 장치 모드"]["수동"].state = self.output_mode == OUTPUT_MODE_MANUAL
-
-        threshold_title = {-10.0: "약하게 (-10dB)", -20.0: "보통 (-20dB)", -30.0: "강하게 (-30dB)"}.get(
-            self.threshold_db,
-            "보통 (-20dB)",
-        )
-        gain_title = {0.0: "낮게 (0dB)", 10.0: "보통 (+10dB)", 20.0: "높게 (+20dB)"}.get(
-            self.makeup_gain_db,
-            "보통 (+10dB)",
-        )
-        self.menu["압축 강도 (Threshold)"][threshold_title].state = True
-        self.menu["볼륨 증폭 (Gain)"][gain_title].state = True
-
-    def get_config_path(self) -> Path:
-        return Path.home() / ".night_mode_config.json"
-
-    def load_config(self):
-        self._config_data = {}
-        config_path = self.get_config_path()
-        if not config_path.exists():
-            return
-
-        try:
-            with open(config_path, "r") as handle:
-                self._config_data = json.load(handle)
-        except Exception as exc:
-            logging.error(f"Failed to load config: {exc}")
-            return
-
-        self.manual_output_uid = self.config_data.get("manual_output_uid")
-        self.output_mode = self.config_data.get("output_mode", OUTPUT_MODE_AUTO)
-        self.should_auto_start_processing = self.config_data.get("is_running", False)
-        self.threshold_db = self.config_data.get("threshold_db", -20.0)
-        self.makeup_gain_db = self.config_data.get("makeup_gain_db", 10.0)
-
-    def save_config(self):
-        recent_connected, last_success_uid = self.auto_selector.export_state()
-        config = {
-            "manual_output_uid": self.manual_output_uid,
-            "output_mode": self.output_mode,
-            "is_running": self.is_running,
-            "threshold_db": self.threshold_db,
-            "makeup_gain_db": self.makeup_gain_db,
-            "physical_output_history": recent_connected,
-            "last_success_uid": last_success_uid,
-        }
-        with open(self.get_config_path(), "w") as handle:
-            json.dump(config, handle)
-        self._config_data = config
-        logging.debug(f"Config saved: {config}")
+        self.sync_output_mode_menu()
+        self.sync_profile_menu()
+        self.sync_latency_menu()
 
     def get_plist_path(self) -> Path:
         return Path.home() / "Library" / "LaunchAgents" / "com.lizstudio.nightmodeaudio.plist"
@@ -230,200 +208,97 @@ class NightModeApp(rumps.App):
             logging.error(f"Failed to enable auto-start: {exc}")
             rumps.alert("오류", f"자동 실행 설정에 실패했습니다: {exc}")
 
-    def handle_devices_changed(self):
-        devices = self.device_manager.list_output_devices()
-        current_auto_uids = self.auto_selector.update_devices(devices, self.previous_auto_uids)
-        self.previous_auto_uids = current_auto_uids
-
-        self.refresh_output_menu(devices)
-
-        if self.output_mode == OUTPUT_MODE_AUTO and self.is_running:
-            target = self.resolve_target_device()
-            if target is None:
-                self.stop_processing()
-            elif target.uid != self.current_output_uid:
-                self.start_processing(restart=True)
-
-        if self.output_mode == OUTPUT_MODE_MANUAL and self.is_running:
-            manual_device = self.device_manager.get_device(self.manual_output_uid)
-            if manual_device is None:
-                self.stop_processing()
-
     def manual_refresh_devices(self, _):
-        self.device_manager.refresh()
-        self.handle_devices_changed()
+        self.service.refresh_devices()
 
-    def make_unique_label(self, base_label: str) -> str:
+    def make_unique_label(self, base_label: str, taken: set[str]) -> str:
         label = base_label
         counter = 2
-        while label in self.output_menu_items:
+        while label in taken:
             label = f"{base_label} ({counter})"
             counter += 1
         return label
 
-    def refresh_output_menu(self, devices):
-        output_menu = self.menu["출력 장치 선택"]
-        output_menu.clear()
+    def refresh_output_menu(self, snapshot: OutputSnapshot):
+        """출력 메뉴를 지우지 않고 스냅샷에 맞춘다. 보이는 내용이 그대로면 메뉴를 건드리지 않는다."""
+        service = self.service
         auto_label = AUTO_OUTPUT_LABEL
-        auto_device = self.resolve_auto_device()
+        auto_device = service.resolve_auto_device()
         if auto_device is not None:
-            auto_label = f"{AUTO_OUTPUT_LABEL} ({auto_device.display_name})"
-
-        auto_item = rumps.MenuItem(auto_label, callback=self.select_auto_output)
-        auto_item.state = self.output_mode == OUTPUT_MODE_AUTO
-        output_menu.add(auto_item)
-        output_menu.add(rumps.separator)
-        output_menu.add(rumps.MenuItem("목록 새로고침", callback=self.manual_refresh_devices))
-        output_menu.add(rumps.separator)
-
-        self.output_menu_items = {}
-        for device in devices:
-            label = self.make_unique_label(device.display_name)
-            item = rumps.MenuItem(label, callback=self.select_manual_output)
-            item.output_uid = device.uid
-            item.state = self.output_mode == OUTPUT_MODE_MANUAL and self.manual_output_uid == device.uid
-            self.output_menu_items[label] = item
-            output_menu.add(item)
-
-    def resolve_auto_device(self):
-        return self.auto_selector.select(self.device_manager.list_output_devices())
-
-    def resolve_target_device(self):
-        if self.output_mode == OUTPUT_MODE_AUTO:
-            return self.resolve_auto_device()
-        return self.device_manager.get_device(self.manual_output_uid)
-
-    def start_processing(self, restart: bool = False) -> bool:
-        logging.info(f"start_processing called restart={restart} is_running={self.is_running} mode={self.output_mode}")
-        try:
-            return self._start_processing_inner(restart)
-        except Exception:
-            logging.exception("start_processing 예외 발생")
-            self.stop_processing()
-            return False
-
-    def _start_processing_inner(self, restart: bool) -> bool:
-        previous_output_uid = self.current_output_uid
-        target = self.resolve_target_device()
-        if target is None:
-            logging.error("No target device resolved")
-            rumps.alert("알림", "사용 가능한 출력 장치가 없습니다.")
-            self.stop_processing()
-            return False
-
-        sd_index = self.resolve_sd_index_with_refresh(target.uid, target.name)
-
-        if sd_index is None:
-            logging.error(
-                f"UID를 sounddevice 인덱스로 변환 실패: uid={target.uid} name={target.name}"
-            )
-            if restart and self.is_running:
-                logging.debug("자동 전환 실패 - 기존 스트림 유지")
-                return False
-            self.stop_processing()
-            return False
-
-        self.audio_router.configure(self.threshold_db, self.makeup_gain_db, self.ratio)
-        success = (
-            self.audio_router.restart(sd_index)
-            if restart or self.is_running
-            else self.audio_router.start(sd_index)
-        )
-        if not success:
-            logging.debug("오디오 스트림 시작 실패 - PortAudio 재초기화 후 재시도")
-            success = self.retry_start_after_portaudio_reset(target.uid, restart=False)
-
-        if not success:
-            if restart and self.is_running:
-                logging.debug("스트림 재시작 실패 - 기존 서비스 상태 유지")
-                return False
-            self.stop_processing()
-            return False
-
-        self.is_running = True
-        if restart and previous_output_uid is not None and self.audio_router.current_output_index != sd_index:
-            self.current_output_uid = previous_output_uid
-            self.auto_selector.note_success(previous_output_uid)
-            logging.debug(
-                f"기존 출력 복구 유지: previous_uid={previous_output_uid} "
-                f"requested_uid={target.uid} actual_sd_index={self.audio_router.current_output_index}"
-            )
-        else:
-            self.current_output_uid = target.uid
-            self.auto_selector.note_success(target.uid)
-        self.sync_processing_ui()
-        self.save_config()
-        logging.info(f"처리 시작: uid={target.uid} name={target.name} sd_index={sd_index}")
-        return True
-
-    def resolve_sd_index_with_refresh(self, target_uid: str, target_name: str) -> int | None:
-        sd_index = self.device_manager.get_sd_index(target_uid)
-        if sd_index is not None:
-            return sd_index
-
-        logging.debug(f"'{target_name}' sounddevice 미발견 - PortAudio 재초기화 시도")
-        try:
-            import sounddevice as sd
-
-            sd._terminate()
-            sd._initialize()
-            logging.debug("PortAudio 재초기화 완료")
-        except Exception:
-            logging.exception("PortAudio 재초기화 실패")
-            return None
-
-        for attempt in range(3):
-            self.device_manager.refresh()
-            sd_index = self.device_manager.get_sd_index(target_uid)
-            if sd_index is not None:
-                return sd_index
-            if attempt < 2:
-                time.sleep(0.2)
-
-        return None
-
-    def retry_start_after_portaudio_reset(self, target_uid: str, restart: bool) -> bool:
-        try:
-            import sounddevice as sd
-
-            sd._terminate()
-            sd._initialize()
-            logging.debug("PortAudio 재초기화 후 스트림 재시도")
-        except Exception:
-            logging.exception("PortAudio 재초기화 실패")
-            return False
-
-        sd_index = None
-        for attempt in range(3):
-            self.device_manager.refresh()
-            sd_index = self.device_manager.get_sd_index(target_uid)
-            if sd_index is not None:
-                break
-            if attempt < 2:
-                time.sleep(0.2)
-
-        if sd_index is None:
-            target = self.device_manager.get_device(target_uid)
-            logging.error(
-                f"PortAudio 재초기화 후에도 sounddevice 인덱스 변환 실패: "
-                f"uid={target_uid} name={target.name if target else None}"
-            )
-            return False
-
-        if restart:
-            return self.audio_router.restart(sd_index)
-        return self.audio_router.start(sd_index)
-
-    def stop_processing(self):
-        self.audio_router.stop()
-        self.is_running = False
-        self.current_output_uid = None
-        self.sync_processing_ui()
-        self.save_config()
+            auto_label = f"{AUTO_OUTPUT_LABEL} ({snapshot.display_names.get(auto_device.uid, auto_device.display_name)})"
+
+        manual = service.output_mode == OUTPUT_MODE_MANUAL
+        labels = set()
+        rows = []
+        for device in snapshot.devices:
+            label = self.make_unique_label(snapshot.display_names[device.uid], labels)
+            labels.add(label)
+            rows.append((device.uid, label, manual and service.manual_output_uid == device.uid))
+
+        view = (auto_label, not manual, rows)
+        if view == self._output_menu_view:
+            return
+        self._output_menu_view = view
+
+        set_menu_item(self.auto_output_item, auto_label, not manual)
+        self.reconcile_output_items(self.menu["출력 장치 선택"], rows)
+
+    def reconcile_output_items(self, output_menu, rows: list[tuple[str, str, bool]]):
+        """장치 항목을 (uid, 제목, 체크) 목록과 맞춘다. 빠진 장치만 지우고 새 장치만 끼워 넣는다.
+
+        rumps 메뉴는 처음 넣을 때의 제목을 키로 쓰므로 항목마다 그 키(menu_key)를 기억해 두고,
+        제목이 바뀐 항목은 키는 그대로 두고 제목만 고친다.
+        """
+        items = self.output_menu_items
+        wanted = {uid for uid, _, _ in rows}
+        for uid in [uid for uid in items if uid not in wanted]:
+            del output_menu[items.pop(uid).menu_key]
+
+        kept = [uid for uid, _, _ in rows if uid in items]
+        if kept != list(items) or any(uid not in items and label in output_menu for uid, label, _ in rows):
+            # 이름이 바뀌어 순서가 달라졌거나 새 제목이 남아 있는 키와 겹치면 장치 항목만 다시 만든다.
+            for item in items.values():
+                del output_menu[item.menu_key]
+            items.clear()
+
+        first_key = next(iter(items.values())).menu_key if items else None
+        reconciled = {}
+        previous_key = None
+        for uid, label, state in rows:
+            item = items.get(uid)
+            if item is None:
+                item = rumps.MenuItem(label, callback=self.select_manual_output)
+                item.output_uid = uid
+                item.menu_key = label
+                if previous_key is not None:
+                    output_menu.insert_after(previous_key, item)
+                elif first_key is not None:
+                    output_menu.insert_before(first_key, item)
+                else:
+                    output_menu.add(item)
+            set_menu_item(item, label, state)
+            reconciled[uid] = item
+            previous_key = item.menu_key
+        self.output_menu_items = reconciled
+
+    def poll_stream_stats(self, _sender):
+        snapshot = self.service.poll_stats()
+        if not self.service.is_running:
+            self.status_item.title = STATS_IDLE_TITLE
+        elif snapshot is not None:
+            self.status_item.title = f"상태: {snapshot.summary()}"
+
+    def select_latency_profile(self, sender):
+        self.service.set_latency_profile(sender.latency_profile)
+        self.sync_latency_menu()
+
+    def sync_latency_menu(self):
+        for item in self.menu["지연 모드"].values():
+            item.state = item.latency_profile == self.service.latency_profile
 
     def sync_processing_ui(self):
         toggle_item = self.menu["야간 모드 시작"]
-        if self.is_running:
+        if self.service.is_running:
             toggle_item.title = "정지 (작동 중)"
             toggle_item.state = True
             self.icon = resource_path("menu_icon_on.png")
@@ -434,78 +309,74 @@ class NightModeApp(rumps.App):
         self.title = None
 
     def toggle_processing(self, _):
-        if self.is_running:
-            self.stop_processing()
-        else:
-            self.start_processing()
+        self.service.toggle_processing()
 
-    def set_output_mode(self, mode: str):
-        self.output_mode = mode
-        self.menu["출력 장치 모드"]["자동"].state = mode == OUTPUT_MODE_AUTO
-        self.menu["출력 장치 모드"]["수동"].state = mode == OUTPUT_MODE_MANUAL
-        self.refresh_output_menu(self.device_manager.list_output_devices())
-        if self.is_running:
-            self.start_processing(restart=True)
-        self.save_config()
+    def sync_output_mode_menu(self):
+        self.menu["출력 장치 모드"]["자동"].state = self.service.output_mode == OUTPUT_MODE_AUTO
+        self.menu["출력 장치 모드"]["수동"].state = self.service.output_mode == OUTPUT_MODE_MANUAL
 
     def set_output_mode_auto(self, _):
-        self.set_output_mode(OUTPUT_MODE_AUTO)
+        self.service.set_output_mode(OUTPUT_MODE_AUTO)
 
     def set_output_mode_manual(self, _):
-        self.set_output_mode(OUTPUT_MODE_MANUAL)
+        self.service.set_output_mode(OUTPUT_MODE_MANUAL)
 
     def select_auto_output(self, _):
-        self.set_output_mode(OUTPUT_MODE_AUTO)
+        self.service.set_output_mode(OUTPUT_MODE_AUTO)
 
     def select_manual_output(self, sender):
-        self.manual_output_uid = getattr(sender, "output_uid", None)
-        self.output_mode = OUTPUT_MODE_MANUAL
-        self.menu["출력 장치 모드"]["자동"].state = False
-        self.menu["출력 장치 모드"]["수동"].state = True
-        self.refresh_output_menu(self.device_manager.list_output_devices())
-        if self.is_running:
-            self.start_processing(restart=True)
-        self.save_config()
-
-    def set_threshold(self, db: float, item_title: str):
-        self.threshold_db = db
-        for item in self.menu["압축 강도 (Threshold)"].values():
-            item.state = item.title == item_title
-        self.audio_router.configure(self.threshold_db, self.makeup_gain_db, self.ratio)
-        self.save_config()
+        self.service.select_output(getattr(sender, "output_uid", None))
 
-    def set_gain(self, db: float, item_title: str):
-        self.makeup_gain_db = db
+    def sync_profile_menu(self):
+        profile = self.service.profile
+        threshold_title = THRESHOLD_TITLES.get(profile.threshold_db, THRESHOLD_TITLES[-20.0])
+        gain_title = GAIN_TITLES.get(profile.makeup_gain_db, GAIN_TITLES[10.0])
+        for item in self.menu["압축 강도 (Threshold)"].values():
+            item.state = item.title == threshold_title
         for item in self.menu["볼륨 증폭 (Gain)"].values():
-            item.state = item.title == item_title
-        self.audio_router.configure(self.threshold_db, self.makeup_gain_db, self.ratio)
-        self.save_config()
+            item.state = item.title == gain_title
+
+    def set_threshold(self, db: float):
+        self.service.update_profile(threshold_db=db)
+
+    def set_gain(self, db: float):
+        self.service.update_profile(makeup_gain_db=db)
+
+    def toggle_limiter(self, sender):
+        self.service.set_limiter(not sender.state)
+        sender.state = self.service.limiter_enabled
 
-    def set_threshold_weak(self, sender):
-        self.set_threshold(-10.0, sender.title)
+    def set_threshold_weak(self, _):
+        self.set_threshold(-10.0)
 
-    def set_threshold_normal(self, sender):
-        self.set_threshold(-20.0, sender.title)
+    def set_threshold_normal(self, _):
+        self.set_threshold(-20.0)
 
-    def set_threshold_strong(self, sender):
-        self.set_threshold(-30.0, sender.title)
+    def set_threshold_strong(self, _):
+        self.set_threshold(-30.0)
 
-    def set_gain_low(self, sender):
-        self.set_gain(0.0, sender.title)
+    def set_gain_low(self, _):
+        self.set_gain(0.0)
 
-    def set_gain_normal(self, sender):
-        self.set_gain(10.0, sender.title)
+    def set_gain_normal(self, _):
+        self.set_gain(10.0)
 
-    def set_gain_high(self, sender):
-        self.set_gain(20.0, sender.title)
+    def set_gain_high(self, _):
+        self.set_gain(20.0)
 
     def quit_app(self, _):
-        self.audio_router.stop()
-        self.device_manager.stop()
+        self.service.shutdown()
         rumps.quit_application()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     logging.info("Starting application...")
-    app = NightModeApp()
+    try:
+        app = NightModeApp()
+    except EngineLockedError as exc:
+        # 데몬이 이미 같은 설정과 장치를 쓰고 있다.
+        logging.error(str(exc))
+        rumps.alert("야간 모드", f"이미 실행 중인 야간 모드 엔진이 있어 시작하지 않습니다.\n{exc}")
+        sys.exit(1)
     app.run()
@@ -0,0 +1,248 @@
+"""실시간 엔진과 같은 처리 체인으로 오디오 파일을 미리 처리하는 오프라인 렌더러.
+
+사용 예:
+    python3 night_mode_render.py podcast.flac
+    python3 night_mode_render.py ~/Shows -o ~/Shows/night --jobs 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from dsp_engine import ProcessingChain
+
+
+AUDIO_SUFFIXES = {".wav", ".flac"}
+DEFAULT_CHUNK_FRAMES = 65536
+OUTPUT_SUFFIX = ".night"
+
+
+@dataclass(frozen=True, slots=True)
+class RenderSettings:
+    threshold_db: float = -20.0
+    makeup_gain_db: float = 10.0
+    ratio: float = 4.0
+    attack_ms: float = 5.0
+    release_ms: float = 150.0
+    limiter_enabled: bool = True
+    lookahead_ms: float = 1.5
+    chunk_frames: int = DEFAULT_CHUNK_FRAMES
+
+    def build_chain(self) -> ProcessingChain:
+        return ProcessingChain(
+            self.threshold_db,
+            self.makeup_gain_db,
+            self.ratio,
+            self.attack_ms,
+            self.release_ms,
+            self.limiter_enabled,
+            self.lookahead_ms,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RenderResult:
+    source: Path
+    destination: Path
+    frames: int
+    samplerate: int
+    elapsed: float
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.samplerate
+
+    @property
+    def realtime_factor(self) -> float:
+        return self.duration / self.elapsed if self.elapsed > 0 else float("inf")
+
+
+def load_live_settings(config_path: Path) -> dict:
+    """메뉴바 앱 설정 파일에서 현재 쓰는 처리 값을 읽는다."""
+    if not config_path.exists():
+        return {}
+    try:
+        with open(config_path, "r") as handle:
+            config = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+    mapping = {
+        "threshold_db": "threshold_db",
+        "makeup_gain_db": "makeup_gain_db",
+        "limiter_enabled": "limiter_enabled",
+        "limiter_lookahead_ms": "lookahead_ms",
+    }
+    return {field: config[key] for key, field in mapping.items() if key in config}
+
+
+def render_file(source: Path, destination: Path, settings: RenderSettings) -> RenderResult:
+    """파일을 chunk_frames 단위로 읽고 처리해서 쓴다. 파일 전체를 메모리에 올리지 않는다."""
+    import soundfile as sf
+
+    started = time.perf_counter()
+    with sf.SoundFile(source) as reader:
+        channels = reader.channels
+        samplerate = reader.samplerate
+        chunk = settings.chunk_frames
+        chain = settings.build_chain()
+        chain.prepare(chunk, channels, samplerate)
+
+        inbuf = np.zeros((chunk, channels), dtype=np.float32)
+        outbuf = np.zeros((chunk, channels), dtype=np.float32)
+        # 리미터 룩어헤드만큼 앞부분을 버리고 끝에 같은 길이를 밀어내서 정렬을 맞춘다.
+        skip = chain.latency_frames
+        total_frames = 0
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with sf.SoundFile(
+            destination,
+            "w",
+            samplerate=samplerate,
+            channels=channels,
+            format=reader.format,
+            subtype=reader.subtype,
+        ) as writer:
+
+            def emit(processed: np.ndarray):
+                nonlocal skip
+                if skip >= processed.shape[0]:
+                    skip -= processed.shape[0]
+                    return
+                writer.write(processed[skip:])
+                skip = 0
+
+            while True:
+                block = reader.read(chunk, dtype="float32", always_2d=True, out=inbuf)
+                frames = block.shape[0]
+                if frames == 0:
+                    break
+                total_frames += frames
+                chain.process(block, outbuf[:frames])
+                emit(outbuf[:frames])
+
+            pending = chain.latency_frames
+            while pending > 0:
+                frames = min(pending, chunk)
+                silence = inbuf[:frames]
+                silence.fill(0.0)
+                chain.process(silence, outbuf[:frames])
+                emit(outbuf[:frames])
+                pending -= frames
+
+    return RenderResult(source, destination, total_frames, samplerate, time.perf_counter() - started)
+
+
+def collect_sources(paths: list[Path]) -> list[Path]:
+    sources: list[Path] = []
+    for path in paths:
+        if path.is_dir():
+            sources.extend(
+                sorted(
+                    child
+                    for child in path.iterdir()
+                    if child.is_file()
+                    and child.suffix.lower() in AUDIO_SUFFIXES
+                    and not child.stem.endswith(OUTPUT_SUFFIX)
+                )
+            )
+        elif path.suffix.lower() in AUDIO_SUFFIXES:
+            sources.append(path)
+        else:
+            print(f"지원하지 않는 파일 건너뜀: {path}", file=sys.stderr)
+    return sources
+
+
+def destination_for(source: Path, output_dir: Path | None) -> Path:
+    name = f"{source.stem}{OUTPUT_SUFFIX}{source.suffix}"
+    return (output_dir or source.parent) / name
+
+
+def print_result(result: RenderResult):
+    print(
+        f"{result.source.name} → {result.destination}  "
+        f"{result.duration:.1f}s 오디오 / {result.elapsed:.2f}s 처리 "
+        f"({result.realtime_factor:.1f}x 실시간)"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="야간 모드 처리를 WAV/FLAC 파일에 오프라인으로 적용")
+    parser.add_argument("inputs", type=Path, nargs="+", help="파일 또는 디렉터리")
+    parser.add_argument("-o", "--output-dir", type=Path, default=None)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--config", type=Path, default=Path.home() / ".night_mode_config.json")
+    parser.add_argument("--threshold", type=float, dest="threshold_db")
+    parser.add_argument("--gain", type=float, dest="makeup_gain_db")
+    parser.add_argument("--ratio", type=float)
+    parser.add_argument("--attack", type=float, dest="attack_ms")
+    parser.add_argument("--release", type=float, dest="release_ms")
+    parser.add_argument("--lookahead", type=float, dest="lookahead_ms")
+    parser.add_argument("--no-limiter", action="store_false", dest="limiter_enabled", default=None)
+    parser.add_argument("--chunk", type=int, dest="chunk_frames", default=DEFAULT_CHUNK_FRAMES)
+    args = parser.parse_args(argv)
+
+    try:
+        import soundfile  # noqa: F401
+    except ImportError:
+        print("soundfile 패키지가 필요합니다: pip install soundfile", file=sys.stderr)
+        return 2
+
+    values = load_live_settings(args.config)
+    for field in RenderSettings.__dataclass_fields__:
+        value = getattr(args, field, None)
+        if value is not None:
+            values[field] = value
+    settings = RenderSettings(**values)
+
+    sources = collect_sources(args.inputs)
+    if not sources:
+        print("처리할 파일이 없습니다.", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    results: list[RenderResult] = []
+    failed = 0
+    jobs = max(1, min(args.jobs, len(sources)))
+    if jobs == 1:
+        for source in sources:
+            try:
+                results.append(render_file(source, destination_for(source, args.output_dir), settings))
+            except Exception as exc:
+                failed += 1
+                print(f"{source} 처리 실패: {exc}", file=sys.stderr)
+                continue
+            print_result(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(render_file, source, destination_for(source, args.output_dir), settings): source
+                for source in sources
+            }
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as exc:
+                    failed += 1
+                    print(f"{futures[future]} 처리 실패: {exc}", file=sys.stderr)
+                    continue
+                print_result(results[-1])
+
+    elapsed = time.perf_counter() - started
+    audio_seconds = sum(result.duration for result in results)
+    print(
+        f"합계: 파일 {len(results)}개, {audio_seconds:.1f}s 오디오를 {elapsed:.2f}s에 처리 "
+        f"({audio_seconds / elapsed if elapsed > 0 else 0:.1f}x 실시간, 작업 {jobs}개)"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
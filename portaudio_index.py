@@ -0,0 +1,103 @@
+"""PortAudio 장치 목록 캐시.
+
+PortAudio는 초기화할 때만 장치를 열거하므로 목록은 _terminate()/_initialize()
+사이에서 바뀌지 않는다. 재초기화는 reinitialize()로만 하고 그때마다 세대 번호를
+올린다. snapshot()은 세대가 바뀌었을 때만 query_hostapis()/query_devices()를
+한 번씩 불러 다시 만들고, 그 밖에는 같은 스냅샷에서 O(1)로 찾는다.
+세대는 프로세스마다 따로 센다(오디오 워커는 자기 PortAudio를 가진다).
+PortAudio 모듈은 backend()로만 얻는다. 기본은 sounddevice를 처음 쓸 때
+불러오고, use_backend()로 fake_audio.FakePortAudio 같은 대체 구현을 넣을 수 있다.
+"""
+
+from dataclasses import dataclass
+
+
+CORE_AUDIO_HOSTAPI_NAME = "Core Audio"
+BLACKHOLE_NAME = "BlackHole"
+
+_generation = 0
+_snapshot: "PortAudioSnapshot | None" = None
+_backend = None
+
+
+@dataclass(frozen=True, slots=True)
+class PortAudioSnapshot:
+    generation: int
+    core_audio_hostapi: int | None
+    output_index_by_name: dict[str, int]
+    name_by_index: dict[int, str]
+    blackhole_input: int | None
+
+    def output_names(self) -> list[str]:
+        return list(self.output_index_by_name)
+
+
+def backend():
+    """sounddevice와 같은 인터페이스의 PortAudio 모듈."""
+    global _backend
+    if _backend is None:
+        import sounddevice
+
+        _backend = sounddevice
+    return _backend
+
+
+def use_backend(module):
+    """PortAudio 구현을 바꾼다. 캐시한 인덱스가 모두 무효가 되도록 세대를 올린다."""
+    global _backend, _generation
+    _backend = module
+    _generation += 1
+
+
+def generation() -> int:
+    return _generation
+
+
+def reinitialize():
+    """PortAudio를 재초기화해서 장치를 다시 열거한다. 열린 스트림이 없을 때만 부른다."""
+    global _generation
+    sd = backend()
+
+    try:
+        sd._terminate()
+        sd._initialize()
+    finally:
+        _generation += 1
+
+
+def snapshot() -> PortAudioSnapshot:
+    global _snapshot
+    if _snapshot is None or _snapshot.generation != _generation:
+        _snapshot = _build_snapshot(_generation)
+    return _snapshot
+
+
+def _build_snapshot(current_generation: int) -> PortAudioSnapshot:
+    sd = backend()
+
+    core_audio_hostapi = None
+    for index, hostapi in enumerate(sd.query_hostapis()):
+        if CORE_AUDIO_HOSTAPI_NAME in hostapi["name"]:
+            core_audio_hostapi = index
+            break
+
+    output_index_by_name: dict[str, int] = {}
+    name_by_index: dict[int, str] = {}
+    blackhole_input = None
+    for index, device in enumerate(sd.query_devices()):
+        name = device["name"]
+        name_by_index[index] = name
+        if blackhole_input is None and BLACKHOLE_NAME in name and device["max_input_channels"] > 0:
+            blackhole_input = index
+        if core_audio_hostapi is not None and device["hostapi"] != core_audio_hostapi:
+            continue
+        if device["max_output_channels"] > 0:
+            output_index_by_name.setdefault(name, index)
+
+    return PortAudioSnapshot(
+        generation=current_generation,
+        core_audio_hostapi=core_audio_hostapi,
+        output_index_by_name=output_index_by_name,
+        name_by_index=name_by_index,
+        blackhole_input=blackhole_input,
+    )
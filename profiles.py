@@ -0,0 +1,70 @@
+import math
+from dataclasses import dataclass, replace
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessingProfile:
+    """출력 장치 하나에 쓰는 컴프레서 값. 만들 때 범위를 검사하고 벗어나면 ValueError."""
+
+    threshold_db: float = -20.0
+    makeup_gain_db: float = 10.0
+    ratio: float = 4.0
+
+    def __post_init__(self):
+        for name in ("threshold_db", "makeup_gain_db", "ratio"):
+            if not math.isfinite(getattr(self, name)):
+                raise ValueError(f"{name}는 유한한 값이어야 함: {getattr(self, name)}")
+        if self.ratio < 1.0:
+            raise ValueError(f"ratio는 1 이상이어야 함: {self.ratio}")
+
+    def to_config(self) -> list:
+        return [self.threshold_db, self.makeup_gain_db, self.ratio]
+
+    @classmethod
+    def from_config(cls, value) -> "ProcessingProfile | None":
+        try:
+            threshold_db, makeup_gain_db, ratio = value
+            return cls(float(threshold_db), float(makeup_gain_db), float(ratio))
+        except (TypeError, ValueError):
+            return None
+
+    def replace(self, **changes) -> "ProcessingProfile":
+        return replace(self, **changes)
+
+
+class ProfileStore:
+    """출력 UID별 프로필. 따로 정한 적 없는 장치는 default를 쓴다.
+
+    조회는 UID dict 한 번이므로 전환 경로에서 불러도 된다.
+    """
+
+    def __init__(self, default: ProcessingProfile, profiles: dict | None = None):
+        self.default = default
+        self._by_uid: dict[str, ProcessingProfile] = {}
+        for uid, value in (profiles or {}).items():
+            profile = ProcessingProfile.from_config(value)
+            if profile is not None:
+                self._by_uid[uid] = profile
+
+    def get(self, uid: str | None) -> ProcessingProfile:
+        if uid is None:
+            return self.default
+        return self._by_uid.get(uid, self.default)
+
+    def has_own(self, uid: str | None) -> bool:
+        return uid in self._by_uid
+
+    def update(self, uid: str | None, **changes) -> ProcessingProfile:
+        """uid가 None이면 기본 프로필을 고친다."""
+        profile = self.get(uid).replace(**changes)
+        if uid is None:
+            self.default = profile
+        else:
+            self._by_uid[uid] = profile
+        return profile
+
+    def reset(self, uid: str):
+        self._by_uid.pop(uid, None)
+
+    def export(self) -> dict[str, list]:
+        return {uid: profile.to_config() for uid, profile in self._by_uid.items()}
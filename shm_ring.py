@@ -0,0 +1,58 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedRing:
+    """shared_memory 위의 단일 작성자 고정 크기 레코드 링 버퍼.
+
+    레이아웃: [seq: int64][slots x fields float64]. 작성자는 슬롯을 채운 뒤
+    seq를 올리고, 읽는 쪽은 seq를 보고 가장 최근 슬롯을 복사한다. 복사하는
+    동안 작성자가 링을 한 바퀴 돌았으면 다시 읽는다.
+    세그먼트는 만든 쪽(owner)만 unlink한다. 붙는 쪽은 spawn 자식이라 부모와
+    같은 resource_tracker를 공유하므로 따로 등록 해제하지 않는다.
+    """
+
+    def __init__(self, fields: int, slots: int = 64, name: str | None = None):
+        self.fields = fields
+        self.slots = slots
+        self.owner = name is None
+        size = 8 + slots * fields * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self._seq = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self._data = np.ndarray((slots, fields), dtype=np.float64, buffer=self.shm.buf, offset=8)
+        if self.owner:
+            self._seq[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def sequence(self) -> int:
+        return int(self._seq[0])
+
+    def write(self, values: np.ndarray):
+        seq = int(self._seq[0])
+        np.copyto(self._data[seq % self.slots], values)
+        self._seq[0] = seq + 1
+
+    def latest(self, out: np.ndarray) -> bool:
+        for _ in range(3):
+            seq = int(self._seq[0])
+            if seq == 0:
+                return False
+            np.copyto(out, self._data[(seq - 1) % self.slots])
+            if int(self._seq[0]) - seq < self.slots - 1:
+                return True
+        return False
+
+    def close(self):
+        self._seq = None
+        self._data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,30 @@
+"""시작 단계별 소요 시간 기록."""
+
+import logging
+import threading
+import time
+
+
+class StartupTimer:
+    """단계마다 걸린 시간과 시작부터의 누적 시간을 로그로 남긴다.
+
+    since를 주지 않으면 직전 mark부터 잰다. 다른 스레드에서 나란히 도는 단계는
+    자기 시작 시각을 since로 넘긴다. phases에 단계별 밀리초가 남는다.
+    """
+
+    def __init__(self, logger: logging.Logger, started: float | None = None):
+        self.logger = logger
+        self.started = time.perf_counter() if started is None else started
+        self.phases: dict[str, float] = {}
+        self._last = self.started
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str, since: float | None = None) -> float:
+        now = time.perf_counter()
+        with self._lock:
+            elapsed_ms = (now - (self._last if since is None else since)) * 1e3
+            if since is None:
+                self._last = now
+            self.phases[phase] = elapsed_ms
+        self.logger.info(f"시작 단계 {phase}: {elapsed_ms:.0f}ms (누적 {(now - self.started) * 1e3:.0f}ms)")
+        return elapsed_ms
@@ -0,0 +1,309 @@
+"""PortAudio 수명 주기를 메인 스레드 밖에서 처리하는 스트림 컨트롤러.
+
+스트림 열기/재시작/정지, PortAudio 재초기화와 재시도 대기는 모두 이 스레드가
+맡는다. 메뉴바 스레드는 요청만 넣고 바로 돌아가며, 결과는 post(기본
+AppHelper.callAfter)로 UI 스레드에 돌아온다. 아직 처리하지 않은 스트림 요청은
+새 요청이 오면 버려지므로 장치가 연달아 바뀌어도 마지막 대상만 연다.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import portaudio_index
+from latency_tuner import LatencySetting
+from profiles import ProcessingProfile
+
+
+STATE_IDLE = "idle"
+STATE_OPENING = "opening"
+STATE_RUNNING = "running"
+STATE_RECOVERING = "recovering"
+
+RECOVERY_ATTEMPTS = 3
+RECOVERY_DELAY = 0.2
+
+_PREPARE = "prepare"
+_STREAM = "stream"
+_STANDBY = "standby"
+
+
+@dataclass(frozen=True, slots=True)
+class StreamRequest:
+    serial: int
+    uid: str | None = None
+    name: str | None = None
+    setting: LatencySetting | None = None
+    restart: bool = False
+    profile: ProcessingProfile | None = None
+
+    @property
+    def is_stop(self) -> bool:
+        return self.uid is None
+
+
+@dataclass(frozen=True, slots=True)
+class StreamResult:
+    request: StreamRequest
+    success: bool
+    state: str
+    output_index: int | None
+    output_name: str | None
+    elapsed: float
+    switch_gap_ms: float | None = None
+    recovered: bool = False
+    profile_ms: float | None = None
+
+
+class StreamController:
+    """idle → opening → running, 실패하면 recovering을 거쳐 running 또는 idle.
+
+    engine은 AudioRouter나 AudioWorkerClient. 엔진 호출은 전부 이 스레드에서만
+    하므로 메인 스레드는 엔진 잠금을 기다리지 않는다. 설정 변경(configure 등)도
+    call()로 같은 큐에 넣고, 같은 이름의 대기 중 호출은 마지막 것만 남긴다.
+    """
+
+    def __init__(
+        self,
+        engine,
+        resolve_sd_index: Callable[[str], int | None],
+        logger: logging.Logger,
+        on_result: Callable[[StreamResult], None],
+        post: Callable | None = None,
+    ):
+        self.engine = engine
+        self.resolve_sd_index = resolve_sd_index
+        self.logger = logger
+        self.on_result = on_result
+        if post is None:
+            from PyObjCTools import AppHelper
+
+            post = AppHelper.callAfter
+        self.post = post
+        self.state = STATE_IDLE
+        self._queue: deque[tuple[str, object]] = deque()
+        self._active: str | None = None
+        self._condition = threading.Condition()
+        self._serial = 0
+        self._stopping = False
+        self._recovered = False
+        self._thread = threading.Thread(target=self._run, name="stream-controller", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        """처리 중이거나 대기 중인 작업이 있으면 True. 이때 엔진을 직접 부르면 기다리게 된다.
+
+        스트림 요청뿐 아니라 call()(예: 백엔드 교체 컴파일)과 대기 풀 갱신도 엔진 잠금을
+        오래 잡으므로 모두 센다.
+        """
+        with self._condition:
+            pending = self._active is not None or bool(self._queue)
+        return pending or self.state in (STATE_OPENING, STATE_RECOVERING)
+
+    def prepare(self, create_engine: Callable[[], object], on_ready: Callable[[object], None]):
+        """엔진을 이 스레드에서 만들고 준비되면 on_ready(engine)를 post로 알린다.
+
+        engine=None으로 만든 직후, 다른 호출보다 먼저 넣는다. 뒤에 넣은 호출은 엔진이
+        준비된 다음에 차례로 돈다. 실패하면 on_ready(None).
+        """
+        self._submit(_PREPARE, (create_engine, on_ready))
+
+    def open(
+        self,
+        uid: str,
+        name: str,
+        setting: LatencySetting,
+        restart: bool,
+        profile: ProcessingProfile | None = None,
+    ) -> int:
+        """profile은 새 출력에만 넣는다. 열려 있는 출력은 전환이 끝날 때까지 이전 값을 쓴다."""
+        with self._condition:
+            self._serial += 1
+            request = StreamRequest(self._serial, uid, name, setting, restart, profile)
+        self._submit(_STREAM, request)
+        return request.serial
+
+    def close(self) -> int:
+        with self._condition:
+            self._serial += 1
+            request = StreamRequest(self._serial)
+        self._submit(_STREAM, request)
+        return request.serial
+
+    def standby(self, candidates: list[tuple[str, str]]):
+        """(uid, 이름) 후보를 sd_index로 바꿔 엔진 대기 풀에 넘긴다. 빈 목록이면 풀을 비운다."""
+        self._submit(_STANDBY, candidates)
+
+    def call(self, method: str, *args):
+        """엔진 메서드를 컨트롤러 스레드에서 부른다. 결과는 돌려주지 않는다."""
+        self._submit(method, args)
+
+    def shutdown(self, timeout: float = 5.0):
+        """이미 넣은 요청까지 처리하고 스레드를 끝낸다."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _submit(self, key: str, payload):
+        with self._condition:
+            for index, (queued_key, queued) in enumerate(self._queue):
+                if queued_key == key:
+                    del self._queue[index]
+                    if key == _STREAM:
+                        self.logger.debug(f"스트림 요청 대체: #{queued.serial} → #{payload.serial}")
+                    break
+            self._queue.append((key, payload))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._active = None
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if not self._queue:
+                    break
+                key, payload = self._queue.popleft()
+                self._active = key
+            try:
+                if key == _PREPARE:
+                    self._handle_prepare(*payload)
+                elif key == _STREAM:
+                    self._handle_stream(payload)
+                elif key == _STANDBY:
+                    self._handle_standby(payload)
+                else:
+                    getattr(self.engine, key)(*payload)
+            except Exception:
+                self.logger.exception(f"스트림 컨트롤러 작업 실패: {key}")
+
+    def _handle_prepare(self, create_engine: Callable[[], object], on_ready: Callable[[object], None]):
+        try:
+            self.engine = create_engine()
+        except Exception:
+            self.logger.exception("오디오 엔진 준비 실패")
+            self.engine = None
+        self.post(on_ready, self.engine)
+
+    def _handle_stream(self, request: StreamRequest):
+        started = time.perf_counter()
+        self._recovered = False
+        if request.is_stop:
+            self.engine.stop()
+            self.state = STATE_IDLE
+            success = True
+        else:
+            success = self._open(request)
+        result = StreamResult(
+            request=request,
+            success=success,
+            state=self.state,
+            output_index=self.engine.current_output_index,
+            output_name=self.engine.current_output_name,
+            elapsed=time.perf_counter() - started,
+            switch_gap_ms=self.engine.last_switch_gap_ms if success and request.restart else None,
+            recovered=self._recovered,
+            profile_ms=self.engine.last_profile_ms if success and request.profile is not None else None,
+        )
+        self.logger.info(
+            f"스트림 요청 #{request.serial} 완료: success={success} state={self.state} "
+            f"name={result.output_name} {result.elapsed * 1e3:.0f}ms"
+        )
+        self.post(self.on_result, result)
+
+    def _handle_standby(self, candidates: list[tuple[str, str]]):
+        if self.state != STATE_RUNNING:
+            return
+        resolved = []
+        for uid, name in candidates:
+            sd_index = self.resolve_sd_index(uid)
+            if sd_index is not None:
+                resolved.append((sd_index, name))
+        names = self.engine.set_standby(resolved)
+        self.logger.debug(f"대기 출력: {names}")
+
+    def _open(self, request: StreamRequest) -> bool:
+        was_running = self.state == STATE_RUNNING
+        restart = request.restart or was_running
+        self.state = STATE_OPENING
+        self.engine.set_latency_setting(request.setting)
+        profile = request.profile
+        if profile is not None:
+            self.engine.set_profile(profile.threshold_db, profile.makeup_gain_db, profile.ratio)
+
+        sd_index = self.resolve_sd_index(request.uid)
+        if sd_index is None and self.engine.is_running:
+            # 재초기화는 열린 스트림을 죽인다. 스트림을 가진 프로세스의 엔진이 이름으로 찾고
+            # 목록에 없으면 기존 스트림을 닫은 뒤 직접 재열거한다.
+            self.logger.debug(f"'{request.name}' sounddevice 미발견 - 엔진이 이름으로 다시 찾는다")
+        elif sd_index is None:
+            self.logger.debug(f"'{request.name}' sounddevice 미발견 - PortAudio 재초기화 시도")
+            sd_index = self._recover_index(request)
+            if sd_index is None:
+                return self._fail(was_running)
+
+        # 엔진이 전환에 실패하고 기존 출력으로 되돌렸으면 성공으로 돌아오므로 이름으로 확인한다.
+        if self._start(sd_index, request.name, restart) and self.engine.current_output_name == request.name:
+            self.state = STATE_RUNNING
+            return True
+
+        # 새 장치라 인덱스가 없어서 하는 재초기화와 달리, 열기 실패 뒤의 재초기화는 장치 탓으로 기록한다.
+        self._recovered = True
+        if self.engine.is_running:
+            self.logger.debug("오디오 스트림 전환 실패 - 엔진이 기존 스트림을 닫고 재열거한 뒤 재시도")
+            self.state = STATE_RECOVERING
+            if not self._superseded() and self._start(sd_index, request.name, restart, reenumerate=True):
+                self.state = STATE_RUNNING
+                return True
+            return self._fail(was_running)
+
+        self.logger.debug("오디오 스트림 시작 실패 - PortAudio 재초기화 후 재시도")
+        sd_index = self._recover_index(request)
+        if sd_index is not None and self._start(sd_index, request.name, restart):
+            self.state = STATE_RUNNING
+            return True
+        return self._fail(was_running)
+
+    def _start(self, sd_index: int | None, name: str, restart: bool, reenumerate: bool = False) -> bool:
+        if restart or reenumerate:
+            return bool(self.engine.restart(sd_index, name, reenumerate))
+        return bool(self.engine.start(sd_index, name))
+
+    def _recover_index(self, request: StreamRequest) -> int | None:
+        """이 프로세스의 PortAudio를 재초기화해 인덱스를 다시 찾는다. 엔진 스트림이 없을 때만 부른다."""
+        self.state = STATE_RECOVERING
+        for attempt in range(RECOVERY_ATTEMPTS):
+            if self._superseded():
+                return None
+            try:
+                portaudio_index.reinitialize()
+            except Exception:
+                self.logger.exception("PortAudio 재초기화 실패")
+                return None
+            sd_index = self.resolve_sd_index(request.uid)
+            if sd_index is not None:
+                return sd_index
+            if attempt < RECOVERY_ATTEMPTS - 1:
+                time.sleep(RECOVERY_DELAY)
+        self.logger.error(
+            f"PortAudio 재초기화 후에도 sounddevice 인덱스 변환 실패: uid={request.uid} name={request.name}"
+        )
+        return None
+
+    def _superseded(self) -> bool:
+        with self._condition:
+            return any(key == _STREAM for key, _ in self._queue) or self._stopping
+
+    def _fail(self, was_running: bool) -> bool:
+        # 재시작 실패는 엔진이 기존 출력으로 되돌렸을 수 있다. 새로 여는 중이었으면 정리한다.
+        if was_running and self.engine.current_output_index is not None:
+            self.state = STATE_RUNNING
+        else:
+            self.engine.stop()
+            self.state = STATE_IDLE
+        return False
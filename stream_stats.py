@@ -0,0 +1,151 @@
+import bisect
+from dataclasses import dataclass
+
+
+# 콜백 처리 시간 히스토그램 경계(초). 마지막 버킷은 마지막 경계 초과.
+DURATION_BUCKET_EDGES = (
+    50e-6,
+    100e-6,
+    250e-6,
+    500e-6,
+    1e-3,
+    2e-3,
+    4e-3,
+    8e-3,
+    16e-3,
+    32e-3,
+)
+
+XRUN_KINDS = ("input_underflow", "input_overflow", "output_underflow", "output_overflow")
+
+@dataclass(frozen=True, slots=True)
+class StatsSnapshot:
+    blocks: int
+    xrun_blocks: int
+    xruns: dict[str, int]
+    histogram: tuple[int, ...]
+    mean_duration: float
+    max_duration: float
+    dac_gap_last: float
+    dac_gap_max: float
+    deadline: float
+    cpu_load: float | None = None
+
+    @property
+    def max_load(self) -> float:
+        return self.max_duration / self.deadline if self.deadline > 0 else 0.0
+
+    def duration_percentile(self, percentile: float) -> float:
+        """히스토그램 버킷 상한으로 근사한 처리 시간 백분위수(초)."""
+        total = sum(self.histogram)
+        if total == 0:
+            return 0.0
+        target = total * percentile / 100
+        running = 0
+        for index, count in enumerate(self.histogram):
+            running += count
+            if running >= target:
+                if index < len(DURATION_BUCKET_EDGES):
+                    return DURATION_BUCKET_EDGES[index]
+                return self.max_duration
+        return self.max_duration
+
+    def summary(self) -> str:
+        cpu = f"CPU {self.cpu_load * 100:.0f}%" if self.cpu_load is not None else "CPU -"
+        return (
+            f"{cpu} · xrun {self.xrun_blocks} · "
+            f"콜백 p99≤{self.duration_percentile(99) * 1e3:.2f}ms "
+            f"max {self.max_duration * 1e3:.2f}ms / {self.deadline * 1e3:.1f}ms"
+        )
+
+
+class _Window:
+    """take_window_max() 사이의 최대 처리 시간. 창을 통째로 바꿔 끼워서 넘긴다."""
+
+    __slots__ = ("max_duration",)
+
+    def __init__(self):
+        self.max_duration = 0.0
+
+
+class StreamStats:
+    """오디오 콜백 계측. 값은 파이썬 int/float 속성에 누적한다.
+
+    record()는 오디오 스레드에서, snapshot()/take_window_max()는 메인 스레드에서
+    부른다. numpy 배열 원소를 고치면 호출마다 numpy 스칼라 객체가 생기므로 쓰지
+    않는다. 각 값은 독립적으로 갱신되므로 스냅샷이 블록 경계와 정확히 맞지
+    않을 수 있지만 잠금 없이 읽는다. 창 최대값은 읽고 0으로 되돌리는 대신 새 창
+    객체로 참조 하나만 바꾸므로 그 사이에 기록된 값을 잃지 않는다.
+    """
+
+    def __init__(self):
+        self._edges = list(DURATION_BUCKET_EDGES)
+        self.reset(0.0)
+
+    def reset(self, deadline: float):
+        self.blocks = 0
+        self.xrun_blocks = 0
+        self.input_underflow = 0
+        self.input_overflow = 0
+        self.output_underflow = 0
+        self.output_overflow = 0
+        self._histogram = [0] * (len(DURATION_BUCKET_EDGES) + 1)
+        self._duration_total = 0.0
+        self._duration_max = 0.0
+        self._dac_gap_last = 0.0
+        self._dac_gap_max = 0.0
+        self._window = _Window()
+        self.deadline = deadline
+
+    def record(self, elapsed: float, time_info, status):
+        self.blocks += 1
+        self._histogram[bisect.bisect_right(self._edges, elapsed)] += 1
+        self._duration_total += elapsed
+        if elapsed > self._duration_max:
+            self._duration_max = elapsed
+        window = self._window
+        if elapsed > window.max_duration:
+            window.max_duration = elapsed
+
+        if time_info is not None:
+            gap = time_info.outputBufferDacTime - time_info.currentTime
+            self._dac_gap_last = gap
+            if gap > self._dac_gap_max:
+                self._dac_gap_max = gap
+
+        if status:
+            xrun = False
+            if status.input_underflow:
+                self.input_underflow += 1
+                xrun = True
+            if status.input_overflow:
+                self.input_overflow += 1
+                xrun = True
+            if status.output_underflow:
+                self.output_underflow += 1
+                xrun = True
+            if status.output_overflow:
+                self.output_overflow += 1
+                xrun = True
+            if xrun:
+                self.xrun_blocks += 1
+
+    def take_window_max(self) -> float:
+        window = self._window
+        self._window = _Window()
+        return window.max_duration
+
+    def snapshot(self, cpu_load: float | None = None) -> StatsSnapshot:
+        blocks = self.blocks
+        return StatsSnapshot(
+            blocks=blocks,
+            xrun_blocks=self.xrun_blocks,
+            xruns={kind: getattr(self, kind) for kind in XRUN_KINDS},
+            histogram=tuple(self._histogram),
+            mean_duration=self._duration_total / blocks if blocks else 0.0,
+            max_duration=self._duration_max,
+            dac_gap_last=self._dac_gap_last,
+            dac_gap_max=self._dac_gap_max,
+            deadline=self.deadline,
+            cpu_load=cpu_load,
+        )
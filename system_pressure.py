@@ -0,0 +1,54 @@
+"""메모리/CPU 압박 판정.
+
+대기 스트림처럼 없어도 되는 자원은 시스템이 바쁠 때 먼저 내려놓는다. 메모리는
+macOS 커널의 메모리 압박 단계(kern.memorystatus_vm_pressure_level)를, CPU는
+활성 스트림의 PortAudio cpu_load와 코어당 load average를 본다.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import sys
+
+
+MEMORY_PRESSURE_NORMAL = 1
+MEMORY_PRESSURE_WARN = 2
+MEMORY_PRESSURE_CRITICAL = 4
+STREAM_CPU_LOAD_LIMIT = 0.6
+LOAD_AVERAGE_PER_CORE_LIMIT = 0.9
+
+_libc = None
+
+
+def memory_pressure_level() -> int:
+    """macOS가 아니거나 읽지 못하면 MEMORY_PRESSURE_NORMAL."""
+    global _libc
+    if sys.platform != "darwin":
+        return MEMORY_PRESSURE_NORMAL
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    value = ctypes.c_int(0)
+    size = ctypes.c_size_t(ctypes.sizeof(value))
+    if _libc.sysctlbyname(b"kern.memorystatus_vm_pressure_level", ctypes.byref(value), ctypes.byref(size), None, 0):
+        return MEMORY_PRESSURE_NORMAL
+    return value.value
+
+
+def load_average_per_core() -> float:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return 0.0
+
+
+def pressure_reason(stream_cpu_load: float | None = None) -> str | None:
+    """압박이 높으면 사유 문자열, 아니면 None."""
+    level = memory_pressure_level()
+    if level >= MEMORY_PRESSURE_WARN:
+        return f"메모리 압박 단계 {level}"
+    if stream_cpu_load is not None and stream_cpu_load >= STREAM_CPU_LOAD_LIMIT:
+        return f"스트림 cpu_load {stream_cpu_load:.2f}"
+    load = load_average_per_core()
+    if load >= LOAD_AVERAGE_PER_CORE_LIMIT:
+        return f"코어당 load average {load:.2f}"
+    return None
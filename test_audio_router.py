@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+
+import portaudio_index
+from audio_router import SWITCH_RESTART, AudioRouter
+from fake_audio import FakeHAL, FakePortAudio
+
+SPEAKERS = "MacBook Pro Speakers"
+HEADPHONES = "AirPods Pro"
+
+
+@pytest.fixture
+def hal():
+    hal = FakeHAL()
+    hal.blackhole()
+    hal.builtin(name=SPEAKERS)
+    return hal
+
+
+@pytest.fixture
+def portaudio(hal):
+    portaudio = FakePortAudio(hal)
+    portaudio_index.use_backend(portaudio)
+    yield portaudio
+    portaudio_index.use_backend(None)
+
+
+@pytest.fixture
+def router(portaudio):
+    router = AudioRouter(logging.getLogger("test_audio_router"))
+    assert router.start(portaudio_index.snapshot().output_index_by_name[SPEAKERS], SPEAKERS)
+    yield router
+    router.stop()
+
+
+def test_restart_to_device_connected_after_enumeration(hal, portaudio, router):
+    """열거 뒤에 연결된 장치로 바꾸면 기존 스트림을 닫고 재초기화해서 연다."""
+    hal.add_device("AirPods-UID", HEADPHONES)
+    assert HEADPHONES not in portaudio_index.snapshot().output_index_by_name
+
+    assert router.restart(None, HEADPHONES)
+
+    assert router.current_output_name == HEADPHONES
+    assert router.last_switch.mode == SWITCH_RESTART
+    assert portaudio.calls["initialize"] == 1
+    assert portaudio.calls["terminated_open_streams"] == 0
+    speakers = [stream for stream in portaudio.streams if stream.name == SPEAKERS]
+    assert speakers and not any(stream.active for stream in speakers)
+
+
+def test_standby_skips_device_missing_from_enumeration(hal, portaudio, router):
+    router.configure_standby(1, warm=True)
+    hal.add_device("AirPods-UID", HEADPHONES)
+
+    assert router.set_standby([(99, HEADPHONES)]) == []
+    assert portaudio.calls["initialize"] == 0
+    assert router.current_output_name == SPEAKERS
@@ -0,0 +1,37 @@
+from auto_selector import XRUN_MIN_BLOCKS, AutoSelector
+from coreaudio_hal import kAudioDeviceTransportTypeBuiltIn
+from device_manager import DeviceInfo
+from fake_audio import TRANSPORT_USB
+
+NOW = 1_000_000.0
+
+
+def make_device(object_id: int, uid: str, transport_type: int = TRANSPORT_USB) -> DeviceInfo:
+    return DeviceInfo(object_id, uid, uid, "", transport_type, True, True)
+
+
+HEADPHONES = make_device(1, "USBHeadphones")
+SPEAKERS = make_device(2, "BuiltInSpeakerDevice", kAudioDeviceTransportTypeBuiltIn)
+
+
+def make_selector() -> AutoSelector:
+    selector = AutoSelector(recent_connected=[HEADPHONES.uid], clock=lambda: NOW)
+    selector.note_open(HEADPHONES.uid, 0.05, True)
+    selector.note_xruns(HEADPHONES.uid, int(XRUN_MIN_BLOCKS) * 2, int(XRUN_MIN_BLOCKS))
+    return selector
+
+
+def test_xruns_do_not_move_the_playing_output():
+    selector = make_selector()
+    devices = [HEADPHONES, SPEAKERS]
+    assert selector.select(devices, current_uid=HEADPHONES.uid) == HEADPHONES
+
+
+def test_xruns_demote_device_when_choosing_a_new_output():
+    selector = make_selector()
+    assert selector.select([HEADPHONES, SPEAKERS]) == SPEAKERS
+
+
+def test_playing_output_is_replaced_once_it_is_gone():
+    selector = make_selector()
+    assert selector.select([SPEAKERS], current_uid=HEADPHONES.uid) == SPEAKERS
@@ -0,0 +1,82 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import compressor
+from compressor import CompressorKernel
+
+
+FRAMES = 4096
+CHANNELS = 2
+SAMPLERATE = 48000
+VIEW_SLACK_BYTES = 1536
+STATE_SLACK_BYTES = 64
+KERNEL_TRACES = [tracemalloc.Filter(True, compressor.__file__)]
+
+
+def make_blocks(count: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(7)
+    return [
+        (rng.standard_normal((FRAMES, CHANNELS)) * 0.3).astype(np.float32)
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("max_frames", [FRAMES, FRAMES * 2])
+def test_process_allocates_nothing_per_block(max_frames: int):
+    """워밍업 뒤 process() 한 번마다 늘어나는 메모리는 뷰 헤더 몇 개뿐이어야 한다.
+
+    max_frames가 FRAMES보다 크면 스크래치 버퍼를 잘라 쓰는 경로를 탄다.
+    """
+    kernel = CompressorKernel()
+    kernel.prepare(max_frames, CHANNELS, SAMPLERATE)
+    blocks = make_blocks(8)
+    outdata = np.zeros((FRAMES, CHANNELS), dtype=np.float32)
+    for block in blocks:
+        kernel.process(block, outdata)
+
+    growth = np.zeros(len(blocks) * 4, dtype=np.int64)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(KERNEL_TRACES)
+        for index in range(growth.shape[0]):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            kernel.process(blocks[index % len(blocks)], outdata)
+            growth[index] = tracemalloc.get_traced_memory()[1] - current
+        after = tracemalloc.take_snapshot().filter_traces(KERNEL_TRACES)
+    finally:
+        tracemalloc.stop()
+
+    # 호출 안에서 잠깐 사는 슬라이스 뷰 객체(하나에 100바이트 남짓, 동시에 열 개 안팎)만
+    # 허용한다. 블록 버퍼는 가장 작은 float32 채널 하나도 FRAMES * 4 = 16KB라 바로 넘는다.
+    # 호출이 끝난 뒤 compressor.py에 남는 것은 필터 상태 float 두 개가 바뀌는 정도다.
+    assert growth.max() <= VIEW_SLACK_BYTES
+    net = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    assert abs(net) <= STATE_SLACK_BYTES
+
+
+def test_process_matches_reference_math():
+    """정적 곡선과 어택/릴리즈 재귀를 샘플 단위 루프로 직접 계산한 값과 같아야 한다."""
+    kernel = CompressorKernel(threshold_db=-24.0, makeup_gain_db=6.0, ratio=3.0)
+    kernel.prepare(FRAMES, CHANNELS, SAMPLERATE)
+    params = kernel.params
+    blocks = make_blocks(2)
+    outputs = []
+    for block in blocks:
+        outdata = np.zeros_like(block)
+        kernel.process(block, outdata)
+        outputs.append(outdata)
+
+    release_state = attack_state = 0.0
+    for block, outdata in zip(blocks, outputs):
+        level = np.maximum(np.abs(block).max(axis=1).astype(np.float64), 1e-9)
+        reduction = np.maximum(np.log(level * params.inv_threshold) * params.reduction_slope, 0.0)
+        expected = np.empty(FRAMES, dtype=np.float64)
+        for index, value in enumerate(reduction):
+            release_state = max(value, release_state * params.release_coeff)
+            attack_state = params.attack_coeff * attack_state + (1.0 - params.attack_coeff) * release_state
+            expected[index] = attack_state
+        gain = (params.makeup_gain * np.exp(-expected)).astype(np.float32)
+        np.testing.assert_allclose(outdata, block * gain[:, None], rtol=1e-4, atol=1e-6)
@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("numba")
+
+from bench_dsp import PARAMETER_SETS, PARITY_TOLERANCE, make_signal, parity_error
+from dsp_engine import BACKEND_NUMBA
+
+SAMPLERATE = 48000
+
+
+@pytest.mark.parametrize("params_name", sorted(PARAMETER_SETS))
+@pytest.mark.parametrize("channels", [1, 2])
+@pytest.mark.parametrize("blocksize", [64, 512, 4096])
+def test_numba_matches_numpy(params_name: str, channels: int, blocksize: int):
+    signal = make_signal(SAMPLERATE, 2, SAMPLERATE)
+    error = parity_error(params_name, BACKEND_NUMBA, SAMPLERATE, channels, blocksize, signal)
+    assert error <= PARITY_TOLERANCE, f"{params_name}: 최대 오차 {error:.2e}"
@@ -0,0 +1,67 @@
+import logging
+import queue
+
+import pytest
+
+import portaudio_index
+from audio_router import AudioRouter
+from fake_audio import FakeHAL, FakePortAudio
+from latency_tuner import DEFAULT_AUTO_TUNE_SETTING
+from stream_controller import STATE_RUNNING, StreamController
+
+SPEAKERS = "MacBook Pro Speakers"
+HEADPHONES = "AirPods Pro"
+
+
+@pytest.fixture
+def hal():
+    hal = FakeHAL()
+    hal.blackhole()
+    hal.builtin(name=SPEAKERS)
+    return hal
+
+
+@pytest.fixture
+def portaudio(hal):
+    portaudio = FakePortAudio(hal)
+    portaudio_index.use_backend(portaudio)
+    yield portaudio
+    portaudio_index.use_backend(None)
+
+
+@pytest.fixture
+def results():
+    return queue.Queue()
+
+
+@pytest.fixture
+def controller(portaudio, results):
+    logger = logging.getLogger("test_stream_controller")
+    controller = StreamController(
+        AudioRouter(logger),
+        lambda uid: portaudio_index.snapshot().output_index_by_name.get(uid),
+        logger,
+        results.put,
+        post=lambda callback, *args: callback(*args),
+    )
+    yield controller
+    controller.close()
+    controller.shutdown()
+
+
+def open_and_wait(controller, results, name: str, restart: bool):
+    controller.open(name, name, DEFAULT_AUTO_TUNE_SETTING, restart)
+    return results.get(timeout=10)
+
+
+def test_no_reinitialize_under_running_stream(hal, portaudio, controller, results):
+    """엔진 스트림이 도는 동안에는 컨트롤러가 재초기화하지 않고 엔진이 스트림을 닫은 뒤 재열거한다."""
+    assert open_and_wait(controller, results, SPEAKERS, restart=False).success
+    hal.add_device("AirPods-UID", HEADPHONES)
+    result = open_and_wait(controller, results, HEADPHONES, restart=True)
+
+    assert result.success
+    assert result.output_name == HEADPHONES
+    assert controller.state == STATE_RUNNING
+    assert portaudio.calls["initialize"] == 1
+    assert portaudio.calls["terminated_open_streams"] == 0